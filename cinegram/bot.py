@@ -1,8 +1,16 @@
 import os
+import asyncio
 import logging
+import secrets
+from telegram import Update
 from telegram.ext import ApplicationBuilder, CommandHandler, MessageHandler, filters, ConversationHandler, CallbackQueryHandler
 from cinegram.config import settings
-from cinegram.handlers import start, archive_handler, video_handler, external_handler, search_handler, auth_handler
+from cinegram.utils import http_client
+from cinegram.services.image_generator import ImageGenerator
+from cinegram.services.tmdb_service import TmdbService
+from cinegram.services.translation_service import TranslationMemo
+from cinegram.services.rate_limiter import SendScheduler
+from cinegram.handlers import start, archive_handler, video_handler, external_handler, search_handler, auth_handler, admin_handler
 from telegram.ext import PreCheckoutQueryHandler, MessageHandler, filters
 
 # Configure Logging
@@ -17,7 +25,7 @@ import requests
 
 def check_ollama_health():
     """Checks if Ollama is running locally."""
-    url = "http://localhost:11434/api/tags"
+    url = f"{settings.OLLAMA_URL}/api/tags"
     try:
         response = requests.get(url, timeout=2)
         if response.status_code == 200:
@@ -28,12 +36,43 @@ def check_ollama_health():
     logging.warning("⚠️ WARNING: Ollama is NOT reachable. AI features will fail.")
     return False
 
+async def on_startup(application):
+    """Warms up shared resources before the first update is handled."""
+    await TmdbService.load_configuration()
+    await asyncio.to_thread(TranslationMemo.warm)
+    ImageGenerator.sweep_temp()
+    job_queue = application.job_queue
+    # post_init runs again when a failed webhook start falls back to polling: register once
+    if job_queue and not job_queue.get_jobs_by_name("sweep_temp"):
+        job_queue.run_repeating(sweep_temp_job, interval=settings.TEMP_MAX_AGE, first=settings.TEMP_MAX_AGE, name="sweep_temp")
+    if job_queue and not job_queue.get_jobs_by_name("resume_jobs"):
+        # Uploads interrupted by a restart are resumed once their lease expires
+        job_queue.run_repeating(video_handler.resume_jobs, interval=settings.PUBLISH_QUEUE_POLL, first=5, name="resume_jobs")
+    await asyncio.to_thread(ImageGenerator.start_pool)
+
+async def sweep_temp_job(context):
+    """Periodic cleanup of stale poster files in TEMP_DIR."""
+    await asyncio.to_thread(ImageGenerator.sweep_temp)
+
+async def on_shutdown(application):
+    """Releases shared resources when the bot stops."""
+    await http_client.close_client()
+    ImageGenerator.shutdown_pool()
+
 def main():
     if not settings.BOT_TOKEN:
         print("Error: BOT_TOKEN not found in environment variables.")
         return
 
-    application = ApplicationBuilder().token(settings.BOT_TOKEN).build()
+    application = (
+        ApplicationBuilder()
+        .token(settings.BOT_TOKEN)
+        .rate_limiter(SendScheduler())
+        .concurrent_updates(settings.CONCURRENT_UPDATES)
+        .post_init(on_startup)
+        .post_shutdown(on_shutdown)
+        .build()
+    )
 
     # --- Auth Handlers (Public/Gatekeeper) ---
     application.add_handler(PreCheckoutQueryHandler(auth_handler.precheckout_callback))
@@ -45,6 +84,12 @@ def main():
     # Password Handler (Explicitly check text)
     application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, auth_handler.handle_password), group=0)
 
+    # --- Admin Commands ---
+    application.add_handler(CommandHandler("cachestats", admin_handler.cache_stats_command))
+    application.add_handler(CommandHandler("purgecache", admin_handler.purge_cache_command))
+    application.add_handler(CommandHandler("pretranslate", admin_handler.pretranslate_command))
+    application.add_handler(CommandHandler("stats", admin_handler.stats_command))
+
     # --- Protected Handlers ---
     # We wrap them with auth_handler.auth_required
     
@@ -66,7 +111,35 @@ def main():
 
     print("Bot is running...")
     check_ollama_health()
-    application.run_polling()
+    run(application)
+
+def run(application):
+    """
+    Webhook mode (embedded HTTP server) when WEBHOOK_URL is set, long polling otherwise.
+    If the webhook cannot be started, falls back to polling (which removes the webhook).
+    """
+    if settings.WEBHOOK_URL:
+        # Telegram sends this in every request; anything without it is rejected
+        secret_token = settings.WEBHOOK_SECRET or secrets.token_urlsafe(32)
+        webhook_url = f"{settings.WEBHOOK_URL.rstrip('/')}/{settings.WEBHOOK_PATH}"
+        try:
+            logging.info(f"Webhook mode: listening on {settings.WEBHOOK_LISTEN}:{settings.WEBHOOK_PORT}/{settings.WEBHOOK_PATH}")
+            application.run_webhook(
+                listen=settings.WEBHOOK_LISTEN,
+                port=settings.WEBHOOK_PORT,
+                url_path=settings.WEBHOOK_PATH,
+                webhook_url=webhook_url,
+                secret_token=secret_token,
+                max_connections=settings.WEBHOOK_MAX_CONNECTIONS,
+                allowed_updates=Update.ALL_TYPES,
+                close_loop=False # Keep the loop usable for the polling fallback
+            )
+            return
+        except Exception as e:
+            logging.error(f"⚠️ Webhook mode failed ({e}). Falling back to polling.")
+
+    logging.info("Polling mode.")
+    application.run_polling(allowed_updates=Update.ALL_TYPES)
 
 if __name__ == '__main__':
     main()
@@ -9,11 +9,13 @@ CHANNEL_ID = os.getenv("CHANNEL_ID")
 INSTAGRAM_URL = os.getenv("INSTAGRAM_URL", "https://instagram.com")
 TMDB_API_KEY = os.getenv("TMDB_API_KEY")
 OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "dolphin-llama3:latest")
+OLLAMA_URL = os.getenv("OLLAMA_URL", "http://localhost:11434")
 
 # Access Control & Payments
 ADMIN_ID = int(os.getenv("ADMIN_ID", "0")) # Owner ID
 ACCESS_PASSWORD = os.getenv("ACCESS_PASSWORD", "cinegram123") # Fallback password
 STARS_PRICE = 50 # Cost in Stars to unlock
+AUTH_RELOAD_INTERVAL = float(os.getenv("AUTH_RELOAD_INTERVAL", "5")) # Seconds between whitelist mtime checks
 
 # Paths
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -27,3 +29,100 @@ os.makedirs(TEMP_DIR, exist_ok=True)
 # Image Generation Defaults
 DEFAULT_FONT_PATH = os.path.join(FONTS_DIR, "Roboto-Bold.ttf") # User needs to provide this or we fallback
 IMAGE_SIZE = (1920, 1080)
+
+# HTTP Client (shared async connection pool)
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "10")) # Seconds per request
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "3"))
+HTTP_BACKOFF = float(os.getenv("HTTP_BACKOFF", "0.5")) # Base delay, doubles per retry
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "20"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "10"))
+TMDB_TIMEOUT = float(os.getenv("TMDB_TIMEOUT", "8"))
+ARCHIVE_TIMEOUT = float(os.getenv("ARCHIVE_TIMEOUT", "15")) # Internet Archive is slower than TMDB
+
+# Caches (persistent, survive restarts)
+CACHE_DIR = os.getenv("CACHE_DIR", os.path.join(BASE_DIR, "cache"))
+TMDB_CACHE_TTL = int(os.getenv("TMDB_CACHE_TTL", str(7 * 24 * 3600))) # Found results
+TMDB_NEGATIVE_TTL = int(os.getenv("TMDB_NEGATIVE_TTL", str(6 * 3600))) # "No result" answers
+ARCHIVE_CACHE_TTL = int(os.getenv("ARCHIVE_CACHE_TTL", str(24 * 3600))) # IA item fields/images, revalidated after
+
+# Poster Rendering (process pool)
+RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", str(os.cpu_count() or 2))) # 0 = render in a thread
+RENDER_QUEUE_SIZE = int(os.getenv("RENDER_QUEUE_SIZE", "8")) # Renders allowed to wait for a worker
+POSTER_BACKGROUND_MODE = os.getenv("POSTER_BACKGROUND_MODE", "exact").lower() # "exact" or "fast" (low-res blur)
+POSTER_BACKGROUND_SCALE = int(os.getenv("POSTER_BACKGROUND_SCALE", "4")) # Fast mode works at 1/N resolution (4 or 8)
+POSTER_OUTPUT = os.getenv("POSTER_OUTPUT", "memory").lower() # "memory" (bytes) or "disk" (file in TEMP_DIR)
+TEMP_MAX_AGE = int(os.getenv("TEMP_MAX_AGE", "3600")) # Stale poster files older than this are swept
+
+# Poster Image Cache (on disk, shared with render workers)
+IMAGE_CACHE_DIR = os.getenv("IMAGE_CACHE_DIR", os.path.join(CACHE_DIR, "images"))
+IMAGE_CACHE_MAX_BYTES = int(os.getenv("IMAGE_CACHE_MAX_MB", "500")) * 1024 * 1024
+IMAGE_CACHE_VARIANTS = os.getenv("IMAGE_CACHE_VARIANTS", "false").lower() == "true" # Store pre-downscaled (foreground-sized) raw PPM copies
+
+# TMDB Image Sizes
+TMDB_CONFIG_TTL = int(os.getenv("TMDB_CONFIG_TTL", str(3 * 24 * 3600)))
+POSTER_SOURCE_HEIGHT = int(IMAGE_SIZE[1] * 0.95) # Foreground height the source poster must cover
+
+# Ollama (local LLM)
+OLLAMA_CONCURRENCY = int(os.getenv("OLLAMA_CONCURRENCY", "1")) # Generations the local model serves at once
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m") # Keep the model loaded between calls
+OLLAMA_RETRIES = int(os.getenv("OLLAMA_RETRIES", "1"))
+OLLAMA_MEMORY_CACHE_SIZE = int(os.getenv("OLLAMA_MEMORY_CACHE_SIZE", "256")) # In-memory LRU entries
+OLLAMA_CACHE_TTL = int(os.getenv("OLLAMA_CACHE_TTL", str(30 * 24 * 3600))) # Disk cache of answers
+
+# Spam Filter
+SPAM_LEARN_THRESHOLD = int(os.getenv("SPAM_LEARN_THRESHOLD", "3")) # AI corrections before a dropped word becomes spam
+
+# Batch Uploads (albums / forwarded backlogs)
+BATCH_WINDOW = float(os.getenv("BATCH_WINDOW", "4")) # Seconds of quiet that close a batch
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", "200")) # A full batch is flushed immediately
+BATCH_PUBLISH_AHEAD = int(os.getenv("BATCH_PUBLISH_AHEAD", "8")) # Rendered posters waiting to be published
+BATCH_PROGRESS_INTERVAL = float(os.getenv("BATCH_PROGRESS_INTERVAL", "3")) # Min seconds between progress edits
+
+# Telegram Send Pacing (token buckets)
+TELEGRAM_GLOBAL_RATE = float(os.getenv("TELEGRAM_GLOBAL_RATE", "25")) # Messages/second for the whole bot (limit ~30)
+TELEGRAM_GLOBAL_BURST = int(os.getenv("TELEGRAM_GLOBAL_BURST", "25"))
+TELEGRAM_CHAT_RATE = float(os.getenv("TELEGRAM_CHAT_RATE", "1")) # Messages/second per private chat
+TELEGRAM_CHAT_BURST = int(os.getenv("TELEGRAM_CHAT_BURST", "3"))
+TELEGRAM_GROUP_RATE = float(os.getenv("TELEGRAM_GROUP_RATE", "18")) # Messages/minute per group or channel (limit ~20)
+TELEGRAM_GROUP_BURST = int(os.getenv("TELEGRAM_GROUP_BURST", "3"))
+TELEGRAM_MAX_RETRIES = int(os.getenv("TELEGRAM_MAX_RETRIES", "3")) # Retries after an unexpected 429
+
+# Publish Queue (durable uploads)
+PUBLISH_LEASE = int(os.getenv("PUBLISH_LEASE", "120")) # Seconds a worker owns a job without progress
+PUBLISH_MAX_ATTEMPTS = int(os.getenv("PUBLISH_MAX_ATTEMPTS", "3")) # Resume attempts per job
+PUBLISH_QUEUE_POLL = int(os.getenv("PUBLISH_QUEUE_POLL", "60")) # Seconds between checks for abandoned jobs
+PUBLISH_QUEUE_RETENTION = int(os.getenv("PUBLISH_QUEUE_RETENTION", str(7 * 24 * 3600))) # Finished jobs kept
+
+# Update Delivery
+CONCURRENT_UPDATES = int(os.getenv("CONCURRENT_UPDATES", "16")) # Updates handled at once (1 = one by one)
+WEBHOOK_URL = os.getenv("WEBHOOK_URL") # Public HTTPS base URL; unset = long polling
+WEBHOOK_LISTEN = os.getenv("WEBHOOK_LISTEN", "0.0.0.0")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8443"))
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "telegram")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET") # Random per start if unset
+WEBHOOK_MAX_CONNECTIONS = int(os.getenv("WEBHOOK_MAX_CONNECTIONS", "40")) # Parallel deliveries Telegram may open
+
+# Stage Concurrency (slots held only while a job is in that stage)
+LOOKUP_CONCURRENCY = int(os.getenv("LOOKUP_CONCURRENCY", "8")) # TMDB requests in flight
+SEND_CONCURRENCY = int(os.getenv("SEND_CONCURRENCY", "4")) # Publications being uploaded to Telegram
+
+# Offline Title Index (TMDB daily export + publish history)
+TITLE_INDEX_MIN_POPULARITY = float(os.getenv("TITLE_INDEX_MIN_POPULARITY", "1.0")) # Export entries below this are skipped
+TITLE_INDEX_FUZZY_MIN = float(os.getenv("TITLE_INDEX_FUZZY_MIN", "0.88")) # Similarity needed for a fuzzy hit
+TITLE_INDEX_FUZZY_CANDIDATES = int(os.getenv("TITLE_INDEX_FUZZY_CANDIDATES", "50")) # Trigram candidates re-ranked
+TITLE_INDEX_DOMINANCE = float(os.getenv("TITLE_INDEX_DOMINANCE", "5")) # Popularity ratio that settles same-title remakes
+
+# TMDB Match Scoring
+TMDB_MATCH_CANDIDATES = int(os.getenv("TMDB_MATCH_CANDIDATES", "20")) # Search results scored (a full page)
+TMDB_MATCH_THRESHOLD = float(os.getenv("TMDB_MATCH_THRESHOLD", "0.6")) # Minimum MatchScorer score
+
+# TMDB Query Plan
+TMDB_PLAN_CONCURRENCY = int(os.getenv("TMDB_PLAN_CONCURRENCY", "4")) # Search variants in flight per lookup
+TMDB_HEDGE_DELAY = float(os.getenv("TMDB_HEDGE_DELAY", "0.25")) # Seconds before each next variant starts anyway
+TMDB_HEDGE_ACCEPT = float(os.getenv("TMDB_HEDGE_ACCEPT", "0.9")) # Score that settles the lookup from any variant (else the first variant over TMDB_MATCH_THRESHOLD does)
+
+# Internet Archive Search (/search)
+ARCHIVE_SEARCH_PAGE_SIZE = int(os.getenv("ARCHIVE_SEARCH_PAGE_SIZE", "5")) # Results (buttons) per page
+ARCHIVE_SEARCH_BATCH = int(os.getenv("ARCHIVE_SEARCH_BATCH", "100")) # Rows per scrape call (API minimum is 100)
+ARCHIVE_SEARCH_TTL = int(os.getenv("ARCHIVE_SEARCH_TTL", str(6 * 3600))) # Cached result batches and page buttons
+ARCHIVE_PREFETCH_CONCURRENCY = int(os.getenv("ARCHIVE_PREFETCH_CONCURRENCY", "4")) # Metadata fetched ahead per page
@@ -0,0 +1,155 @@
+from telegram import Update
+from telegram.ext import ContextTypes
+from cinegram.config import settings
+from cinegram.services.tmdb_service import TmdbService
+from cinegram.services.archive_service import ArchiveService
+from cinegram.services.ollama_client import OllamaClient
+from cinegram.services.translation_service import TranslationService, TranslationMemo
+from cinegram.services.spam_filter import SpamFilter
+from cinegram.services.filename_parser import FilenameParser
+from cinegram.services.rate_limiter import SendScheduler
+from cinegram.services.publish_queue import PublishQueue
+from cinegram.services.title_index import TitleIndex
+from cinegram.utils.singleflight import SingleFlight
+from functools import wraps
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+# --- Decorator ---
+def admin_only(func):
+    """Decorator to restrict a command to the bot owner (ADMIN_ID)."""
+    @wraps(func)
+    async def wrapper(update: Update, context: ContextTypes.DEFAULT_TYPE, *args, **kwargs):
+        if update.effective_user.id != settings.ADMIN_ID:
+            await update.message.reply_text("⛔ Comando solo para el administrador.")
+            return
+        return await func(update, context, *args, **kwargs)
+    return wrapper
+
+def _caches() -> dict:
+    """Named persistent caches that can be inspected/purged from Telegram."""
+    return {
+        "tmdb": TmdbService.SEARCH_CACHE,
+        "tmdb_details": TmdbService.DETAILS_CACHE,
+        "ollama": OllamaClient.CACHE,
+        "archive": ArchiveService.CACHE,
+        "archive_search": ArchiveService.SEARCH_CACHE,
+    }
+
+# --- Commands ---
+
+@admin_only
+async def cache_stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Shows hit/miss counters for every persistent cache. Usage: /cachestats"""
+    lines = ["📊 **Caché**"]
+    for name, cache in _caches().items():
+        stats = cache.stats()
+        lines.append(
+            f"• `{name}`: {stats['entries']} entradas, "
+            f"{stats['hits']} hits / {stats['misses']} misses "
+            f"({stats['hit_rate']:.0%})"
+        )
+    await update.message.reply_text("\n".join(lines), parse_mode="Markdown")
+
+@admin_only
+async def purge_cache_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """
+    Purges persistent caches.
+    Usage: /purgecache [name] [expired]
+    """
+    args = [a.lower() for a in (context.args or [])]
+    expired_only = "expired" in args
+    names = [a for a in args if a != "expired"]
+
+    caches = _caches()
+    unknown = [n for n in names if n not in caches]
+    if unknown:
+        await update.message.reply_text(f"⚠️ Caché desconocida: {', '.join(unknown)}. Disponibles: {', '.join(caches)}")
+        return
+
+    lines = ["🧹 **Caché purgada**"]
+    for name in names or caches:
+        removed = caches[name].purge(expired_only=expired_only)
+        lines.append(f"• `{name}`: {removed} entradas eliminadas")
+        logger.info(f"Cache '{name}' purged ({removed} entries, expired_only={expired_only})")
+    await update.message.reply_text("\n".join(lines), parse_mode="Markdown")
+
+@admin_only
+async def pretranslate_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """
+    Pre-translates the English overviews of a list of TMDB ids into the memo,
+    so later publications of those films skip the LLM.
+    Usage: /pretranslate 603 604 605
+    """
+    ids = [int(a) for a in " ".join(context.args or []).replace(",", " ").split() if a.isdigit()]
+    if not ids:
+        await update.message.reply_text("🈯 Uso: `/pretranslate <tmdb_id> [tmdb_id ...]`", parse_mode="Markdown")
+        return
+
+    status = await update.message.reply_text(f"🈯 Pre-traduciendo {len(ids)} películas...")
+    translated, skipped, failed = 0, 0, 0
+    for index, movie_id in enumerate(ids, 1):
+        # Films with a Spanish overview on TMDB never need the LLM
+        spanish = await TmdbService.get_movie_details(movie_id, "es-MX")
+        if spanish and spanish.get('overview'):
+            skipped += 1
+            continue
+
+        english = await TmdbService.get_movie_details(movie_id, "en-US")
+        overview = (english or {}).get('overview')
+        if not overview:
+            failed += 1
+            continue
+
+        if TranslationMemo.get(movie_id, TranslationService.MODEL, overview):
+            skipped += 1
+            continue
+
+        result = await TranslationService.translate_overview(movie_id, overview)
+        if result != overview:
+            translated += 1
+        else:
+            failed += 1
+
+        if index % 5 == 0:
+            try:
+                await status.edit_text(f"🈯 Pre-traduciendo... {index}/{len(ids)}")
+            except Exception:
+                pass
+
+    await status.edit_text(
+        f"🈯 **Pre-traducción lista**\n"
+        f"✅ Traducidas: {translated}\n"
+        f"⏭️ Ya disponibles: {skipped}\n"
+        f"❌ Fallidas: {failed}\n"
+        f"📚 Memoria: {TranslationMemo.count()} entradas",
+        parse_mode="Markdown"
+    )
+
+@admin_only
+async def stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Shows upload pipeline metrics since start (parser strategies, spam, AI fallback rate, deduplicated calls). Usage: /stats"""
+    spam = SpamFilter.STATS
+    parser = FilenameParser.STATS
+    sends = SendScheduler.STATS
+    jobs = await asyncio.to_thread(PublishQueue.counts)
+    index = TitleIndex.STATS
+    await update.message.reply_text(
+        f"📈 **Estadísticas**\n"
+        f"📥 Subidas: {spam['uploads']}\n"
+        f"🧹 Con spam limpiado: {spam['stripped']}\n"
+        f"🤖 Enviadas a IA: {spam['ai_fallbacks']} ({SpamFilter.fallback_rate():.0%})\n"
+        f"⚡ Parser: {parser['fast_path']} rápido / {parser['guessit']} guessit / {parser['raw']} crudo\n"
+        f"📤 Envíos: {sends['sent']} (en cola: {sends['queued']}, máx {sends['max_queued']}), "
+        f"espera media {SendScheduler.average_wait():.1f}s / máx {sends['wait_max']:.1f}s, 429: {sends['retry_after']}\n"
+        f"🗂️ Cola: {sum(jobs.get(s, 0) for s in ('lookup', 'render', 'publish'))} pendientes, "
+        f"{jobs.get('done', 0)} publicadas, {jobs.get('failed', 0)} fallidas\n"
+        f"📇 Índice local: {index['exact']} exactos / {index['fuzzy']} aproximados / "
+        f"{index['ambiguous']} ambiguos / {index['misses']} sin resultado\n"
+        f"🔗 Deduplicadas en vuelo: " + ", ".join(
+            f"{name} {s['coalesced']}/{s['calls']}" for name, s in SingleFlight.stats().items()
+        ),
+        parse_mode="Markdown"
+    )
@@ -38,8 +38,8 @@ async def process_archive_item(update: Update, context: ContextTypes.DEFAULT_TYP
         await message.reply_text("❌ Could not extract identifier from URL.")
         return
 
-    # 3. Fetch Metadata
-    data = ArchiveService.get_metadata(identifier)
+    # 3. Fetch Metadata (fields only: the file listing is fetched below if needed)
+    data = await ArchiveService.get_item(identifier, with_images=False)
     if not data:
         await message.reply_text("❌ Failed to fetch data from Internet Archive.")
         return
@@ -54,7 +54,11 @@ async def process_archive_item(update: Update, context: ContextTypes.DEFAULT_TYP
     
     if ia_title:
         await message.reply_text(f"🎬 Searching TMDB for: {ia_title}...")
-        tmdb_data = TmdbService.search_movie(ia_title, ia_date)
+        tmdb_data = await TmdbService.search_movie(ia_title, ia_date)
+
+    # The IA cover is only a fallback for a missing TMDB poster
+    if not (tmdb_data and tmdb_data.get('poster_path')):
+        data['files'] = await ArchiveService.get_images(identifier)
 
     # 5. Parse Metadata (Merge IA + TMDB)
     metadata = MetadataParser.parse(data, tmdb_data)
@@ -69,7 +73,7 @@ async def process_archive_item(update: Update, context: ContextTypes.DEFAULT_TYP
     await message.reply_text("🎨 Generating poster...")
     try:
         if metadata.get('poster_url'):
-            image_path = ImageGenerator.generate_poster(
+            poster = await ImageGenerator.generate_poster_async(
                 metadata['poster_url'],
                 metadata['title'],
                 metadata['description']
@@ -88,5 +92,8 @@ async def process_archive_item(update: Update, context: ContextTypes.DEFAULT_TYP
     # send_publication expects 'update' to get chat_id. 
     # Use helper that can handle both or extraction?
     # send_publication uses `update.effective_chat.id` which works for both Message and CallbackQuery updates.
-    await send_publication(update, context, metadata, image_path)
+    try:
+        await send_publication(update, context, metadata, poster)
+    finally:
+        ImageGenerator.discard(poster)
 
@@ -0,0 +1,251 @@
+from telegram import Update
+from telegram.ext import ContextTypes
+from cinegram.config import settings
+from cinegram.services.tmdb_service import TmdbService
+from cinegram.services.image_generator import ImageGenerator
+from cinegram.services.spam_filter import SpamFilter
+from cinegram.services.publish_queue import PublishQueue
+from cinegram.handlers import video_handler
+import logging
+import asyncio
+import time
+
+logger = logging.getLogger(__name__)
+
+# Videos waiting for their chat's window to close: chat_id -> {"items": [...], "timer": Task}
+_PENDING = {}
+# When each chat last forwarded a video (monotonic), to tell a lone forward from a burst
+_LAST_FORWARD = {}
+
+def should_batch(message) -> bool:
+    """
+    Whether a video goes through the batch pipeline. Albums always do. A forward only
+    does when it follows another forward within BATCH_WINDOW: the first one of a burst
+    is handled right away as a single upload, so a lone forward never waits.
+    """
+    if message.media_group_id:
+        return True
+    if not message.forward_origin:
+        return False
+    now = time.monotonic()
+    for chat_id, seen in list(_LAST_FORWARD.items()):
+        if now - seen > settings.BATCH_WINDOW:
+            del _LAST_FORWARD[chat_id]
+    burst = message.chat_id in _LAST_FORWARD or message.chat_id in _PENDING
+    _LAST_FORWARD[message.chat_id] = now
+    return burst
+
+def enqueue(update: Update, context: ContextTypes.DEFAULT_TYPE, message, video):
+    """
+    Adds a video to its chat's pending batch. The batch is flushed when no new video
+    arrives for BATCH_WINDOW seconds (albums and forwards arrive in bursts) or when
+    it reaches BATCH_MAX_SIZE.
+    """
+    chat_id = message.chat_id
+    pending = _PENDING.setdefault(chat_id, {"items": [], "timer": None})
+    pending["items"].append({"update": update, "message": message, "video": video})
+
+    if pending["timer"]:
+        pending["timer"].cancel()
+
+    if len(pending["items"]) >= settings.BATCH_MAX_SIZE:
+        _flush(context, chat_id)
+    else:
+        pending["timer"] = asyncio.create_task(_flush_later(context, chat_id))
+
+async def _flush_later(context: ContextTypes.DEFAULT_TYPE, chat_id: int):
+    await asyncio.sleep(settings.BATCH_WINDOW)
+    _flush(context, chat_id)
+
+def _flush(context: ContextTypes.DEFAULT_TYPE, chat_id: int):
+    pending = _PENDING.pop(chat_id, None)
+    if not pending or not pending["items"]:
+        return
+    items = pending["items"]
+    if len(items) == 1:
+        # A lone item (a one-video album, a burst's only follow-up forward) is not a batch:
+        # keep the usual per-file feedback
+        context.application.create_task(
+            video_handler.handle_video(items[0]["update"], context, items[0]["message"], items[0]["video"])
+        )
+        return
+    # Keep the original order (album position / forward order)
+    items.sort(key=lambda item: item["message"].message_id)
+    context.application.create_task(BatchJob(context, chat_id, items).run())
+
+class BatchJob:
+    """
+    One import job over many videos. Every item goes through
+    parse -> TMDB -> (AI -> TMDB) -> render -> publish.
+    Each stage is limited inside its service (limits shared with single uploads), so items overlap across stages and
+    throughput is set by the slowest stage. Publishing is sequential and keeps the
+    original order; rendering may run at most BATCH_PUBLISH_AHEAD items ahead of it.
+    """
+
+    def __init__(self, context: ContextTypes.DEFAULT_TYPE, chat_id: int, items: list):
+        self.context = context
+        self.chat_id = chat_id
+        self.items = items
+        self.counts = {"lookup": 0, "ai": 0, "render": 0, "published": 0, "failed": 0}
+        self.failures = []
+        self.status_message = None
+        self._published_upto = 0
+        self._progress = asyncio.Condition()
+        self._last_edit = 0.0
+        for item in items:
+            item["ready"] = asyncio.Event()
+            item["poster"] = None
+            item["movie"] = None
+            item["error"] = None
+            item["job_id"] = None
+
+    async def run(self):
+        started = time.monotonic()
+        self.status_message = await self.context.bot.send_message(
+            chat_id=self.chat_id, text=self._progress_text()
+        )
+        preparers = [asyncio.create_task(self._prepare(index, item)) for index, item in enumerate(self.items)]
+        try:
+            await self._publish_in_order()
+        finally:
+            for task in preparers:
+                task.cancel()
+            for item in self.items:
+                ImageGenerator.discard(item["poster"])
+
+        logger.info(
+            f"Batch of {len(self.items)} in chat {self.chat_id} done in {time.monotonic() - started:.1f}s "
+            f"({self.counts['published']} published, {self.counts['failed']} failed)"
+        )
+        await self._update_progress(final=True)
+        await self._report_failures()
+
+    # --- Stages ---
+
+    async def _prepare(self, index: int, item: dict):
+        """Everything before publishing. Always sets item['ready']."""
+        message, video = item["message"], item["video"]
+        try:
+            # 1. Parse (cheap, no limit)
+            filename = getattr(video, 'file_name', None) or "Unknown.mp4"
+            caption = message.caption or ""
+            source = video_handler.resolve_source(filename, caption)
+            item["job_id"] = await asyncio.to_thread(PublishQueue.add, message.chat_id, message.message_id, video.file_id, source["title"], source["year"])
+
+            # 2. TMDB
+            tmdb_data = None
+            if not source["is_generic"]:
+                tmdb_data = await TmdbService.search_movie(source["title"], source["year"])
+                self.counts["lookup"] += 1
+
+            # 3. AI (only for what the parser could not resolve)
+            learn_from = None
+            if not tmdb_data:
+                context_text = f"Filename: {filename}. Caption: {caption}."
+                SpamFilter.STATS["ai_fallbacks"] += 1
+                from cinegram.services.ai_service import AiService
+                ai_data = await AiService.extract_metadata(context_text)
+                self.counts["ai"] += 1
+                if ai_data:
+                    if not caption:
+                        learn_from = source["parsed_title"]
+                    await asyncio.to_thread(PublishQueue.update_search, item["job_id"], ai_data['title'], ai_data.get('year'))
+                    tmdb_data = await TmdbService.search_movie(ai_data['title'], ai_data.get('year'))
+
+            if not tmdb_data:
+                item["error"] = f"No encontré nada en TMDB para '{source['title']}'."
+                return
+
+            movie = video_handler.extract_movie(tmdb_data)
+            if learn_from:
+                # Words the AI dropped from the filename, now that TMDB confirmed its title
+                SpamFilter.learn(learn_from, ai_data['title'], [movie['title'], movie['original_title']])
+            if not movie["poster_path"] or not movie["year"]:
+                item["error"] = f"Encontré '{movie['title']}' pero le falta portada/año."
+                return
+            item["movie"] = movie
+            await asyncio.to_thread(PublishQueue.set_movie, item["job_id"], movie)
+
+            # 4. Render (bounded look-ahead so posters don't pile up in memory)
+            async with self._progress:
+                await self._progress.wait_for(
+                    lambda: index < self._published_upto + settings.BATCH_PUBLISH_AHEAD
+                )
+            item["poster"] = await ImageGenerator.generate_poster_async(
+                TmdbService.get_poster_url(movie["poster_path"]), movie["title"], movie["description"],
+                job_id=f"{message.chat_id}_{message.message_id}"
+            )
+            self.counts["render"] += 1
+
+        except Exception as e:
+            logger.error(f"Batch item {index} failed: {e}")
+            item["error"] = f"Error: {e}"
+        finally:
+            item["ready"].set()
+            await self._update_progress()
+
+    async def _publish_in_order(self):
+        """Sequential publish stage: posts items in their original order as they become ready."""
+        for index, item in enumerate(self.items):
+            await item["ready"].wait()
+            if item["error"] is None:
+                try:
+                    await video_handler.publish_movie(
+                        self.context.bot, settings.CHANNEL_ID, item["poster"], item["video"].file_id, item["movie"],
+                        job_id=item["job_id"]
+                    )
+                    self.counts["published"] += 1
+                    try:
+                        await item["message"].delete() # Ghost Mode
+                    except Exception as e:
+                        logger.warning(f"Could not delete user message: {e}")
+                except Exception as e:
+                    item["error"] = f"Error enviando video: {e}"
+
+            if item["error"] is not None:
+                self.counts["failed"] += 1
+                self.failures.append(item)
+                if item["job_id"]:
+                    await asyncio.to_thread(PublishQueue.fail, item["job_id"], item["error"])
+
+            ImageGenerator.discard(item["poster"])
+            item["poster"] = None
+            async with self._progress:
+                self._published_upto = index + 1
+                self._progress.notify_all()
+            await self._update_progress()
+
+    # --- Feedback ---
+
+    def _progress_text(self, final: bool = False) -> str:
+        total = len(self.items)
+        done = self.counts["published"] + self.counts["failed"]
+        header = "📦 Lote terminado" if final else f"📦 Importando lote: {done}/{total}"
+        return (
+            f"{header}\n"
+            f"🔍 TMDB: {self.counts['lookup']} · 🤖 IA: {self.counts['ai']} · 🎨 Portadas: {self.counts['render']}\n"
+            f"✅ Publicados: {self.counts['published']} · ❌ Fallidos: {self.counts['failed']}"
+        )
+
+    async def _update_progress(self, final: bool = False):
+        """Edits the single status message in place (throttled)."""
+        now = time.monotonic()
+        if not final and now - self._last_edit < settings.BATCH_PROGRESS_INTERVAL:
+            return
+        self._last_edit = now
+        try:
+            await self.status_message.edit_text(self._progress_text(final))
+        except Exception as e:
+            logger.debug(f"Batch progress edit skipped: {e}")
+
+    async def _report_failures(self):
+        """One reply per failed video, so it can be fixed with a manual correction."""
+        for item in self.failures:
+            try:
+                await item["message"].reply_text(
+                    f"🚫 **Cancelado:** {item['error']}\n"
+                    "El archivo no se ha publicado.\n\n"
+                    "👉 **Solución:** Responde a este mensaje con el **Nombre Correcto** (y año opcional) para buscarlo manualmente."
+                )
+            except Exception as e:
+                logger.warning(f"Could not report batch failure: {e}")
@@ -33,7 +33,7 @@ async def handle_external_link(update: Update, context: ContextTypes.DEFAULT_TYP
     # 1. Enhance with TMDB
     tmdb_data = None
     if title:
-        tmdb_data = TmdbService.search_movie(title, year)
+        tmdb_data = await TmdbService.search_movie(title, year)
 
     # 2. Construct Metadata
     # Defaults
@@ -69,7 +69,7 @@ async def handle_external_link(update: Update, context: ContextTypes.DEFAULT_TYP
     await update.message.reply_text("🎨 Generating poster...")
     try:
         if metadata.get('poster_url'):
-            image_path = ImageGenerator.generate_poster(
+            poster = await ImageGenerator.generate_poster_async(
                 metadata['poster_url'],
                 metadata['title'],
                 metadata['description']
@@ -82,7 +82,7 @@ async def handle_external_link(update: Update, context: ContextTypes.DEFAULT_TYP
             # actually ImageGenerator handles invalid URL by making a black placeholder, 
             # but we need a URL to trigger it.
             # Let's give it a dummy if none found so it makes a title card.
-            image_path = ImageGenerator.generate_poster(
+            poster = await ImageGenerator.generate_poster_async(
                 "https://dummyimage.com/1920x1080/000/fff&text=No+Image", 
                 metadata['title'], 
                 metadata['description']
@@ -95,4 +95,7 @@ async def handle_external_link(update: Update, context: ContextTypes.DEFAULT_TYP
 
     # 4. Publish
     await update.message.reply_text("📤 Publishing...")
-    await send_publication(update, context, metadata, image_path)
+    try:
+        await send_publication(update, context, metadata, poster)
+    finally:
+        ImageGenerator.discard(poster)
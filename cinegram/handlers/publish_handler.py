@@ -1,19 +1,18 @@
-import os
+from typing import Union
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
 from cinegram.config import settings
 
-async def send_publication(update: Update, context: ContextTypes.DEFAULT_TYPE, metadata: dict, image_path: str):
+async def send_publication(update: Update, context: ContextTypes.DEFAULT_TYPE, metadata: dict, poster: Union[bytes, str]):
     """
     Orchestrates the 2-step publication process.
-    1. Send Generated Image (No Caption)
+    1. Send Generated Image (No Caption) - JPEG bytes or a local file path
     2. Send Video (with Caption + Inline Button)
     """
     chat_id = update.effective_chat.id
 
     # Step 1: Send Image
-    with open(image_path, 'rb') as photo:
-        await context.bot.send_photo(chat_id=chat_id, photo=photo)
+    await context.bot.send_photo(chat_id=chat_id, photo=poster)
 
     # Step 2: Prepare Video Caption
     # Step 2: Prepare Video Caption
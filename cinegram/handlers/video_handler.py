@@ -2,40 +2,159 @@ from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes, ConversationHandler, CommandHandler, MessageHandler, filters
 from cinegram.services.tmdb_service import TmdbService
 from cinegram.services.image_generator import ImageGenerator
+from cinegram.services.spam_filter import SpamFilter
+from cinegram.services.publish_queue import PublishQueue
+from cinegram.services.title_index import TitleIndex
 from cinegram.config import settings
+from cinegram.utils.helpers import schedule_deletion
+from cinegram.utils.concurrency import stage
 import logging
-import os
 import asyncio
+from typing import Optional
 
 logger = logging.getLogger(__name__)
 
-# Concurrency Control
-_SEMAPHORE = None
+# --- REFACTORED SHARED LOGIC ---
+
+def resolve_source(filename: str, caption: str) -> dict:
+    """
+    Best title/year guess from the filename (parser + spam stripper), falling back to
+    the caption. 'is_generic' means the guess is not good enough and the AI should read it.
+    Returns {'title', 'year', 'parsed_title', 'is_generic'}.
+    """
+    # --- STRATEGY 1: Parse Filename ---
+    from cinegram.services.filename_parser import FilenameParser
+    parsed_data = FilenameParser.parse_filename(filename)
+    
+    source_title = parsed_data['title'] if parsed_data else "Unknown"
+    source_year = parsed_data['year'] if parsed_data else None
+    parsed_title = source_title
+    SpamFilter.STATS["uploads"] += 1
 
-def get_semaphore():
-    global _SEMAPHORE
-    if _SEMAPHORE is None:
-        _SEMAPHORE = asyncio.Semaphore(5)
-    return _SEMAPHORE
+    # Strip spam that Guessit failed to clean (sites, tags, 'Latino' as language)
+    clean_title, removed = SpamFilter.strip(source_title)
+    if removed:
+        SpamFilter.STATS["stripped"] += 1
+        logger.info(f"Stripped spam {removed}: '{source_title}' -> '{clean_title}'")
+        source_title = clean_title or "Unknown"
 
-# --- REFACTORED SHARED LOGIC ---
+    # --- STRATEGY 2: Check Caption (Fallback) ---
+    is_generic = False
+    if source_title.lower() in ["unknown", "video", "whatsapp video", "vid"]:
+        is_generic = True
+
+    # Also check if filename looks like a date (common in whatsapp)
+    if not is_generic and len(source_title) < 4: 
+        is_generic = True
+
+    if is_generic and caption:
+        # If filename is bad but we have caption, prefer caption
+        # Simple clean of caption (first line usually)
+        clean_caption = caption.split('\n')[0].strip()
+        if len(clean_caption) > 3:
+             source_title = clean_caption
+             # Reset year as we are unsure
+             source_year = None
+             logger.info(f"Fallback to caption: {source_title}")
+
+    return {
+        "title": source_title,
+        "year": source_year,
+        "parsed_title": parsed_title,
+        "is_generic": is_generic
+    }
+
+def extract_movie(tmdb_data: dict) -> dict:
+    """Publication fields from a TMDB result."""
+    return {
+        "tmdb_id": tmdb_data.get('id'),
+        "title": tmdb_data.get('title'),
+        "original_title": tmdb_data.get('original_title'),
+        "year": tmdb_data.get('release_date', '')[:4],
+        "poster_path": tmdb_data.get('poster_path'),
+        "description": tmdb_data.get('overview'),
+        "rating": str(round(tmdb_data.get('vote_average', 0), 1)),
+        "genre": TmdbService.get_genres(tmdb_data.get('genre_ids', []))
+    }
+
+def build_caption(movie: dict) -> str:
+    """Channel caption for a published movie."""
+    genre = movie['genre']
+    hashtag_list = []
+    if genre:
+        g_list = [g.strip() for g in genre.split(',')]
+        for g in g_list[:3]:
+            clean_tag = "".join(word.capitalize() for word in g.split())
+            hashtag_list.append(f"#{clean_tag}")
+    hashtags = " ".join(hashtag_list)
+    
+    return (
+        f"🎬 *Película:* {movie['title']}\n"
+        f"📅 *Año:* {movie['year']}\n"
+        f"🌎 *Idioma:* Latino 🇨🇴🇲🇽\n"
+        f"💿 *Calidad:* HD\n"
+        f"⭐ *Calificación:* {movie['rating']}\n"
+        f"🎭 *Género:* {genre}\n\n"
+        f"📝 *Sinopsis:*\n{movie['description'][:800]}...\n\n"
+        f"{hashtags}\n\n"
+        f"🔗 *Síguenos en Instagram:*"
+    )
+
+async def publish_movie(bot, channel_id, poster, file_id: str, movie: dict, job_id: Optional[int] = None):
+    """
+    Sends the poster and then the video (with caption) to the channel.
+    Sends are paced by the application's SendScheduler and hold a "send" slot;
+    raises if the video could not be sent. With a job_id, parts already marked as sent in the PublishQueue are skipped.
+    """
+    async with stage("send"):
+        await _publish(bot, channel_id, poster, file_id, movie, job_id)
+
+async def _publish(bot, channel_id, poster, file_id: str, movie: dict, job_id: Optional[int]):
+    job = await asyncio.to_thread(PublishQueue.get, job_id) if job_id else None
+    if job_id:
+        await asyncio.to_thread(PublishQueue.set_stage, job_id, "publish")
+
+    # Send Photo
+    if poster and not (job and job["photo_sent"]):
+        try:
+            await bot.send_photo(chat_id=channel_id, photo=poster)
+            if job_id:
+                await asyncio.to_thread(PublishQueue.mark_sent, job_id, "photo")
+        except Exception as e:
+            logger.warning(f"Poster not sent: {e}")
+
+    if job and job["video_sent"]:
+        return
+
+    keyboard = [[InlineKeyboardButton("📸 Instagram", url=settings.INSTAGRAM_URL)]]
+    reply_markup = InlineKeyboardMarkup(keyboard)
+
+    # Send Video
+    await bot.send_video(chat_id=channel_id, video=file_id, caption=build_caption(movie), parse_mode="Markdown", reply_markup=reply_markup)
+    if job_id:
+        await asyncio.to_thread(PublishQueue.mark_sent, job_id, "video")
+
+    # Publish history feeds the local title index (title + the search that found it)
+    aliases = [job["search_title"]] if job else []
+    await asyncio.to_thread(TitleIndex.add_history, movie.get('tmdb_id'), movie['title'], movie['year'], aliases)
 
-async def process_movie_upload(update: Update, context: ContextTypes.DEFAULT_TYPE, message, video, search_title, extracted_year=None, attempted_ai=False):
+async def process_movie_upload(update: Update, context: ContextTypes.DEFAULT_TYPE, message, video, search_title, extracted_year=None, attempted_ai=False, learn_from=None):
     """
     Shared logic to process a movie with a given title/year.
     Used by both automatic video_entry and manual handle_manual_correction.
+    `learn_from` is the title the AI cleaned into `search_title` (spam is learned once TMDB confirms it).
     """
     
+    # Durable record: resumed by resume_jobs if the bot restarts mid-way
+    job_id = await asyncio.to_thread(PublishQueue.add, message.chat_id, message.message_id, video.file_id, search_title, extracted_year)
+
     # Feedback
     msg_status = await message.reply_text(f"🔍 Buscando: **{search_title}** ({extracted_year or '?'}) ...", parse_mode="Markdown")
     schedule_deletion(context.bot, message.chat_id, msg_status.message_id)
 
     # --- 1. SEARCH TMDB ---
-    tmdb_data = TmdbService.search_movie(search_title, year=extracted_year)
-    
-    # Retry without year if failed
-    if not tmdb_data and extracted_year:
-         tmdb_data = TmdbService.search_movie(search_title)
+    # (the query plan already covers the no-year variants)
+    tmdb_data = await TmdbService.search_movie(search_title, extracted_year)
     
     # --- 2. VALIDATION ---
     if not tmdb_data:
@@ -49,8 +168,9 @@ async def process_movie_upload(update: Update, context: ContextTypes.DEFAULT_TYP
              filename = getattr(video, 'file_name', None) or "Unknown"
              text_context = f"Filename: {filename}. Caption: {caption}. Previous search '{search_title}' failed."
              
+             SpamFilter.STATS["ai_fallbacks"] += 1
              from cinegram.services.ai_service import AiService
-             ai_data = AiService.extract_metadata(text_context)
+             ai_data = await AiService.extract_metadata(text_context)
              
              if ai_data:
                  new_title = ai_data['title']
@@ -62,10 +182,12 @@ async def process_movie_upload(update: Update, context: ContextTypes.DEFAULT_TYP
                      update, context, message, video,
                      search_title=new_title,
                      extracted_year=new_year,
-                     attempted_ai=True
+                     attempted_ai=True,
+                     learn_from=search_title
                  )
                  return
 
+        await asyncio.to_thread(PublishQueue.fail, job_id, "not found")
         msg_fail = await message.reply_text(
              f"🚫 **Cancelado:** No encontré nada en TMDB para '{search_title}'.\n"
              "El archivo no se ha publicado.\n\n"
@@ -74,91 +196,50 @@ async def process_movie_upload(update: Update, context: ContextTypes.DEFAULT_TYP
         return
 
     # Extract Data
-    title = tmdb_data.get('title')
-    year = tmdb_data.get('release_date', '')[:4]
-    poster_path = tmdb_data.get('poster_path')
-    description = tmdb_data.get('overview')
-    rating = str(round(tmdb_data.get('vote_average', 0), 1))
-    genre = TmdbService.get_genres(tmdb_data.get('genre_ids', []))
+    movie = extract_movie(tmdb_data)
+    if learn_from:
+        # Words the AI dropped, now that TMDB confirmed its title
+        SpamFilter.learn(learn_from, search_title, [movie['title'], movie['original_title']])
+    title, year = movie['title'], movie['year']
+    poster_path, description = movie['poster_path'], movie['description']
 
     if not poster_path or not year:
+        await asyncio.to_thread(PublishQueue.fail, job_id, "incomplete")
         msg_inc = await message.reply_text(
              f"🚫 **Incompleto:** Encontré '{title}' pero le falta portada/año. Intenta buscar otra versión."
         )
         schedule_deletion(context.bot, message.chat_id, msg_inc.message_id, 15)
         return
 
+    await asyncio.to_thread(PublishQueue.set_movie, job_id, movie)
+
     # --- 3. CONFIG (Single Tenant) ---
     channel_id = settings.CHANNEL_ID
-    instagram_url = settings.INSTAGRAM_URL
 
     # --- 4. GENERATE POSTER ---
     msg_gen = await message.reply_text("🎨 Generando portada...", parse_mode="Markdown")
     schedule_deletion(context.bot, message.chat_id, msg_gen.message_id)
 
     poster_url = TmdbService.get_poster_url(poster_path)
-    # Use output_path definition early to ensure we track it
-    image_path = None
+    # In-memory JPEG by default (a job-scoped temp file in disk mode)
+    poster = None
     
     try:
         try:
-            image_path = ImageGenerator.generate_poster(poster_url, title, description)
+            poster = await ImageGenerator.generate_poster_async(poster_url, title, description, job_id=f"{message.chat_id}_{message.message_id}")
         except Exception as e:
             logger.error(f"Poster error: {e}")
+            await asyncio.to_thread(PublishQueue.fail, job_id, f"poster: {e}")
             await message.reply_text("❌ Error generando portada.")
             return
 
         # --- 5. PUBLISH ---
-        from telegram.error import RetryAfter
-
-        # Send Photo
-        if image_path and os.path.exists(image_path):
-            while True:
-                try:
-                    with open(image_path, 'rb') as photo:
-                        await context.bot.send_photo(chat_id=channel_id, photo=photo)
-                    break
-                except RetryAfter as e:
-                    await asyncio.sleep(e.retry_after)
-                except Exception:
-                    break
-
-        # Prepare Caption
-        hashtag_list = []
-        if genre:
-            g_list = [g.strip() for g in genre.split(',')]
-            for g in g_list[:3]:
-                clean_tag = "".join(word.capitalize() for word in g.split())
-                hashtag_list.append(f"#{clean_tag}")
-        hashtags = " ".join(hashtag_list)
-        
-        caption = (
-            f"🎬 *Película:* {title}\n"
-            f"📅 *Año:* {year}\n"
-            f"🌎 *Idioma:* Latino 🇨🇴🇲🇽\n"
-            f"💿 *Calidad:* HD\n"
-            f"⭐ *Calificación:* {rating}\n"
-            f"🎭 *Género:* {genre}\n\n"
-            f"📝 *Sinopsis:*\n{description[:800]}...\n\n"
-            f"{hashtags}\n\n"
-            f"🔗 *Síguenos en Instagram:*"
-        )
-        
-        keyboard = [[InlineKeyboardButton("📸 Instagram", url=instagram_url)]]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-
-        # Send Video
-        while True:
-            try:
-                await context.bot.send_video(chat_id=channel_id, video=video.file_id, caption=caption, parse_mode="Markdown", reply_markup=reply_markup)
-                break
-            except RetryAfter as e:
-                msg_w = await message.reply_text(f"⏳ Esperando {e.retry_after}s (Flood Control)...")
-                schedule_deletion(context.bot, message.chat_id, msg_w.message_id, e.retry_after)
-                await asyncio.sleep(e.retry_after)
-            except Exception as e:
-                await message.reply_text(f"❌ Error enviando video: {e}")
-                return
+        try:
+            await publish_movie(context.bot, channel_id, poster, video.file_id, movie, job_id=job_id)
+        except Exception as e:
+            await asyncio.to_thread(PublishQueue.fail, job_id, f"send: {e}")
+            await message.reply_text(f"❌ Error enviando video: {e}")
+            return
 
         # Success
         msg_ok = await message.reply_text(f"✅ **Publicado:** {title} ({year})")
@@ -171,13 +252,8 @@ async def process_movie_upload(update: Update, context: ContextTypes.DEFAULT_TYP
             logger.warning(f"Could not delete user message: {e}")
 
     finally:
-        # Cleanup Temp Image
-        if image_path and os.path.exists(image_path):
-            try:
-                os.remove(image_path)
-                logger.info(f"Cleaned up temp image: {image_path}")
-            except Exception as e:
-                logger.error(f"Failed to cleanup image {image_path}: {e}")
+        # Cleanup Temp Image (disk mode only)
+        ImageGenerator.discard(poster)
 
 
 # --- ENTRY POINTS ---
@@ -189,41 +265,23 @@ async def video_entry(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     if not video: return
 
-    file_id = video.file_id
+    # Albums and forwarded backlogs go through the batch pipeline
+    from cinegram.handlers import batch_handler
+    if batch_handler.should_batch(message):
+        batch_handler.enqueue(update, context, message, video)
+        return
+
+    await handle_video(update, context, message, video)
+
+async def handle_video(update: Update, context: ContextTypes.DEFAULT_TYPE, message, video):
+    """Single-file flow: resolve the title (AI if needed) and publish with per-file feedback."""
     filename = getattr(video, 'file_name', None) or "Unknown.mp4"
     caption = message.caption or ""
-    
-    # --- STRATEGY 1: Parse Filename ---
-    from cinegram.services.filename_parser import FilenameParser
-    parsed_data = FilenameParser.parse_filename(filename)
-    
-    source_title = parsed_data['title'] if parsed_data else "Unknown"
-    source_year = parsed_data['year'] if parsed_data else None
-
-    # --- STRATEGY 2: Check Caption (Fallback) ---
-    is_generic = False
-    if source_title.lower() in ["unknown", "video", "whatsapp video", "vid"]:
-        is_generic = True
-    
-    # Check for spammy titles that Guessit failed to clean
-    spam_keywords = ["online", "pelicula", "completa", "homecine", "estreno", "cuevana", "latino", "castellano", "descargar"]
-    if any(keyword in source_title.lower() for keyword in spam_keywords):
-        is_generic = True
-        logger.info(f"Title contains spam keywords: {source_title}")
 
-    # Also check if filename looks like a date (common in whatsapp)
-    if not is_generic and len(source_title) < 4: 
-        is_generic = True
-
-    if is_generic and caption:
-        # If filename is bad but we have caption, prefer caption
-        # Simple clean of caption (first line usually)
-        clean_caption = caption.split('\n')[0].strip()
-        if len(clean_caption) > 3:
-             source_title = clean_caption
-             # Reset year as we are unsure
-             source_year = None
-             logger.info(f"Fallback to caption: {source_title}")
+    source = resolve_source(filename, caption)
+    source_title, source_year = source['title'], source['year']
+    parsed_title, is_generic = source['parsed_title'], source['is_generic']
+    learn_from = None
 
     # --- STRATEGY 3: AI Deep Search (Ollama) ---
     # Trigger if generic/spammy.
@@ -238,14 +296,18 @@ async def video_entry(update: Update, context: ContextTypes.DEFAULT_TYPE):
              text_context = f"Filename: {filename}" # AI needs the raw filename to clean it if no caption
          
          await message.reply_text("🤖 **Analizando con IA...** (Deep Search)", parse_mode="Markdown")
+         SpamFilter.STATS["ai_fallbacks"] += 1
          
          from cinegram.services.ai_service import AiService
-         ai_data = AiService.extract_metadata(text_context)
+         ai_data = await AiService.extract_metadata(text_context)
          
          if ai_data:
              source_title = ai_data['title']
              source_year = ai_data.get('year')
              logger.info(f"AI found: {source_title} ({source_year})")
+             if not caption:
+                 # Words the AI dropped from the filename are spam candidates
+                 learn_from = parsed_title
          else:
              logger.warning("AI could not extract data.")
 
@@ -255,14 +317,12 @@ async def video_entry(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
 
     # Call Shared Logic
-    # Call Shared Logic
-    # Use Semaphore to limit concurrency
-    async with get_semaphore():
-        await process_movie_upload(
-            update, context, message, video, 
-            search_title=source_title, 
-            extracted_year=source_year
-        )
+    await process_movie_upload(
+        update, context, message, video, 
+        search_title=source_title, 
+        extracted_year=source_year,
+        learn_from=learn_from
+    )
 
 async def handle_manual_correction(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
@@ -300,9 +360,82 @@ async def handle_manual_correction(update: Update, context: ContextTypes.DEFAULT
     
     await message.reply_text(f"🔄 **Reintentando con:** {search_title} ...")
     
-    async with get_semaphore():
-        await process_movie_upload(
-            update, context, message, video, 
-            search_title=search_title, 
-            extracted_year=year
-        )
+    await process_movie_upload(
+        update, context, message, video, 
+        search_title=search_title, 
+        extracted_year=year
+    )
+
+# --- RESUME (after restart) ---
+
+async def resume_job(bot, job_id: int) -> bool:
+    """
+    Finishes an interrupted job from its last completed stage (no AI, no per-step chatter).
+    Returns True if the job was published.
+    """
+    from telegram import ReplyParameters
+
+    if not await asyncio.to_thread(PublishQueue.claim, job_id):
+        return False
+    job = await asyncio.to_thread(PublishQueue.get, job_id)
+    reply_to = ReplyParameters(message_id=job["message_id"], allow_sending_without_reply=True)
+    logger.info(f"Resuming publish job {job_id} at stage '{job['stage']}'")
+
+    # 1. Lookup
+    movie = job["movie"]
+    if job["stage"] == "lookup" or not movie:
+        tmdb_data = await TmdbService.search_movie(job["search_title"], job["search_year"])
+        movie = extract_movie(tmdb_data) if tmdb_data else None
+        if not movie or not movie['poster_path'] or not movie['year']:
+            await asyncio.to_thread(PublishQueue.fail, job_id, "not found")
+            await bot.send_message(
+                chat_id=job["chat_id"],
+                text=f"🚫 **Cancelado:** No encontré nada en TMDB para '{job['search_title']}'.\n"
+                     "El archivo no se ha publicado.\n\n"
+                     "👉 **Solución:** Responde a este mensaje con el **Nombre Correcto** (y año opcional) para buscarlo manualmente.",
+                reply_parameters=reply_to
+            )
+            return False
+        await asyncio.to_thread(PublishQueue.set_movie, job_id, movie)
+
+    # 2. Render (only if the poster still has to be sent)
+    poster = None
+    try:
+        if not job["photo_sent"]:
+            poster = await ImageGenerator.generate_poster_async(
+                TmdbService.get_poster_url(movie['poster_path']), movie['title'], movie['description'],
+                job_id=f"{job['chat_id']}_{job['message_id']}"
+            )
+
+        # 3. Publish (skips parts already marked as sent)
+        await publish_movie(bot, settings.CHANNEL_ID, poster, job["file_id"], movie, job_id=job_id)
+    except Exception as e:
+        logger.error(f"Resumed job {job_id} failed: {e}")
+        # Keep the stage: a later pass retries it (up to PUBLISH_MAX_ATTEMPTS)
+        await asyncio.to_thread(PublishQueue.release, job_id)
+        return False
+    finally:
+        ImageGenerator.discard(poster)
+
+    await bot.send_message(chat_id=job["chat_id"], text=f"♻️ **Publicado (reanudado):** {movie['title']} ({movie['year']})", reply_parameters=reply_to)
+    try:
+        await bot.delete_message(chat_id=job["chat_id"], message_id=job["message_id"])
+    except Exception as e:
+        logger.warning(f"Could not delete user message: {e}")
+    return True
+
+async def resume_jobs(context: ContextTypes.DEFAULT_TYPE):
+    """
+    Job-queue callback: picks up uploads left unfinished by a previous run (expired leases).
+    Jobs that used up PUBLISH_MAX_ATTEMPTS are marked as failed, so they get purged like any other.
+    """
+    for job_id in await asyncio.to_thread(PublishQueue.exhausted):
+        logger.warning(f"Publish job {job_id} gave up after {settings.PUBLISH_MAX_ATTEMPTS} attempts")
+        await asyncio.to_thread(PublishQueue.fail, job_id, "max attempts")
+
+    job_ids = await asyncio.to_thread(PublishQueue.resumable)
+    if job_ids:
+        logger.info(f"Resuming {len(job_ids)} unfinished publish jobs")
+    for job_id in job_ids:
+        await resume_job(context.bot, job_id)
+    await asyncio.to_thread(PublishQueue.purge_finished, settings.PUBLISH_QUEUE_RETENTION)
@@ -1,25 +1,31 @@
-import requests
 import logging
 import json
 import re
 from typing import Optional, Dict
 from cinegram.config import settings
+from cinegram.services.ollama_client import OllamaClient
+from cinegram.utils.singleflight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
 class AiService:
-    OLLAMA_URL = "http://localhost:11434/api/generate"
     # Use the same model as configured for translation
     MODEL = settings.OLLAMA_MODEL
+    # Duplicate uploads (same filename/caption) share one extraction
+    FLIGHT = SingleFlight("ai")
 
     @staticmethod
-    def extract_metadata(text: str) -> Optional[Dict]:
+    async def extract_metadata(text: str) -> Optional[Dict]:
         """
         Uses LLM to extract a likely movie title and year from messy text.
         Returns a dict: {'title': str, 'year': str | None} or None if failed.
         """
         if not text:
             return None
+        return await AiService.FLIGHT.do(text, AiService._extract_metadata, text)
+
+    @staticmethod
+    async def _extract_metadata(text: str) -> Optional[Dict]:
 
         # Robust prompt for extraction
         prompt = (
@@ -37,24 +43,16 @@ class AiService:
             "JSON Output:"
         )
 
-        payload = {
-            "model": AiService.MODEL,
-            "prompt": prompt,
-            "stream": False,
-            "format": "json", 
-            "options": {
-                "temperature": 0.1 
-            }
-        }
-
+        answer = None
         try:
             logger.info(f"🤖 AI Deep Search on: '{text[:50]}...'")
-            response = requests.post(AiService.OLLAMA_URL, json=payload, timeout=45)
-            response.raise_for_status()
-            result = response.json()
-            
-            # Parse the response
-            answer = result.get('response', '{}').strip()
+            answer = await OllamaClient.generate(
+                prompt,
+                model=AiService.MODEL,
+                options={"temperature": 0.1},
+                fmt="json",
+                timeout=45
+            ) or '{}'
             
             # Clean possible markdown ```json wrap
             copy_ans = answer
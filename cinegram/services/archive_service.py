@@ -1,19 +1,219 @@
-import requests
+import asyncio
 import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import httpx
+from cinegram.config import settings
+from cinegram.services.metadata_parser import MetadataParser
+from cinegram.utils import http_client
+from cinegram.utils.helpers import normalize_title
+from cinegram.utils.json_stream import iter_json_array
+from cinegram.utils.singleflight import SingleFlight
+from cinegram.utils.sqlite_cache import SqliteCache, MISSING
 
 logger = logging.getLogger(__name__)
 
 class ArchiveService:
     BASE_URL = "https://archive.org/metadata/"
+    # Cursor-paginated search (batches of at least 100 rows)
+    SEARCH_URL = "https://archive.org/services/search/v1/scrape"
+    SEARCH_FIELDS = "identifier,title,year,language"
+    # Metadata API answers with their validators (ETag / Last-Modified)
+    CACHE = SqliteCache("archive_metadata")
+    # Search result batches per query + cursor
+    SEARCH_CACHE = SqliteCache("archive_search")
+    # The same item opened from several chats at once is fetched once
+    FLIGHT = SingleFlight("archive")
 
     @staticmethod
-    def get_metadata(identifier: str) -> dict:
-        """Fetches metadata and file list for a given identifier."""
-        url = f"{ArchiveService.BASE_URL}{identifier}"
+    async def _fetch(path: str, reader: Optional[Callable[[httpx.Response], Awaitable[Any]]] = None) -> Any:
+        """
+        GET /metadata/{path} through the shared async pool. Answers are cached for
+        ARCHIVE_CACHE_TTL; after that they are revalidated with a conditional request
+        and only downloaded again if the item changed.
+        `reader` turns the (unread, streamed) response into what gets cached.
+        """
+        cached = ArchiveService.CACHE.get(path)
+        if cached is not MISSING:
+            return cached["data"]
+        return await ArchiveService.FLIGHT.do(path, ArchiveService._download, path, reader or ArchiveService._read_json)
+
+    @staticmethod
+    async def _download(path: str, reader: Callable[[httpx.Response], Awaitable[Any]]) -> Any:
+        stale = ArchiveService.CACHE.get_stale(path, None)
+        headers = {}
+        if stale and stale.get("etag"):
+            headers["If-None-Match"] = stale["etag"]
+        if stale and stale.get("last_modified"):
+            headers["If-Modified-Since"] = stale["last_modified"]
+
+        try:
+            async with http_client.stream_with_retry(
+                "GET", f"{ArchiveService.BASE_URL}{path}", headers=headers, timeout=settings.ARCHIVE_TIMEOUT
+            ) as response:
+                data = await reader(response)
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 304 and stale:
+                ArchiveService.CACHE.set(path, stale, settings.ARCHIVE_CACHE_TTL)
+                return stale["data"]
+            raise
+
+        if data is None or data == {}:
+            return data # Unknown (or not yet indexed) item: ask again next time
+        ArchiveService.CACHE.set(path, {
+            "data": data,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+        }, settings.ARCHIVE_CACHE_TTL)
+        return data
+
+    @staticmethod
+    async def _read_json(response: httpx.Response) -> Any:
+        await response.aread()
+        return response.json()
+
+    @staticmethod
+    async def _read_result(response: httpx.Response) -> Any:
+        """Sub-path answers come wrapped as {"result": ...} (missing for unknown items)."""
+        data = await ArchiveService._read_json(response)
+        return data.get("result") if isinstance(data, dict) else None
+
+    @staticmethod
+    async def _read_images(response: httpx.Response) -> List[Dict]:
+        """
+        Streams the files listing and keeps only the entries that could be a cover
+        (name + format), one element in memory at a time. Stops reading at the
+        first rule-0 cover: MetadataParser.select_poster picks the same file from
+        the shortened list as from the whole one.
+        """
+        images = []
+        async for f in iter_json_array(response.aiter_bytes()):
+            rank = MetadataParser.poster_rank(f)
+            if rank is None:
+                continue
+            images.append({"name": f.get("name", ""), "format": f.get("format")})
+            if rank == 0:
+                break
+        return images
+
+    @staticmethod
+    async def get_item(identifier: str, with_images: bool = True) -> Optional[Dict]:
+        """
+        Fields-only view of an item: its `metadata` block and (optionally) the image
+        files, in the shape of the full /metadata document that MetadataParser reads.
+        `server`/`dir` point at archive.org/download/{id}, which redirects to whichever
+        server holds the item (so a cached entry never goes stale). None on failure.
+        """
         try:
-            response = requests.get(url)
-            response.raise_for_status()
-            return response.json()
-        except requests.RequestException as e:
+            if with_images:
+                metadata, files = await asyncio.gather(
+                    ArchiveService._fetch(f"{identifier}/metadata", ArchiveService._read_result),
+                    ArchiveService._fetch(f"{identifier}/files", ArchiveService._read_images),
+                )
+            else:
+                metadata = await ArchiveService._fetch(f"{identifier}/metadata", ArchiveService._read_result)
+                files = []
+        except (httpx.HTTPError, ValueError) as e:
             logger.error(f"Error fetching metadata for {identifier}: {e}")
             return None
+        if not metadata:
+            return None
+        return {
+            "metadata": metadata,
+            "files": files,
+            "server": "archive.org",
+            "dir": f"/download/{identifier}",
+        }
+
+    @staticmethod
+    async def get_images(identifier: str) -> List[Dict]:
+        """Cover candidates of an item (name + format), in listing order, up to the first rule-0 cover."""
+        try:
+            return await ArchiveService._fetch(f"{identifier}/files", ArchiveService._read_images)
+        except (httpx.HTTPError, ValueError) as e:
+            logger.error(f"Error fetching files for {identifier}: {e}")
+            return []
+
+    @staticmethod
+    async def get_metadata(identifier: str) -> Optional[Dict]:
+        """Fetches the full metadata document and file list for a given identifier."""
+        try:
+            return await ArchiveService._fetch(identifier) or None
+        except (httpx.HTTPError, ValueError) as e:
+            logger.error(f"Error fetching metadata for {identifier}: {e}")
+            return None
+
+    # --- Search ---
+
+    @staticmethod
+    def search_query(text: str) -> str:
+        """Lucene query for a free-text movie search."""
+        # Note: Language metadata in IA is often messy ("Spanish", "spa", "es", "Spanish; Castilian").
+        return f"(title:({text}) OR description:({text})) AND mediatype:(movies)"
+
+    @staticmethod
+    async def search(text: str, cursor: Optional[str] = None) -> Optional[Dict]:
+        """
+        One batch of search results, most downloaded first:
+        {"items": [{identifier, title, year}], "cursor": next batch or None, "total": int}.
+        Batches are cached per query + cursor. None on failure.
+        """
+        key = f"{normalize_title(text)}|{cursor or ''}"
+        cached = ArchiveService.SEARCH_CACHE.get(key)
+        if cached is not MISSING:
+            return cached
+        try:
+            return await ArchiveService.FLIGHT.do(("search", key), ArchiveService._search_batch, key, text, cursor)
+        except (httpx.HTTPError, ValueError) as e:
+            logger.error(f"Archive search failed for '{text}': {e}")
+            return None
+
+    @staticmethod
+    async def _search_batch(key: str, text: str, cursor: Optional[str]) -> Dict:
+        params = {
+            "q": ArchiveService.search_query(text),
+            "fields": ArchiveService.SEARCH_FIELDS,
+            "count": settings.ARCHIVE_SEARCH_BATCH,
+            "sorts": "downloads desc", # Popularity gives better results than relevance for movies
+        }
+        if cursor:
+            params["cursor"] = cursor
+        response = await http_client.request_with_retry(
+            "GET", ArchiveService.SEARCH_URL, params=params, timeout=settings.ARCHIVE_TIMEOUT
+        )
+        data = response.json()
+
+        items = []
+        for doc in data.get("items", []):
+            title = doc.get("title") or "Unknown"
+            if isinstance(title, list): # Multi-valued fields come as lists
+                title = title[0]
+            items.append({"identifier": doc.get("identifier"), "title": str(title), "year": doc.get("year")})
+        batch = {"items": items, "cursor": data.get("cursor"), "total": data.get("total", len(items))}
+        ArchiveService.SEARCH_CACHE.set(key, batch, settings.ARCHIVE_SEARCH_TTL)
+        return batch
+
+    @staticmethod
+    async def search_page(text: str, page: int, page_size: Optional[int] = None) -> Optional[Dict]:
+        """
+        Results of page `page` (0-based): {"items": [...], "has_more": bool, "total": int}.
+        Walks the batches through their cursors (cached, so paging costs at most one
+        new request per ARCHIVE_SEARCH_BATCH rows). None on failure.
+        """
+        page_size = page_size or settings.ARCHIVE_SEARCH_PAGE_SIZE
+        start = page * page_size
+        offset, cursor = 0, None
+        while True:
+            batch = await ArchiveService.search(text, cursor)
+            if batch is None:
+                return None
+            if start < offset + len(batch["items"]) or not batch["cursor"] or not batch["items"]:
+                break
+            offset += len(batch["items"])
+            cursor = batch["cursor"]
+
+        end = start + page_size
+        return {
+            "items": batch["items"][start - offset:end - offset],
+            "has_more": end < offset + len(batch["items"]) or bool(batch["cursor"]),
+            "total": batch["total"],
+        }
@@ -1,6 +1,9 @@
 import json
 import os
+import time
 import logging
+import tempfile
+import threading
 from cinegram.config import settings
 
 logger = logging.getLogger(__name__)
@@ -8,39 +11,88 @@ logger = logging.getLogger(__name__)
 class AuthService:
     WHITELIST_FILE = os.path.join(settings.ASSETS_DIR, "whitelist.json")
 
+    # In-memory whitelist, loaded once and refreshed only if the file changes
+    _WHITELIST = None
+    _MTIME = None
+    _LAST_CHECK = 0.0
+    _LOCK = threading.RLock()
+
+    @staticmethod
+    def _file_mtime():
+        try:
+            return os.path.getmtime(AuthService.WHITELIST_FILE)
+        except OSError:
+            return None
+
     @staticmethod
-    def _load_whitelist():
+    def _load_whitelist() -> set:
         if not os.path.exists(AuthService.WHITELIST_FILE):
-            return []
+            return set()
         try:
             with open(AuthService.WHITELIST_FILE, 'r') as f:
-                return json.load(f)
+                return {int(uid) for uid in json.load(f)}
         except Exception as e:
             logger.error(f"Error loading whitelist: {e}")
-            return []
+            # Keep serving the last good copy rather than locking everyone out
+            return set(AuthService._WHITELIST or ())
 
     @staticmethod
-    def _save_whitelist(whitelist):
+    def _save_whitelist(whitelist: set):
+        """Writes atomically (temp file + rename) so readers never see a partial file."""
+        directory = os.path.dirname(AuthService.WHITELIST_FILE)
+        tmp_path = None
         try:
-            with open(AuthService.WHITELIST_FILE, 'w') as f:
-                json.dump(whitelist, f)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(fd, 'w') as f:
+                json.dump(sorted(whitelist), f)
+            # mkstemp creates the file 0600; keep the permissions of the file it replaces
+            try:
+                os.chmod(tmp_path, os.stat(AuthService.WHITELIST_FILE).st_mode & 0o7777)
+            except FileNotFoundError:
+                os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, AuthService.WHITELIST_FILE)
+            tmp_path = None
+            AuthService._MTIME = AuthService._file_mtime()
         except Exception as e:
             logger.error(f"Error saving whitelist: {e}")
+        finally:
+            if tmp_path:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+
+    @staticmethod
+    def _refresh(force: bool = False):
+        """Reloads the whitelist if it was edited externally (mtime check, throttled)."""
+        now = time.monotonic()
+        if not force and AuthService._WHITELIST is not None \
+                and now - AuthService._LAST_CHECK < settings.AUTH_RELOAD_INTERVAL:
+            return
+        with AuthService._LOCK:
+            AuthService._LAST_CHECK = now
+            mtime = AuthService._file_mtime()
+            if AuthService._WHITELIST is None or mtime != AuthService._MTIME:
+                AuthService._WHITELIST = AuthService._load_whitelist()
+                AuthService._MTIME = mtime
+                logger.info(f"Whitelist loaded ({len(AuthService._WHITELIST)} users).")
 
     @staticmethod
     def is_authorized(user_id: int) -> bool:
         # 1. Admin is always authorized
         if user_id == settings.ADMIN_ID:
             return True
-            
-        # 2. Check whitelist
-        whitelist = AuthService._load_whitelist()
-        return user_id in whitelist
+
+        # 2. Check whitelist (in memory)
+        AuthService._refresh()
+        return user_id in AuthService._WHITELIST
 
     @staticmethod
     def authorize_user(user_id: int):
-        whitelist = AuthService._load_whitelist()
-        if user_id not in whitelist:
-            whitelist.append(user_id)
-            AuthService._save_whitelist(whitelist)
-            logger.info(f"User {user_id} authorized.")
+        with AuthService._LOCK:
+            # Merge with any external edit before writing back
+            AuthService._refresh(force=True)
+            if user_id not in AuthService._WHITELIST:
+                AuthService._WHITELIST.add(user_id)
+                AuthService._save_whitelist(AuthService._WHITELIST)
+                logger.info(f"User {user_id} authorized.")
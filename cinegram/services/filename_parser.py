@@ -1,57 +1,126 @@
-from guessit import guessit
+import re
 import logging
+from functools import lru_cache
+from typing import Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
+# Pre-cleaning patterns (compiled once)
+USERNAME_RE = re.compile(r'@\w+')
+URL_RE = re.compile(r'https?://\S+|www\.\S+')
+
+# Fast path: "Title.Year.Tags.ext"
+VIDEO_EXT_RE = re.compile(r'\.(mp4|mkv|avi|mov|wmv|m4v|webm|flv|mpg|mpeg|ts)$', re.IGNORECASE)
+TITLE_YEAR_RE = re.compile(r'^(?P<title>.*?[^\W\d_].*?)[\s._\-]*[\(\[]?(?P<year>19\d{2}|20\d{2})[\)\]]?(?P<tail>(?:[\s._\-\[\(].*)?)$')
+SEPARATORS_RE = re.compile(r'[\s._]+')
+TAIL_SPLIT_RE = re.compile(r'[\s._\-\[\]\(\)]+')
+# Release tags allowed after the year (anything else sends the name to guessit)
+RELEASE_TAG_RE = re.compile(
+    r'^(?:\d{3,4}p|[48]k|uhd|hdr10?|sdr|10bit|x26[45]|h26[45]|hevc|avc|xvid|divx|'
+    r'bluray|blu|ray|brrip|bdrip|bdremux|remux|web|dl|webdl|webrip|hdtv|hdrip|dvdrip|dvd|dvdscr|cam|ts|'
+    r'aac\d?|ac3|eac3|dts|ddp?\d?|atmos|truehd|mp3|\d\.\d|\d|'
+    r'hd|fullhd|sd|extended|unrated|remastered|proper|repack|internal|limited|'
+    r'dual|multi|sub|subs|subbed|esp|spa|eng|lat|latino|castellano|espanol|español|spanish|english|'
+    r'korean|japanese|french|italian|german|yts|yify|rarbg|mx|ag)$',
+    re.IGNORECASE
+)
+
 class FilenameParser:
-    
+    # Which strategy resolved each (uncached) filename
+    STATS = {"fast_path": 0, "guessit": 0, "raw": 0, "failed": 0}
+
     @staticmethod
-    def parse_filename(filename: str):
+    def _pre_clean(filename: str) -> str:
+        # 1. Remove @usernames (e.g. @cesser16)
+        clean_name = USERNAME_RE.sub('', filename)
+        # 2. Remove URLs
+        clean_name = URL_RE.sub('', clean_name)
+        # 3. Replace underscores
+        return clean_name.replace('_', ' ').strip()
+
+    @staticmethod
+    def _fast_path(clean_name: str) -> Optional[Tuple[str, str]]:
         """
-        Parses a messy filename and returns a clean dictionary with title and year.
-        Example: 'Night.of.the.Living.Dead.1968.720p.mkv' -> {'title': 'Night of the Living Dead', 'year': '1968'}
+        Deterministic parse of the common 'Title.Year.Quality.ext' shape.
+        Returns (title, year) only when confident, otherwise None.
         """
+        base = VIDEO_EXT_RE.sub('', clean_name)
+        match = TITLE_YEAR_RE.match(base)
+        if not match:
+            return None
+
+        title = SEPARATORS_RE.sub(' ', match.group('title')).strip(' -([')
+        tail = [t for t in TAIL_SPLIT_RE.split(match.group('tail')) if t]
+
+        # Every token after the year must be a known release tag,
+        # and none may leak into the title
+        if not title or any(not RELEASE_TAG_RE.match(t) for t in tail):
+            return None
+        if any(RELEASE_TAG_RE.match(t) and not t.isalpha() for t in title.split()):
+            return None
+        return title, match.group('year')
+
+    @staticmethod
+    def _guessit(name: str) -> dict:
+        # Imported lazily: rebulk is slow to import and rarely needed
+        from guessit import guessit
+        return guessit(name)
+
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def _parse_cached(filename: str) -> Optional[Tuple[str, Optional[str]]]:
         try:
-            # Pre-cleaning: Remove explicit spam before Guessit
-            import re
-            
-            # 1. Remove @usernames (e.g. @cesser16)
-            clean_name = re.sub(r'@\w+', '', filename)
-            
-            # 2. Remove URLs
-            clean_name = re.sub(r'https?://\S+|www\.\S+', '', clean_name)
-            
-            # 3. Remove other common spam if needed
-            clean_name = clean_name.replace('_', ' ') # Replace underscores
-            
+            clean_name = FilenameParser._pre_clean(filename)
+
+            # Strategy 0: Compiled fast path
+            fast = FilenameParser._fast_path(clean_name)
+            if fast:
+                FilenameParser.STATS["fast_path"] += 1
+                return fast
+
             # Strategy 1: Cleaned Name (Anti-Spam)
-            data = guessit(clean_name)
+            data = FilenameParser._guessit(clean_name)
             title = data.get('title')
             year = data.get('year')
 
             # Strategy 2: Original Name (Fallback if Cleaned fails)
             if not title:
                 logger.warning(f"Strategy 1 failed for '{filename}'. Trying original...")
-                data_orig = guessit(filename)
+                data_orig = FilenameParser._guessit(filename)
                 title = data_orig.get('title')
                 year = data_orig.get('year') or year # Keep year if found in strategy 1
 
-            # Strategy 3: Raw Filename (Last Resort)
-            if not title:
+            if title:
+                FilenameParser.STATS["guessit"] += 1
+            else:
+                # Strategy 3: Raw Filename (Last Resort)
                 logger.warning(f"Strategy 2 failed for '{filename}'. Using raw filename.")
                 # Remove extension and basic separators to make a searchable title
                 base = filename.rsplit('.', 1)[0]
                 title = base.replace('.', ' ').replace('_', ' ').strip()
-            
+                FilenameParser.STATS["raw" if title else "failed"] += 1
+
             # Final Validation
             if not title:
                 return None
-                
-            return {
-                "title": title,
-                "year": str(year) if year else None
-            }
-            
+
+            return title, str(year) if year else None
+
         except Exception as e:
             logger.error(f"Error parsing filename {filename}: {e}")
             return None
+
+    @staticmethod
+    def parse_filename(filename: str):
+        """
+        Parses a messy filename and returns a clean dictionary with title and year.
+        Example: 'Night.of.the.Living.Dead.1968.720p.mkv' -> {'title': 'Night of the Living Dead', 'year': '1968'}
+        Results are cached per (stripped) filename.
+        """
+        parsed = FilenameParser._parse_cached((filename or "").strip())
+        if not parsed:
+            return None
+        return {
+            "title": parsed[0],
+            "year": parsed[1]
+        }
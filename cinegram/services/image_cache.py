@@ -0,0 +1,200 @@
+import os
+import asyncio
+import hashlib
+import logging
+import tempfile
+import threading
+import time
+from io import BytesIO
+from typing import Optional, Tuple
+import httpx
+import requests
+from PIL import Image
+from cinegram.config import settings
+from cinegram.utils import http_client
+
+logger = logging.getLogger(__name__)
+
+# Blocking session for render workers (one per process)
+_SESSION = None
+
+def _get_session() -> requests.Session:
+    global _SESSION
+    if _SESSION is None:
+        _SESSION = requests.Session()
+    return _SESSION
+
+class ImageCache:
+    """
+    Content-addressed on-disk cache of downloaded poster images.
+    Files are named after the SHA-256 of their source URL, written atomically
+    and evicted least-recently-used first once IMAGE_CACHE_MAX_BYTES is exceeded.
+    Safe to share between the bot and the render worker processes.
+    """
+    CACHE_DIR = settings.IMAGE_CACHE_DIR
+    # Seconds between full rescans of the cache directory (catches other processes' writes)
+    RESCAN_INTERVAL = 300
+
+    # Running size of the cache as seen by this process: measured by a full scan,
+    # then advanced by every put, so puts don't have to walk the directory
+    _size = None
+    _scanned_at = 0.0
+    _size_lock = threading.Lock()
+
+    @staticmethod
+    def key_for(source: str) -> str:
+        """Cache key for a source URL, or for a bare TMDB poster_path ('/abc.jpg')."""
+        if source.startswith("/"):
+            # Same bucket the renderer downloads, so both map to one entry
+            from cinegram.services.tmdb_service import TmdbService
+            source = TmdbService.get_poster_url(source)
+        return hashlib.sha256(source.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _path(key: str, suffix: str = ".img") -> str:
+        # Two-level fan-out keeps directories small
+        return os.path.join(ImageCache.CACHE_DIR, key[:2], f"{key}{suffix}")
+
+    @staticmethod
+    def _touch(path: str) -> bool:
+        """Marks an entry as recently used. Returns False if it vanished."""
+        try:
+            os.utime(path)
+            return True
+        except OSError:
+            return False
+
+    @staticmethod
+    def get(source: str, suffix: str = ".img") -> Optional[str]:
+        """Returns the local path of a cached image, or None."""
+        path = ImageCache._path(ImageCache.key_for(source), suffix)
+        return path if os.path.exists(path) and ImageCache._touch(path) else None
+
+    @staticmethod
+    def put(source: str, data: bytes, suffix: str = ".img") -> str:
+        """Stores raw bytes atomically (temp file + rename) and returns the path."""
+        path = ImageCache._path(ImageCache.key_for(source), suffix)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        ImageCache._account(len(data))
+        return path
+
+    @staticmethod
+    def _account(added: int):
+        """Adds a write to the running size and evicts only when it goes over the limit."""
+        with ImageCache._size_lock:
+            stale = ImageCache._size is None or time.monotonic() - ImageCache._scanned_at > ImageCache.RESCAN_INTERVAL
+            if not stale:
+                ImageCache._size += added
+            over = stale or ImageCache._size > settings.IMAGE_CACHE_MAX_BYTES
+        if over:
+            ImageCache.evict()
+
+    @staticmethod
+    def fetch(url: str) -> Optional[str]:
+        """Blocking fetch-through (used inside render workers)."""
+        path = ImageCache.get(url)
+        if path:
+            return path
+        try:
+            response = _get_session().get(url, timeout=settings.HTTP_TIMEOUT)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            logger.error(f"Error downloading image {url}: {e}")
+            return None
+        return ImageCache.put(url, response.content)
+
+    @staticmethod
+    async def fetch_async(url: str) -> Optional[str]:
+        """Non-blocking fetch-through on the shared HTTP pool."""
+        path = ImageCache.get(url)
+        if path:
+            return path
+        try:
+            response = await http_client.request_with_retry("GET", url)
+        except httpx.HTTPError as e:
+            logger.error(f"Error downloading image {url}: {e}")
+            return None
+        # Disk write (and a possible eviction scan) stay off the event loop
+        return await asyncio.to_thread(ImageCache.put, url, response.content)
+
+    @staticmethod
+    def get_variant(url: str, fit: Tuple[int, int]) -> Optional[Image.Image]:
+        """
+        Returns the image pre-downscaled to fit inside `fit` (w, h), the box of
+        the poster foreground (the blurred background is filled from it too).
+        The variant is stored as raw pixels (PPM), so later renders skip the
+        download and the JPEG decode, and the poster is encoded lossily only once.
+        """
+        variant_source = f"{url}#fit={fit[0]}x{fit[1]}"
+        variant_path = ImageCache.get(variant_source, ".ppm")
+        if variant_path:
+            try:
+                return Image.open(variant_path).convert("RGBA")
+            except (OSError, ValueError) as e:
+                logger.warning(f"Corrupt image variant {variant_path}: {e}")
+
+        original_path = ImageCache.fetch(url)
+        if not original_path:
+            return None
+        img = Image.open(original_path).convert("RGB")
+
+        scale = min(fit[0] / img.width, fit[1] / img.height)
+        if scale < 1:
+            size = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+            img = img.resize(size, Image.Resampling.LANCZOS)
+
+        buffer = BytesIO()
+        img.save(buffer, "PPM")
+        ImageCache.put(variant_source, buffer.getvalue(), ".ppm")
+        return img.convert("RGBA")
+
+    @staticmethod
+    def evict(max_bytes: Optional[int] = None) -> int:
+        """Deletes least-recently-used files until the cache fits. Returns bytes freed."""
+        max_bytes = settings.IMAGE_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        entries = []
+        total = 0
+        for root, _, files in os.walk(ImageCache.CACHE_DIR):
+            for name in files:
+                if name.endswith(".tmp"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+
+        freed = 0
+        if total <= max_bytes:
+            ImageCache._set_size(total)
+            return freed
+        for _, size, path in sorted(entries):
+            try:
+                os.remove(path)
+                freed += size
+            except OSError:
+                continue # Already evicted by another process
+            if total - freed <= max_bytes:
+                break
+        ImageCache._set_size(total - freed)
+        logger.info(f"Image cache evicted {freed / 1e6:.1f} MB")
+        return freed
+
+    @staticmethod
+    def _set_size(total: int):
+        with ImageCache._size_lock:
+            ImageCache._size = total
+            ImageCache._scanned_at = time.monotonic()
@@ -1,33 +1,129 @@
 import os
-import requests
+import asyncio
+import logging
+import multiprocessing
+import shutil
+import time
+import uuid
 import textwrap
-from PIL import Image, ImageDraw, ImageFont, ImageFilter
+from concurrent.futures import ProcessPoolExecutor
 from io import BytesIO
+from typing import Optional, Union
+from PIL import Image, ImageDraw, ImageFont, ImageFilter
 from cinegram.config import settings
+from cinegram.services.image_cache import ImageCache
+from cinegram.services.tmdb_service import TmdbService
+from cinegram.utils.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# Render Pool (Process-wide, created lazily)
+_EXECUTOR = None
+_QUEUE_SLOTS = None
+
+def _get_executor():
+    global _EXECUTOR
+    if _EXECUTOR is None and settings.RENDER_WORKERS > 0:
+        # 'spawn' keeps workers independent of the bot's threads/event loop
+        _EXECUTOR = ProcessPoolExecutor(
+            max_workers=settings.RENDER_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=ImageGenerator.warm_up,
+        )
+    return _EXECUTOR
+
+def _get_queue_slots():
+    """Bounds renders in flight (running + waiting) so bursts apply backpressure."""
+    global _QUEUE_SLOTS
+    if _QUEUE_SLOTS is None:
+        _QUEUE_SLOTS = asyncio.Semaphore(max(settings.RENDER_WORKERS, 1) + settings.RENDER_QUEUE_SIZE)
+    return _QUEUE_SLOTS
+
+def _ping_worker(delay: float) -> int:
+    # Keeps the worker busy briefly so the pool spawns every process
+    time.sleep(delay)
+    return os.getpid()
+
+class PosterRenderer:
+    """
+    Holds everything a poster needs that never changes between renders:
+    the darken layer, the bottom gradient, fonts and the pre-scaled logo.
+    Built once per process and rebuilt only when settings or asset files change.
+    """
+    LOGO_WIDTH = 300
+    FONT_SIZES = (80, 40, 60) # Title, description, text watermark
+
+    def __init__(self):
+        self.signature = PosterRenderer.current_signature()
+        self.size = settings.IMAGE_SIZE
+        width, height = self.size
+
+        # Darken layer for the blurred background
+        self.dark_layer = Image.new("RGBA", self.size, (0, 0, 0, 120))
+
+        # Bottom gradient (transparent at 40% height -> opaque black at the bottom),
+        # built as a 1px column and stretched instead of drawing a line per row
+        start = int(height * 0.4)
+        column = Image.new("L", (1, height), 0)
+        column.putdata([0] * start + [
+            int(255 * ((y - height * 0.4) / (height * 0.6))) for y in range(start, height)
+        ])
+        self.gradient = Image.new("RGBA", self.size, (0, 0, 0, 0))
+        self.gradient.putalpha(column.resize(self.size, Image.Resampling.NEAREST))
+
+        # Fonts at every size we draw with
+        self.fonts = {size: PosterRenderer._load_font(size) for size in PosterRenderer.FONT_SIZES}
+
+        # Logo pre-scaled to its final width, with its alpha channel as paste mask
+        self.logo = None
+        self.logo_mask = None
+        logo_path = PosterRenderer.logo_path()
+        if os.path.exists(logo_path):
+            try:
+                logo = Image.open(logo_path).convert("RGBA")
+                logo_height = int(PosterRenderer.LOGO_WIDTH * (logo.height / logo.width))
+                self.logo = logo.resize((PosterRenderer.LOGO_WIDTH, logo_height), Image.Resampling.LANCZOS)
+                self.logo_mask = self.logo.getchannel("A")
+            except Exception as e:
+                logger.error(f"Error loading logo: {e}")
 
-class ImageGenerator:
     @staticmethod
-    def generate_poster(image_url: str, title: str, description: str) -> str:
-        """
-        Generates a 1920x1080 poster with title and description overlay.
-        Returns the path to the generated image.
-        """
-        # 1. Download or Load Image
+    def logo_path() -> str:
+        return os.path.join(settings.ASSETS_DIR, "logo", "logo.png")
+
+    @staticmethod
+    def _mtime(path: str):
         try:
-            response = requests.get(image_url, timeout=10)
-            response.raise_for_status()
-            img = Image.open(BytesIO(response.content)).convert("RGBA")
-        except Exception as e:
-            print(f"Error loading image: {e}")
-            # Create a black placeholder if image download fails
-            img = Image.new("RGBA", (1920, 1080), (0, 0, 0, 255))
+            return os.path.getmtime(path)
+        except OSError:
+            return None
 
-        # 2. Smart Composition: Blurred Background + Centered Poster
-        target_size = settings.IMAGE_SIZE # (1920, 1080)
-        
-        # A. Create Background (Blurred & Darkened)
-        # Resize to FILL the screen (Aspect Fill)
-        img_ratio = img.width / img.height
+    @staticmethod
+    def current_signature() -> tuple:
+        """Everything the cached assets depend on (settings + asset file mtimes)."""
+        return (
+            tuple(settings.IMAGE_SIZE),
+            settings.DEFAULT_FONT_PATH,
+            PosterRenderer._mtime(settings.DEFAULT_FONT_PATH),
+            PosterRenderer._mtime(PosterRenderer.logo_path()),
+        )
+
+    @staticmethod
+    def _load_font(size: int):
+        try:
+            # Try configured font, fallback to Arial if on Windows/generic
+            font_path = settings.DEFAULT_FONT_PATH
+            if not os.path.exists(font_path):
+                font_path = "arial.ttf" # Common on Windows
+            return ImageFont.truetype(font_path, size)
+        except IOError:
+            # Fallback to default if load fails
+            return ImageFont.load_default()
+
+    @staticmethod
+    def _cover_size(width: int, height: int, target_size: tuple) -> tuple:
+        """Size that makes (width, height) FILL target_size (Aspect Fill)."""
+        img_ratio = width / height
         target_ratio = target_size[0] / target_size[1]
 
         if img_ratio > target_ratio:
@@ -38,27 +134,61 @@ class ImageGenerator:
             # Image is taller/narrower, resize by width to fill width
             bg_width = target_size[0]
             bg_height = int(bg_width / img_ratio)
+        return bg_width, bg_height
 
-        background = img.resize((bg_width, bg_height), Image.Resampling.LANCZOS)
+    @staticmethod
+    def _center_crop(img: Image.Image, target_size: tuple) -> Image.Image:
+        left = (img.width - target_size[0]) / 2
+        top = (img.height - target_size[1]) / 2
+        right = (img.width + target_size[0]) / 2
+        bottom = (img.height + target_size[1]) / 2
+        return img.crop((left, top, right, bottom))
+
+    def _background_exact(self, img: Image.Image) -> Image.Image:
+        """Full-resolution LANCZOS fill + GaussianBlur(30)."""
+        background = img.resize(PosterRenderer._cover_size(img.width, img.height, self.size), Image.Resampling.LANCZOS)
         
         # Center Crop the background to fit 1920x1080 exactly
-        left = (background.width - target_size[0]) / 2
-        top = (background.height - target_size[1]) / 2
-        right = (background.width + target_size[0]) / 2
-        bottom = (background.height + target_size[1]) / 2
-        background = background.crop((left, top, right, bottom))
+        background = PosterRenderer._center_crop(background, self.size)
         
         # Apply Heavy Blur
-        background = background.filter(ImageFilter.GaussianBlur(30))
+        return background.filter(ImageFilter.GaussianBlur(30))
+
+    def _background_fast(self, img: Image.Image) -> Image.Image:
+        """
+        Approximation of _background_exact: fill, crop and blur at 1/N resolution
+        (radius scaled down to match), then a cheap bilinear upscale.
+        At radius 30 no detail survives, so the result is visually the same.
+        """
+        factor = max(1, settings.POSTER_BACKGROUND_SCALE)
+        small_target = (-(-self.size[0] // factor), -(-self.size[1] // factor))
+        background = img.resize(PosterRenderer._cover_size(img.width, img.height, small_target), Image.Resampling.BILINEAR, reducing_gap=2.0)
+        background = PosterRenderer._center_crop(background, small_target)
+        background = background.filter(ImageFilter.GaussianBlur(30 / factor))
+        return background.resize(self.size, Image.Resampling.BILINEAR).convert("RGBA")
+
+    def render(self, img: Image.Image, title: str, description: str, background_source: Image.Image = None) -> Image.Image:
+        """
+        Composes the final RGBA poster from a source image.
+        `background_source` may be a reduced-scale decode of the same image
+        (used only by the fast background mode).
+        """
+        # 2. Smart Composition: Blurred Background + Centered Poster
+        target_size = self.size # (1920, 1080)
+        
+        # A. Create Background (Blurred & Darkened)
+        if settings.POSTER_BACKGROUND_MODE == "fast":
+            background = self._background_fast(background_source or img)
+        else:
+            background = self._background_exact(img)
         
         # Darken Background significantly to make text pop
-        dark_layer = Image.new("RGBA", target_size, (0, 0, 0, 120))
-        background = Image.alpha_composite(background, dark_layer)
+        background = Image.alpha_composite(background, self.dark_layer)
 
         # B. Create Foreground (Fitted Poster)
         # Resize to FIT inside the screen (Aspect Fit) - maximize height usually
         # Give it a slight margin so it doesn't touch edges (e.g. 95% height)
-        max_h = int(target_size[1] * 0.95)
+        max_h = settings.POSTER_SOURCE_HEIGHT
         max_w = int(target_size[0] * 0.95)
         
         scale = min(max_w / img.width, max_h / img.height)
@@ -70,52 +200,23 @@ class ImageGenerator:
         # Paste Foreground Center
         x_pos = (target_size[0] - new_w) // 2
         y_pos = (target_size[1] - new_h) // 2
-        
-        # Add shadow to foreground? (Optional, implies creating a larger shadow layer)
-        # For simplicity, just paste.
         background.paste(foreground, (x_pos, y_pos))
-        
-        # Update main img reference
-        img = background
-
-        # 3. Add Dark Overlay (Gradient or solid semi-transparent)
-        overlay = Image.new("RGBA", target_size, (0, 0, 0, 0))
-        draw = ImageDraw.Draw(overlay)
-        # Gradient from bottom 60% to bottom
-        for y in range(int(target_size[1] * 0.4), target_size[1]):
-            alpha = int(255 * ((y - target_size[1] * 0.4) / (target_size[1] * 0.6)))
-            draw.line([(0, y), (target_size[0], y)], fill=(0, 0, 0, alpha))
-        
-        img = Image.alpha_composite(img, overlay)
+
+        # 3. Add Dark Overlay (Gradient from bottom 60% to bottom)
+        img = Image.alpha_composite(background, self.gradient)
 
         # 4. Add Text
         draw = ImageDraw.Draw(img)
-        
-        # Load Font
-        try:
-            # Try configured font, fallback to Arial if on Windows/generic
-            font_path = settings.DEFAULT_FONT_PATH
-            if not os.path.exists(font_path):
-                font_path = "arial.ttf" # Common on Windows
-            
-            title_font = ImageFont.truetype(font_path, 80)
-            desc_font = ImageFont.truetype(font_path, 40)
-        except IOError:
-            # Fallback to default if load fails
-            title_font = ImageFont.load_default()
-            desc_font = ImageFont.load_default()
+        title_font = self.fonts[80]
+        desc_font = self.fonts[40]
 
         # Text Positioning
         margin_x = 100
-        margin_y = 100
-        max_width_chars = 50 # approx for wrapping
 
         # Draw Title
-        # split title if too long?
         title_lines = textwrap.wrap(title, width=25)
         current_y = target_size[1] - 350 # Start from bottom-ish area
         for line in title_lines:
-             # Calculate text width to verify fit if needed, but simple draw is often enough
              draw.text((margin_x, current_y), line, font=title_font, fill="white")
              current_y += 90 # Line height
 
@@ -131,27 +232,14 @@ class ImageGenerator:
 
         # Draw Logo Watermark (Top Right)
         try:
-            logo_path = os.path.join(settings.ASSETS_DIR, "logo", "logo.png")
-            if os.path.exists(logo_path):
-                logo = Image.open(logo_path).convert("RGBA")
-                
-                # Resize logo (e.g., width 300px, maintain aspect)
-                target_logo_width = 300
-                logo_ratio = logo.height / logo.width
-                target_logo_height = int(target_logo_width * logo_ratio)
-                logo = logo.resize((target_logo_width, target_logo_height), Image.Resampling.LANCZOS)
-                
+            if self.logo is not None:
                 # Position: Top Right with margin
                 margin = 50
-                logo_x = target_size[0] - target_logo_width - margin
-                logo_y = margin
-                
-                img.paste(logo, (logo_x, logo_y), logo)
+                img.paste(self.logo, (target_size[0] - self.logo.width - margin, margin), self.logo_mask)
             else:
                 # Fallback to Text if logo file missing
                 watermark_text = "CINEGRAM 🎬"
-                wm_font_size = 60
-                wm_font = ImageFont.truetype(font_path, wm_font_size) if 'font_path' in locals() else ImageFont.load_default()
+                wm_font = self.fonts[60]
                 wm_bbox = draw.textbbox((0, 0), watermark_text, font=wm_font)
                 wm_x = target_size[0] - (wm_bbox[2] - wm_bbox[0]) - 50
                 wm_y = 50
@@ -159,11 +247,176 @@ class ImageGenerator:
                 draw.text((wm_x, wm_y), watermark_text, font=wm_font, fill=(255, 215, 0))
                 
         except Exception as e:
-            print(f"Error adding watermark: {e}")
+            logger.warning(f"Error adding watermark: {e}")
+
+        return img
+
+_RENDERER = None
+
+def get_renderer() -> PosterRenderer:
+    """Returns this process's renderer, rebuilding it if settings/assets changed."""
+    global _RENDERER
+    if _RENDERER is None or _RENDERER.signature != PosterRenderer.current_signature():
+        _RENDERER = PosterRenderer()
+    return _RENDERER
+
+class ImageGenerator:
+    # Identical posters (same source, title and text) requested concurrently are rendered once
+    FLIGHT = SingleFlight("render")
+
+    @staticmethod
+    def warm_up():
+        """Builds the static poster assets (run once in every render worker)."""
+        get_renderer()
+
+    @staticmethod
+    def start_pool():
+        """Spawns and pre-warms every render worker (call at bot startup)."""
+        executor = _get_executor()
+        if executor is None:
+            return
+        pids = {f.result() for f in [executor.submit(_ping_worker, 0.2) for _ in range(settings.RENDER_WORKERS)]}
+        logger.info(f"🎨 Render pool ready ({len(pids)} workers).")
+
+    @staticmethod
+    def shutdown_pool():
+        global _EXECUTOR
+        if _EXECUTOR is not None:
+            _EXECUTOR.shutdown(wait=False, cancel_futures=True)
+            _EXECUTOR = None
+
+    @staticmethod
+    async def generate_poster_async(image_url: str, title: str, description: str, job_id: Optional[str] = None) -> Union[bytes, str]:
+        """
+        Async version of generate_poster: renders in the process pool so the
+        event loop stays free. Waits for a queue slot when the pool is saturated.
+        """
+        job_id = job_id or uuid.uuid4().hex
+        poster = await ImageGenerator.FLIGHT.do(
+            (image_url, title, description), ImageGenerator._render_async, image_url, title, description, job_id
+        )
+        own_path = ImageGenerator.poster_path(job_id)
+        if isinstance(poster, str) and poster != own_path:
+            # Joined another job's render: link it under our name right away (before
+            # that job can discard it), so every job sends and discards its own file
+            try:
+                os.link(poster, own_path)
+            except OSError:
+                shutil.copyfile(poster, own_path)
+            return own_path
+        return poster
+
+    @staticmethod
+    async def _render_async(image_url: str, title: str, description: str, job_id: str) -> Union[bytes, str]:
+        # Download on the event loop (non-blocking) so workers only do CPU work
+        await ImageCache.fetch_async(TmdbService.right_size_url(image_url))
+        async with _get_queue_slots():
+            executor = _get_executor()
+            if executor is None:
+                # RENDER_WORKERS=0: render in a thread instead
+                return await asyncio.to_thread(ImageGenerator.generate_poster, image_url, title, description, job_id)
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(executor, ImageGenerator.generate_poster, image_url, title, description, job_id)
+
+    @staticmethod
+    def _load_source(image_url: str):
+        """Returns the source poster as RGBA, from the image cache when possible."""
+        # Never pull TMDB /original when a smaller bucket covers the foreground
+        image_url = TmdbService.right_size_url(image_url)
+        if settings.IMAGE_CACHE_VARIANTS:
+            # Sized to the foreground box (PosterRenderer.render), the largest layer drawn from it
+            return ImageCache.get_variant(image_url, (int(settings.IMAGE_SIZE[0] * 0.95), settings.POSTER_SOURCE_HEIGHT))
+        path = ImageCache.fetch(image_url)
+        if not path:
+            return None
+        return Image.open(path).convert("RGBA")
+
+    @staticmethod
+    def _load_draft(image_url: str):
+        """
+        Decodes a cached JPEG at reduced scale (DCT draft mode) for the fast
+        background. Returns None when not applicable (non-JPEG, not cached).
+        """
+        path = ImageCache.get(TmdbService.right_size_url(image_url))
+        if not path:
+            return None
+        try:
+            draft = Image.open(path)
+            if draft.format != "JPEG":
+                return None
+            factor = max(1, settings.POSTER_BACKGROUND_SCALE)
+            draft.draft("RGB", (settings.IMAGE_SIZE[0] // factor, settings.IMAGE_SIZE[1] // factor))
+            return draft.convert("RGBA")
+        except Exception as e:
+            logger.warning(f"Draft decode failed for {image_url}: {e}")
+            return None
 
-        # 5. Save
-        output_path = os.path.join(settings.TEMP_DIR, f"{title[:10].replace(' ', '_')}_poster.jpg")
+    @staticmethod
+    def generate_poster(image_url: str, title: str, description: str, job_id: Optional[str] = None) -> Union[bytes, str]:
+        """
+        Generates a 1920x1080 poster with title and description overlay.
+        Returns the JPEG bytes (default), or the path of a job-scoped file in
+        TEMP_DIR when POSTER_OUTPUT is "disk". Both can be passed to send_photo.
+        """
+        # 1. Download or Load Image (through the on-disk cache)
+        try:
+            img = ImageGenerator._load_source(image_url)
+        except Exception as e:
+            logger.error(f"Error loading image: {e}")
+            img = None
+        if img is None:
+            # Create a black placeholder if image download fails
+            img = Image.new("RGBA", (1920, 1080), (0, 0, 0, 255))
+
+        background_source = None
+        if settings.POSTER_BACKGROUND_MODE == "fast":
+            background_source = ImageGenerator._load_draft(image_url)
+
+        img = get_renderer().render(img, title, description, background_source)
+
+        # 5. Encode
         img = img.convert("RGB") # Remove alpha for JPG
+        if settings.POSTER_OUTPUT != "disk":
+            buffer = BytesIO()
+            img.save(buffer, "JPEG", quality=95)
+            return buffer.getvalue()
+
+        # Unique per job, so concurrent renders never overwrite each other
+        output_path = ImageGenerator.poster_path(job_id or uuid.uuid4().hex)
         img.save(output_path, quality=95)
         
         return output_path
+
+    @staticmethod
+    def poster_path(job_id: str) -> str:
+        return os.path.join(settings.TEMP_DIR, f"poster_{job_id}.jpg")
+
+    @staticmethod
+    def discard(poster: Union[bytes, str, None]):
+        """Deletes a disk-mode poster once it has been sent (no-op for in-memory posters)."""
+        if isinstance(poster, str) and os.path.exists(poster):
+            try:
+                os.remove(poster)
+                logger.info(f"Cleaned up temp image: {poster}")
+            except OSError as e:
+                logger.error(f"Failed to cleanup image {poster}: {e}")
+
+    @staticmethod
+    def sweep_temp(max_age: Optional[int] = None) -> int:
+        """Removes poster files older than `max_age` seconds left behind in TEMP_DIR."""
+        max_age = settings.TEMP_MAX_AGE if max_age is None else max_age
+        cutoff = time.time() - max_age
+        removed = 0
+        for name in os.listdir(settings.TEMP_DIR):
+            if not (name.endswith(".jpg") and "poster" in name):
+                continue
+            path = os.path.join(settings.TEMP_DIR, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    removed += 1
+            except OSError:
+                continue
+        if removed:
+            logger.info(f"Swept {removed} stale poster(s) from {settings.TEMP_DIR}")
+        return removed
@@ -0,0 +1,104 @@
+import math
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+from cinegram.utils.helpers import normalize_title
+
+# Leading/filler words that should not decide a match ("Matrix" vs "The Matrix")
+ARTICLES = frozenset({
+    "the", "a", "an", "el", "la", "los", "las", "un", "una", "lo",
+    "le", "les", "il", "der", "die", "das", "de", "del", "of",
+})
+
+# First four-digit group of a year or release date
+YEAR_RE = re.compile(r"\d{4}")
+
+class MatchScorer:
+    """
+    Scores TMDB search candidates against a query title.
+    Titles are normalized/tokenized once (cached) and compared with set-based
+    metrics that run in C: character-bigram Dice and token F1. Year proximity
+    and popularity are added as small features. Scores are in [0, ~1.1].
+    """
+
+    @staticmethod
+    @lru_cache(maxsize=8192)
+    def features(title: str) -> Tuple[str, frozenset, frozenset]:
+        """(space-less normalized text, core tokens, character bigrams) for a title."""
+        norm = normalize_title(title)
+        tokens = norm.split()
+        core = frozenset(t for t in tokens if t not in ARTICLES) or frozenset(tokens)
+        compact = norm.replace(" ", "")
+        bigrams = frozenset(compact[i:i + 2] for i in range(len(compact) - 1)) or frozenset([compact])
+        return compact, core, bigrams
+
+    @staticmethod
+    def similarity(query: str, candidate: str) -> float:
+        """Title similarity in [0, 1]."""
+        if not query or not candidate:
+            return 0.0
+        q_compact, q_tokens, q_grams = MatchScorer.features(query)
+        c_compact, c_tokens, c_grams = MatchScorer.features(candidate)
+        # Same letters, different spacing/punctuation ("Spiderman" vs "Spider-Man")
+        if q_compact == c_compact:
+            return 1.0
+        dice = 2 * len(q_grams & c_grams) / (len(q_grams) + len(c_grams))
+        token_f1 = 2 * len(q_tokens & c_tokens) / (len(q_tokens) + len(c_tokens)) if q_tokens and c_tokens else 0.0
+        return 0.55 * dice + 0.45 * token_f1
+
+    @staticmethod
+    def year_distance(year: Optional[str], release_date: Optional[str]) -> Optional[int]:
+        """
+        Years between a (possibly messy, e.g. AI-supplied '2019.0') year and a TMDB
+        release date, or None when either side has no usable year.
+        """
+        query = YEAR_RE.search(str(year or ""))
+        release = YEAR_RE.match(release_date or "")
+        if not query or not release:
+            return None
+        return abs(int(release.group(0)) - int(query.group(0)))
+
+    @staticmethod
+    def year_feature(year: Optional[str], release_date: Optional[str]) -> float:
+        """Bonus for the same year, neutral for ±1 (regional release dates), growing penalty beyond."""
+        diff = MatchScorer.year_distance(year, release_date)
+        if diff is None:
+            return 0.0
+        if diff == 0:
+            return 0.05
+        if diff == 1:
+            return 0.0
+        return -min(0.1 * diff, 0.3)
+
+    @staticmethod
+    def popularity_feature(popularity: Optional[float]) -> float:
+        """Tie-breaker: up to +0.05 for very popular titles."""
+        return 0.05 * min(1.0, math.log10(1 + (popularity or 0)) / 3)
+
+    @staticmethod
+    def score(query: str, year: Optional[str], candidate: Dict) -> float:
+        similarity = max(
+            MatchScorer.similarity(query, candidate.get('title', '')),
+            MatchScorer.similarity(query, candidate.get('original_title', '')),
+        )
+        return (
+            similarity
+            + MatchScorer.year_feature(year, candidate.get('release_date'))
+            + MatchScorer.popularity_feature(candidate.get('popularity'))
+        )
+
+    @staticmethod
+    def rank(query: str, year: Optional[str], candidates: List[Dict]) -> List[Tuple[float, Dict]]:
+        """All candidates with their score, best first (stable for equal scores)."""
+        scored = [(MatchScorer.score(query, year, c), c) for c in candidates]
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return scored
+
+    @staticmethod
+    def best(query: str, year: Optional[str], candidates: List[Dict], threshold: float) -> Tuple[Optional[Dict], float]:
+        """Best candidate if it reaches `threshold`, else (None, best_score)."""
+        ranked = MatchScorer.rank(query, year, candidates)
+        if not ranked:
+            return None, 0.0
+        best_score, best_match = ranked[0]
+        return (best_match if best_score >= threshold else None), best_score
@@ -1,6 +1,61 @@
-from typing import Dict, Optional
+from typing import Dict, Iterable, Optional
+
+# Cover rules, best first (see MetadataParser.poster_rank)
+POSTER_FORMATS = frozenset({'JPEG', 'PNG', 'Thumbnail'})
+POSTER_EXTENSIONS = frozenset({'.jpg', '.png'})
 
 class MetadataParser:
+    @staticmethod
+    def poster_rank(f: dict) -> Optional[int]:
+        """
+        Which cover rule a file entry satisfies (0 is best), or None:
+        0. Specifically marked images
+        1. Item Image default
+        2. Any JPEG/PNG that isn't a spectrogram or xml
+        """
+        name = f.get('name', '')
+        fmt = f.get('format')
+        if fmt in POSTER_FORMATS and 'thumb' not in name.lower():
+            return 0
+        if fmt == 'Item Image':
+            return 1
+        # Extension first: most entries of a big item are not images
+        if name[-4:].lower() in POSTER_EXTENSIONS and 'spectrogram' not in name.lower():
+            return 2
+        return None
+
+    @staticmethod
+    def select_poster(files: Iterable[dict]) -> Optional[str]:
+        """
+        Picks the cover in a single pass over the file entries (a list or any
+        iterator, e.g. a streamed listing): the first file of the best rule that
+        matches. Stops at the first rule-0 file, nothing can beat it.
+        Same rules as poster_rank, inlined: this loop runs once per file of the item.
+        """
+        if isinstance(files, list):
+            # In memory, rule 0 alone is a cheap format check: look for it first
+            for f in files:
+                if f.get('format') in POSTER_FORMATS:
+                    name = f.get('name', '')
+                    if name and 'thumb' not in name.lower():
+                        return name
+        item_image = any_image = None
+        for f in files:
+            fmt = f.get('format')
+            if fmt in POSTER_FORMATS:
+                name = f.get('name', '')
+                if 'thumb' not in name.lower():
+                    return name or item_image or any_image
+            elif fmt == 'Item Image':
+                if item_image is None:
+                    item_image = f.get('name')
+                continue
+            if any_image is None:
+                name = f.get('name', '')
+                if name[-4:].lower() in POSTER_EXTENSIONS and 'spectrogram' not in name.lower():
+                    any_image = name
+        return item_image or any_image
+
     @staticmethod
     def parse(data: dict, tmdb_data: Optional[Dict] = None) -> Optional[Dict]:
         """
@@ -21,27 +76,7 @@ class MetadataParser:
         ia_description = metadata.get("description", "No description available.")
         
         # 2. Extract IA Image (Improved Fallback)
-        poster_path = None
-        # Priority 1: Specifically marked images
-        for f in files:
-            if f.get('format') in ['JPEG', 'PNG', 'Thumbnail'] and 'thumb' not in f.get('name', '').lower():
-                poster_path = f['name']
-                break
-        
-        # Priority 2: Item Image default
-        if not poster_path:
-             for f in files:
-                if f.get('format') == 'Item Image':
-                    poster_path = f['name']
-                    break
-        
-        # Priority 3: Any JPEG/PNG that isn't a spectrogram or xml
-        if not poster_path:
-            for f in files:
-                name = f.get('name', '').lower()
-                if (name.endswith('.jpg') or name.endswith('.png')) and 'spectrogram' not in name:
-                    poster_path = f['name']
-                    break
+        poster_path = MetadataParser.select_poster(files)
 
         ia_poster_url = f"https://{server}{dir_path}/{poster_path}" if poster_path and server and dir_path else None
 
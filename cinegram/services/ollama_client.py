@@ -0,0 +1,86 @@
+import asyncio
+import hashlib
+import json
+import logging
+from collections import OrderedDict
+from typing import Optional, Dict
+from cinegram.config import settings
+from cinegram.utils import http_client
+from cinegram.utils.sqlite_cache import SqliteCache, MISSING
+
+logger = logging.getLogger(__name__)
+
+class OllamaClient:
+    """
+    Shared async client for the local Ollama server.
+    - Uses the process-wide HTTP pool (never blocks the event loop).
+    - Caps concurrent generations to what the local model can serve.
+    - Asks Ollama to keep the model resident between calls (keep_alive).
+    - Caches answers by model + prompt hash (in-memory LRU, then SQLite).
+    """
+    GENERATE_URL = f"{settings.OLLAMA_URL}/api/generate"
+    CACHE = SqliteCache("ollama")
+    _MEMORY = OrderedDict()
+    _SEMAPHORE = None
+
+    @staticmethod
+    def _get_semaphore() -> asyncio.Semaphore:
+        if OllamaClient._SEMAPHORE is None:
+            OllamaClient._SEMAPHORE = asyncio.Semaphore(settings.OLLAMA_CONCURRENCY)
+        return OllamaClient._SEMAPHORE
+
+    @staticmethod
+    def cache_key(model: str, prompt: str, options: Optional[Dict] = None, fmt: Optional[str] = None) -> str:
+        raw = json.dumps([model, prompt, options or {}, fmt], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _remember(key: str, answer: str):
+        OllamaClient._MEMORY[key] = answer
+        OllamaClient._MEMORY.move_to_end(key)
+        while len(OllamaClient._MEMORY) > settings.OLLAMA_MEMORY_CACHE_SIZE:
+            OllamaClient._MEMORY.popitem(last=False)
+
+    @staticmethod
+    async def generate(prompt: str, model: Optional[str] = None, options: Optional[Dict] = None,
+                       fmt: Optional[str] = None, timeout: float = 45) -> str:
+        """
+        Returns the model's raw `response` text for `prompt`.
+        Raises httpx.HTTPError / ValueError on failure (callers decide the fallback).
+        """
+        model = model or settings.OLLAMA_MODEL
+        key = OllamaClient.cache_key(model, prompt, options, fmt)
+
+        # 1. Memory LRU
+        if key in OllamaClient._MEMORY:
+            OllamaClient._MEMORY.move_to_end(key)
+            return OllamaClient._MEMORY[key]
+
+        # 2. Disk cache
+        cached = OllamaClient.CACHE.get(key)
+        if cached is not MISSING:
+            OllamaClient._remember(key, cached)
+            return cached
+
+        # 3. Model (bounded concurrency)
+        payload = {
+            "model": model,
+            "prompt": prompt,
+            "stream": False,
+            "keep_alive": settings.OLLAMA_KEEP_ALIVE,
+            "options": options or {},
+        }
+        if fmt:
+            payload["format"] = fmt
+
+        async with OllamaClient._get_semaphore():
+            response = await http_client.request_with_retry(
+                "POST", OllamaClient.GENERATE_URL, json=payload,
+                timeout=timeout, retries=settings.OLLAMA_RETRIES
+            )
+        answer = response.json().get('response', '').strip()
+
+        if answer:
+            OllamaClient._remember(key, answer)
+            OllamaClient.CACHE.set(key, answer, settings.OLLAMA_CACHE_TTL)
+        return answer
@@ -0,0 +1,189 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import List, Optional
+from cinegram.config import settings
+
+logger = logging.getLogger(__name__)
+
+class PublishQueue:
+    """
+    Durable record of every upload being published (SQLite, WAL).
+    A job holds the video file_id, what to search for, the resolved movie and the
+    stage it reached: lookup -> render -> publish -> done | failed.
+
+    - Leases: a worker owns a job until `lease_until`; jobs whose owner died
+      (restart, crash) are picked up again once the lease expires.
+    - Publish markers: the poster and the video are marked as sent right after
+      each send, so a resumed job never posts them twice.
+    """
+    PATH = os.path.join(settings.CACHE_DIR, "publish_queue.sqlite3")
+    # Identifies this process as lease owner
+    OWNER = uuid.uuid4().hex
+
+    _CONN = None
+    _LOCK = threading.Lock()
+
+    @staticmethod
+    def _connect() -> sqlite3.Connection:
+        if PublishQueue._CONN is None:
+            os.makedirs(os.path.dirname(PublishQueue.PATH), exist_ok=True)
+            conn = sqlite3.connect(PublishQueue.PATH, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                "chat_id INTEGER NOT NULL, message_id INTEGER NOT NULL, file_id TEXT NOT NULL, "
+                "search_title TEXT, search_year TEXT, "
+                "stage TEXT NOT NULL, movie TEXT, "
+                "photo_sent INTEGER NOT NULL DEFAULT 0, video_sent INTEGER NOT NULL DEFAULT 0, "
+                "error TEXT, attempts INTEGER NOT NULL DEFAULT 0, "
+                "lease_owner TEXT, lease_until REAL, "
+                "created_at REAL NOT NULL, updated_at REAL NOT NULL, "
+                "UNIQUE (chat_id, message_id))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_stage ON jobs (stage, lease_until)")
+            PublishQueue._CONN = conn
+        return PublishQueue._CONN
+
+    @staticmethod
+    def _execute(sql: str, params: tuple = ()) -> sqlite3.Cursor:
+        with PublishQueue._LOCK:
+            conn = PublishQueue._connect()
+            cursor = conn.execute(sql, params)
+            conn.commit()
+            return cursor
+
+    @staticmethod
+    def add(chat_id: int, message_id: int, file_id: str, title: str, year: Optional[str] = None) -> int:
+        """
+        Records an upload (leased to this process) and returns its job id.
+        Re-adding the same message restarts the lookup, unless it was already published.
+        """
+        now = time.time()
+        PublishQueue._execute(
+            "INSERT INTO jobs (chat_id, message_id, file_id, search_title, search_year, stage, "
+            "lease_owner, lease_until, created_at, updated_at) VALUES (?, ?, ?, ?, ?, 'lookup', ?, ?, ?, ?) "
+            "ON CONFLICT (chat_id, message_id) DO UPDATE SET "
+            "search_title = excluded.search_title, search_year = excluded.search_year, stage = 'lookup', "
+            "error = NULL, lease_owner = excluded.lease_owner, lease_until = excluded.lease_until, "
+            "updated_at = excluded.updated_at WHERE stage != 'done'",
+            (chat_id, message_id, file_id, title, year, PublishQueue.OWNER,
+             now + settings.PUBLISH_LEASE, now, now)
+        )
+        row = PublishQueue._execute(
+            "SELECT id FROM jobs WHERE chat_id = ? AND message_id = ?", (chat_id, message_id)
+        ).fetchone()
+        return row["id"]
+
+    @staticmethod
+    def get(job_id: int) -> Optional[dict]:
+        row = PublishQueue._execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if not row:
+            return None
+        job = dict(row)
+        job["movie"] = json.loads(job["movie"]) if job["movie"] else None
+        return job
+
+    @staticmethod
+    def claim(job_id: int) -> bool:
+        """Takes the lease of an unfinished job if nobody else holds it."""
+        now = time.time()
+        cursor = PublishQueue._execute(
+            "UPDATE jobs SET lease_owner = ?, lease_until = ?, attempts = attempts + 1, updated_at = ? "
+            "WHERE id = ? AND stage IN ('lookup', 'render', 'publish') "
+            "AND (lease_owner = ? OR lease_until IS NULL OR lease_until < ?)",
+            (PublishQueue.OWNER, now + settings.PUBLISH_LEASE, now, job_id, PublishQueue.OWNER, now)
+        )
+        return cursor.rowcount == 1
+
+    @staticmethod
+    def update_search(job_id: int, title: str, year: Optional[str] = None):
+        """Stores a better search (e.g. from the AI) so a resumed lookup uses it."""
+        PublishQueue._execute(
+            "UPDATE jobs SET search_title = ?, search_year = ?, lease_until = ?, updated_at = ? WHERE id = ?",
+            (title, year, time.time() + settings.PUBLISH_LEASE, time.time(), job_id)
+        )
+
+    @staticmethod
+    def set_movie(job_id: int, movie: dict):
+        """Lookup finished: stores the resolved movie and moves the job to rendering."""
+        PublishQueue._execute(
+            "UPDATE jobs SET movie = ?, stage = 'render', lease_until = ?, updated_at = ? WHERE id = ?",
+            (json.dumps(movie, ensure_ascii=False), time.time() + settings.PUBLISH_LEASE, time.time(), job_id)
+        )
+
+    @staticmethod
+    def set_stage(job_id: int, stage: str):
+        PublishQueue._execute(
+            "UPDATE jobs SET stage = ?, lease_until = ?, updated_at = ? WHERE id = ?",
+            (stage, time.time() + settings.PUBLISH_LEASE, time.time(), job_id)
+        )
+
+    @staticmethod
+    def mark_sent(job_id: int, part: str):
+        """Publish marker for 'photo' or 'video'. The video is the last step, so it finishes the job."""
+        if part == "video":
+            sql = "UPDATE jobs SET video_sent = 1, stage = 'done', lease_owner = NULL, updated_at = ? WHERE id = ?"
+        else:
+            sql = "UPDATE jobs SET photo_sent = 1, updated_at = ? WHERE id = ?"
+        PublishQueue._execute(sql, (time.time(), job_id))
+
+    @staticmethod
+    def fail(job_id: int, error: str):
+        PublishQueue._execute(
+            "UPDATE jobs SET stage = 'failed', error = ?, lease_owner = NULL, updated_at = ? WHERE id = ?",
+            (error, time.time(), job_id)
+        )
+
+    @staticmethod
+    def release(job_id: int):
+        """Gives up the lease (keeping the stage) so the next resume pass retries the job."""
+        PublishQueue._execute(
+            "UPDATE jobs SET lease_owner = NULL, lease_until = NULL, updated_at = ? WHERE id = ?",
+            (time.time(), job_id)
+        )
+
+    @staticmethod
+    def resumable() -> List[int]:
+        """
+        Unfinished jobs whose lease has expired and that belong to another (gone) process.
+        Jobs of this process are still in flight in a handler or batch, however long they wait.
+        """
+        rows = PublishQueue._execute(
+            "SELECT id FROM jobs WHERE stage IN ('lookup', 'render', 'publish') "
+            "AND (lease_until IS NULL OR lease_until < ?) AND (lease_owner IS NULL OR lease_owner != ?) "
+            "AND attempts < ? ORDER BY id",
+            (time.time(), PublishQueue.OWNER, settings.PUBLISH_MAX_ATTEMPTS)
+        ).fetchall()
+        return [r["id"] for r in rows]
+
+    @staticmethod
+    def exhausted() -> List[int]:
+        """Unfinished jobs of gone processes that already used up PUBLISH_MAX_ATTEMPTS."""
+        rows = PublishQueue._execute(
+            "SELECT id FROM jobs WHERE stage IN ('lookup', 'render', 'publish') "
+            "AND (lease_until IS NULL OR lease_until < ?) AND (lease_owner IS NULL OR lease_owner != ?) "
+            "AND attempts >= ? ORDER BY id",
+            (time.time(), PublishQueue.OWNER, settings.PUBLISH_MAX_ATTEMPTS)
+        ).fetchall()
+        return [r["id"] for r in rows]
+
+    @staticmethod
+    def purge_finished(max_age: int) -> int:
+        cursor = PublishQueue._execute(
+            "DELETE FROM jobs WHERE stage IN ('done', 'failed') AND updated_at < ?",
+            (time.time() - max_age,)
+        )
+        return cursor.rowcount
+
+    @staticmethod
+    def counts() -> dict:
+        rows = PublishQueue._execute("SELECT stage, COUNT(*) AS n FROM jobs GROUP BY stage").fetchall()
+        return {r["stage"]: r["n"] for r in rows}
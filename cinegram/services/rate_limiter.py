@@ -0,0 +1,151 @@
+import asyncio
+import contextlib
+import logging
+import time
+from typing import Any, Callable, Coroutine, Dict, Optional, Union
+from telegram.error import RetryAfter
+from telegram.ext import BaseRateLimiter
+from cinegram.config import settings
+
+logger = logging.getLogger(__name__)
+
+class TokenBucket:
+    """
+    Classic token bucket: `rate` tokens per second, bursts up to `capacity`.
+    Waiters are served in arrival order (the lock is FIFO), so a burst is paced
+    evenly instead of stampeding when tokens refill.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def is_idle(self) -> bool:
+        self._refill()
+        return self.tokens >= self.capacity and not self._lock.locked()
+
+    async def acquire(self) -> float:
+        """Takes one token, sleeping until it is available. Returns the seconds waited."""
+        async with self._lock:
+            self._refill()
+            waited = 0.0
+            if self.tokens < 1:
+                waited = (1 - self.tokens) / self.rate
+                await asyncio.sleep(waited)
+                self._refill()
+            self.tokens -= 1
+            return waited
+
+class SendScheduler(BaseRateLimiter):
+    """
+    Outbound Telegram scheduler (plugged into the Application as its rate limiter).
+    Every request addressed to a chat takes a token from that chat's bucket and then
+    from the bot-wide bucket, so sends are paced *before* Telegram answers 429.
+    Limits follow Telegram's guidance: ~1 msg/s per private chat, ~20 msg/min per
+    group/channel, ~30 msg/s per bot. A RetryAfter (should one still happen) pauses
+    all sends and the request is retried.
+    """
+    # Pending sends, waits and 429s (since start)
+    STATS = {"queued": 0, "max_queued": 0, "sent": 0, "wait_total": 0.0, "wait_max": 0.0, "retry_after": 0}
+
+    def __init__(self, max_retries: Optional[int] = None):
+        self._max_retries = settings.TELEGRAM_MAX_RETRIES if max_retries is None else max_retries
+        self._global = None
+        self._chats: Dict[Union[int, str], TokenBucket] = {}
+        self._resume = None
+
+    async def initialize(self) -> None:
+        self._global = TokenBucket(settings.TELEGRAM_GLOBAL_RATE, settings.TELEGRAM_GLOBAL_BURST)
+        self._resume = asyncio.Event()
+        self._resume.set()
+
+    async def shutdown(self) -> None:
+        self._chats.clear()
+
+    def _chat_bucket(self, chat_id: Union[int, str]) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            # Forget chats that are back to a full bucket
+            if len(self._chats) > 1000:
+                for key in [k for k, b in self._chats.items() if b.is_idle()]:
+                    del self._chats[key]
+            # Negative ids / @usernames are groups and channels
+            if isinstance(chat_id, str) or chat_id < 0:
+                bucket = TokenBucket(settings.TELEGRAM_GROUP_RATE / 60, settings.TELEGRAM_GROUP_BURST)
+            else:
+                bucket = TokenBucket(settings.TELEGRAM_CHAT_RATE, settings.TELEGRAM_CHAT_BURST)
+            self._chats[chat_id] = bucket
+        return bucket
+
+    @staticmethod
+    def queue_depth() -> int:
+        return SendScheduler.STATS["queued"]
+
+    @staticmethod
+    def average_wait() -> float:
+        sent = SendScheduler.STATS["sent"]
+        return SendScheduler.STATS["wait_total"] / sent if sent else 0.0
+
+    async def _pace(self, chat_id: Optional[Union[int, str]]) -> float:
+        stats = SendScheduler.STATS
+        stats["queued"] += 1
+        stats["max_queued"] = max(stats["max_queued"], stats["queued"])
+        try:
+            waited = 0.0
+            while True:
+                await self._resume.wait()
+                if chat_id is not None:
+                    waited += await self._chat_bucket(chat_id).acquire()
+                    waited += await self._global.acquire()
+                # Tokens taken during a flood pause are void: queue again so sends stay paced after it
+                if self._resume.is_set():
+                    return waited
+        finally:
+            stats["queued"] -= 1
+
+    async def process_request(
+        self,
+        callback: Callable[..., Coroutine[Any, Any, Union[bool, Dict[str, Any], list]]],
+        args: Any,
+        kwargs: Dict[str, Any],
+        endpoint: str,
+        data: Dict[str, Any],
+        rate_limit_args: Optional[int],
+    ) -> Union[bool, Dict[str, Any], list]:
+        chat_id = data.get("chat_id")
+        # Integer ids may arrive as strings (e.g. CHANNEL_ID from the environment)
+        with contextlib.suppress(ValueError, TypeError):
+            chat_id = int(chat_id)
+
+        max_retries = rate_limit_args if rate_limit_args is not None else self._max_retries
+        stats = SendScheduler.STATS
+        for attempt in range(max_retries + 1):
+            waited = await self._pace(chat_id)
+            if chat_id is not None:
+                stats["sent"] += 1
+                stats["wait_total"] += waited
+                stats["wait_max"] = max(stats["wait_max"], waited)
+                if waited > 1:
+                    logger.debug(f"{endpoint} to {chat_id} paced for {waited:.1f}s")
+            try:
+                return await callback(*args, **kwargs)
+            except RetryAfter as e:
+                stats["retry_after"] += 1
+                if attempt == max_retries:
+                    raise
+                delay = e.retry_after.total_seconds() if hasattr(e.retry_after, "total_seconds") else e.retry_after
+                logger.warning(f"Flood control on {endpoint} ({chat_id}): pausing sends for {delay}s")
+                # Hold every send until Telegram lets us through again
+                self._resume.clear()
+                try:
+                    await asyncio.sleep(delay + 0.1)
+                finally:
+                    self._resume.set()
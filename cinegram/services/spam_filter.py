@@ -0,0 +1,249 @@
+import json
+import os
+import re
+import logging
+import tempfile
+import threading
+from typing import Iterable, List, Tuple
+from cinegram.config import settings
+from cinegram.utils.helpers import normalize_title
+
+logger = logging.getLogger(__name__)
+
+# Raw patterns removed before tokenizing (handles, URLs, bare domains)
+RAW_SPAM_RE = re.compile(
+    r'@\w+|https?://\S+|www\.\S+|\b[\w-]+\.(?:com|net|org|tv|co|me|io|xyz|site|online|to|cc|ws|la|mx|es)\b',
+    re.IGNORECASE
+)
+LATINO_TOKENS = {"latino", "latina"}
+
+class SpamFilter:
+    """
+    Deterministic spam stripper for parsed titles, driven by a maintained lexicon
+    (assets/spam_lexicon.json) plus terms learned from past AI corrections.
+    All terms are compiled into one combined regex.
+    """
+    LEXICON_FILE = os.path.join(settings.ASSETS_DIR, "spam_lexicon.json")
+    LEARNED_FILE = os.path.join(settings.CACHE_DIR, "spam_lexicon_learned.json")
+
+    # Uploads seen / stripped / sent to the LLM (since start)
+    STATS = {"uploads": 0, "stripped": 0, "ai_fallbacks": 0}
+
+    _LOCK = threading.Lock()
+    _LEXICON = None
+    _LEARNED = None # {"terms": [...], "candidates": {term: count}}
+    _ANYWHERE_RE = None
+    _NEXT_TO_SPAM_RE = None
+    _TRAILING_RE = None
+
+    @staticmethod
+    def _phrase_regex(phrases, anchor_end: bool = False):
+        # Longest first so multi-word phrases win over their parts
+        terms = sorted({normalize_title(p) for p in phrases if normalize_title(p)}, key=len, reverse=True)
+        if not terms:
+            return None
+        body = "|".join(re.escape(t) for t in terms)
+        return re.compile(rf"(?:^| )(?:{body})(?= |$)" + ("$" if anchor_end else ""))
+
+    @staticmethod
+    def _load():
+        if SpamFilter._LEXICON is not None:
+            return
+        with SpamFilter._LOCK:
+            try:
+                with open(SpamFilter.LEXICON_FILE, 'r', encoding='utf-8') as f:
+                    lexicon = json.load(f)
+            except Exception as e:
+                logger.error(f"Error loading spam lexicon: {e}")
+                lexicon = {}
+            try:
+                with open(SpamFilter.LEARNED_FILE, 'r', encoding='utf-8') as f:
+                    learned = json.load(f)
+            except FileNotFoundError:
+                learned = {}
+            except Exception as e:
+                logger.error(f"Error loading learned spam lexicon: {e}")
+                learned = {}
+            SpamFilter._LEARNED = {
+                "terms": learned.get("terms", []),
+                "candidates": learned.get("candidates", {}),
+            }
+            SpamFilter._LEXICON = lexicon
+            SpamFilter._compile()
+
+    @staticmethod
+    def _compile():
+        lexicon = SpamFilter._LEXICON
+        SpamFilter._ANYWHERE_RE = SpamFilter._phrase_regex(lexicon.get("anywhere", []) + SpamFilter._LEARNED["terms"])
+        SpamFilter._NEXT_TO_SPAM_RE = SpamFilter._phrase_regex(lexicon.get("next_to_spam", []))
+        # Ordinary words ('online', 'hd') also count as spam at the end of the title
+        SpamFilter._TRAILING_RE = SpamFilter._phrase_regex(
+            lexicon.get("trailing", []) + lexicon.get("next_to_spam", []), anchor_end=True
+        )
+
+    @staticmethod
+    def _is_language_latino(tokens: List[str], index: int, keep_text: str) -> bool:
+        """
+        'Latino as language vs. title' rule, decided by the words around it:
+        1. Known titles (lexicon 'keep') keep it.
+        2. After a language cue ('Audio Latino') it is a language.
+        3. Followed by more title words ('Latino Bar', 'Un Latino en Paris') it is part of the title.
+        4. Otherwise, trailing ('Batman Latino', 'La Sirenita Latino'), it is a language tag.
+        """
+        lexicon = SpamFilter._LEXICON
+        for phrase in lexicon.get("keep", []):
+            if f" {normalize_title(phrase)} " in f" {keep_text} ":
+                return False
+        if index > 0 and tokens[index - 1] in lexicon.get("language_cues", []):
+            return True
+        # Years and trailing tags ('Batman Latino Pelicula 2019', 'Batman Latino HD') are not title words
+        tags = {w for phrase in lexicon.get("trailing", []) + lexicon.get("next_to_spam", [])
+                for w in normalize_title(phrase).split()}
+        following = [t for t in tokens[index + 1:] if not t.isdigit() and t not in tags and t not in LATINO_TOKENS]
+        if following:
+            return False
+        return True
+
+    @staticmethod
+    def strip(title: str) -> Tuple[str, List[str]]:
+        """
+        Removes spam from a parsed title.
+        Returns (clean_title, removed_terms). Original casing is preserved.
+        """
+        SpamFilter._load()
+        removed = [m.group(0) for m in RAW_SPAM_RE.finditer(title or "")]
+        words = RAW_SPAM_RE.sub(" ", title or "").replace(".", " ").replace("_", " ").split()
+        # Normalized view per word (same length as `words`)
+        norm = [normalize_title(w) for w in words]
+        keep = [bool(n) for n in norm]
+        text = " ".join(n for n in norm if n)
+        positions = [i for i, n in enumerate(norm) if n]
+
+        def span_words(start: int, end: int) -> List[int]:
+            # Map a char span in `text` back to word indices
+            indices, offset = [], 0
+            for i in positions:
+                word_start, word_end = offset, offset + len(norm[i])
+                if word_start >= start and word_end <= end:
+                    indices.append(i)
+                offset = word_end + 1
+            return indices
+
+        def drop_span(start: int, end: int):
+            for i in span_words(start, end):
+                keep[i] = False
+
+        # 1. Terms that are spam anywhere (sites, release tags, learned terms)
+        if SpamFilter._ANYWHERE_RE:
+            for match in SpamFilter._ANYWHERE_RE.finditer(text):
+                removed.append(match.group(0).strip())
+                drop_span(match.start(), match.end())
+
+        # 2. Ordinary words ('Avatar 1080p Online', 'Cuevana Estreno Avatar') only next to spam,
+        #    so 'Amor Online Para Siempre' keeps its title; spreads along runs of them
+        if SpamFilter._NEXT_TO_SPAM_RE:
+            spans = [(m.group(0).strip(), span_words(m.start(), m.end()))
+                     for m in SpamFilter._NEXT_TO_SPAM_RE.finditer(text)]
+            changed = True
+            while changed:
+                changed = False
+                for term, span in spans:
+                    if not span or not keep[span[0]]:
+                        continue
+                    first, last = positions.index(span[0]), positions.index(span[-1])
+                    neighbours = positions[max(first - 1, 0):first] + positions[last + 1:last + 2]
+                    if any(not keep[i] for i in neighbours):
+                        for i in span:
+                            keep[i] = False
+                        removed.append(term)
+                        changed = True
+
+        # 3. 'Latino' rule
+        kept_norm = [norm[i] for i in range(len(words)) if keep[i]]
+        kept_idx = [i for i in range(len(words)) if keep[i]]
+        for k, i in enumerate(kept_idx):
+            if norm[i] in LATINO_TOKENS and SpamFilter._is_language_latino(kept_norm, k, " ".join(kept_norm)):
+                keep[i] = False
+                removed.append(norm[i])
+
+        # 4. Trailing-only terms ('Spiderman Pelicula'), repeatedly
+        while SpamFilter._TRAILING_RE:
+            kept_idx = [i for i in range(len(words)) if keep[i]]
+            tail_text = " ".join(norm[i] for i in kept_idx)
+            match = SpamFilter._TRAILING_RE.search(tail_text)
+            # Never strip the whole title
+            if not match or match.start() == 0:
+                break
+            count = len(match.group(0).split())
+            for i in kept_idx[-count:]:
+                keep[i] = False
+            removed.append(match.group(0).strip())
+
+        clean = " ".join(w for w, k in zip(words, keep) if k).strip(" -|()[]")
+        return clean, removed
+
+    @staticmethod
+    def learn(original: str, corrected: str, resolved_titles: Iterable[str]) -> List[str]:
+        """
+        Learns spam terms from an AI correction that TMDB confirmed: words present in
+        the original title but dropped by the AI. Only when the AI title is the original
+        with words removed (not a rewrite or a translation), and never a common word or
+        a word of the resolved TMDB titles (title + original title).
+        A word is promoted to the lexicon once it has been seen SPAM_LEARN_THRESHOLD
+        times. Returns newly promoted terms.
+        """
+        SpamFilter._load()
+        original_tokens = normalize_title(original).split()
+        corrected_tokens = normalize_title(corrected).split()
+        # Subsequence check: the AI may only have dropped words
+        remaining = iter(original_tokens)
+        if not corrected_tokens or not all(t in remaining for t in corrected_tokens):
+            return []
+
+        protected = set(corrected_tokens)
+        for title in resolved_titles:
+            protected.update(normalize_title(title or "").split())
+        lexicon = SpamFilter._LEXICON
+        protected.update(lexicon.get("determiners", []))
+        protected.update(lexicon.get("common", []))
+        # Ordinary words the lexicon already handles next to spam; learning them would strip them anywhere
+        protected.update(w for phrase in lexicon.get("next_to_spam", []) for w in normalize_title(phrase).split())
+        candidates = [
+            w for w in original_tokens
+            if w not in protected and len(w) > 2 and not w.isdigit() and w not in LATINO_TOKENS
+        ]
+        if not candidates:
+            return []
+
+        promoted = []
+        with SpamFilter._LOCK:
+            learned = SpamFilter._LEARNED
+            for word in candidates:
+                if word in learned["terms"]:
+                    continue
+                learned["candidates"][word] = learned["candidates"].get(word, 0) + 1
+                if learned["candidates"][word] >= settings.SPAM_LEARN_THRESHOLD:
+                    learned["terms"].append(word)
+                    learned["candidates"].pop(word)
+                    promoted.append(word)
+            SpamFilter._save_learned()
+            if promoted:
+                logger.info(f"Spam lexicon learned: {promoted}")
+                SpamFilter._compile()
+        return promoted
+
+    @staticmethod
+    def _save_learned():
+        try:
+            os.makedirs(os.path.dirname(SpamFilter.LEARNED_FILE), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(SpamFilter.LEARNED_FILE), suffix=".tmp")
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(SpamFilter._LEARNED, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, SpamFilter.LEARNED_FILE)
+        except Exception as e:
+            logger.error(f"Error saving learned spam lexicon: {e}")
+
+    @staticmethod
+    def fallback_rate() -> float:
+        uploads = SpamFilter.STATS["uploads"]
+        return SpamFilter.STATS["ai_fallbacks"] / uploads if uploads else 0.0
@@ -0,0 +1,268 @@
+"""
+Offline TMDB title index.
+
+Built from TMDB's daily ID export (movie_ids_MM_DD_YYYY.json.gz, original titles +
+popularity) plus our own publish history (Spanish titles, years and the searches
+that led to them). Lookups are local SQLite queries: exact on the normalized title,
+fuzzy through an FTS5 trigram index re-ranked with difflib.
+
+Refresh from the command line:
+    python -m cinegram.services.title_index refresh [--date MM_DD_YYYY | --file export.json.gz]
+    python -m cinegram.services.title_index lookup "Volver al Futuro" 1985
+"""
+import argparse
+import gzip
+import json
+import logging
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from difflib import SequenceMatcher
+from typing import Iterable, List, Optional
+from cinegram.config import settings
+from cinegram.utils.helpers import normalize_title
+
+logger = logging.getLogger(__name__)
+
+class TitleIndex:
+    PATH = os.path.join(settings.CACHE_DIR, "title_index.sqlite3")
+    EXPORT_URL = "http://files.tmdb.org/p/exports/movie_ids_{date}.json.gz"
+
+    # Index answers since start
+    STATS = {"exact": 0, "fuzzy": 0, "ambiguous": 0, "misses": 0}
+
+    _CONN = None
+    _LOCK = threading.Lock()
+
+    @staticmethod
+    def _connect() -> sqlite3.Connection:
+        if TitleIndex._CONN is None:
+            os.makedirs(os.path.dirname(TitleIndex.PATH), exist_ok=True)
+            conn = sqlite3.connect(TitleIndex.PATH, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS titles ("
+                "id INTEGER PRIMARY KEY, tmdb_id INTEGER NOT NULL, norm TEXT NOT NULL, "
+                "year TEXT, popularity REAL NOT NULL DEFAULT 0, source TEXT NOT NULL, "
+                "UNIQUE (source, norm, tmdb_id))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS titles_norm ON titles (norm)")
+            conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS titles_fts USING fts5("
+                "norm, content='titles', content_rowid='id', tokenize='trigram')"
+            )
+            TitleIndex._CONN = conn
+        return TitleIndex._CONN
+
+    # --- Lookup ---
+
+    @staticmethod
+    def lookup(title: str, year: Optional[str] = None) -> Optional[int]:
+        """
+        Returns the TMDB id for a title when the index is confident, otherwise None
+        (the caller then asks the TMDB search API).
+        """
+        norm = normalize_title(title)
+        if not norm:
+            return None
+        try:
+            with TitleIndex._LOCK:
+                conn = TitleIndex._connect()
+                rows = conn.execute(
+                    "SELECT tmdb_id, year, popularity FROM titles WHERE norm = ?", (norm,)
+                ).fetchall()
+                movie_id = TitleIndex._pick(rows, year)
+                if movie_id:
+                    TitleIndex.STATS["exact"] += 1
+                    return movie_id
+                if rows:
+                    TitleIndex.STATS["ambiguous"] += 1
+                    return None
+
+                movie_id = TitleIndex._fuzzy(conn, norm, year)
+        except sqlite3.Error as e:
+            logger.error(f"Title index lookup failed: {e}")
+            return None
+
+        TitleIndex.STATS["fuzzy" if movie_id else "misses"] += 1
+        return movie_id
+
+    @staticmethod
+    def _pick(rows: list, year: Optional[str]) -> Optional[int]:
+        """One id out of the rows for a title: unique, year-confirmed or clearly most popular."""
+        ids = {}
+        for tmdb_id, row_year, popularity in rows:
+            entry = ids.setdefault(tmdb_id, {"years": set(), "popularity": 0.0})
+            if row_year:
+                entry["years"].add(row_year)
+            entry["popularity"] = max(entry["popularity"], popularity)
+        if not ids:
+            return None
+        if year:
+            dated = [i for i, e in ids.items() if str(year) in e["years"]]
+            if len(dated) == 1:
+                return dated[0]
+            # Drop ids known to be from another year
+            ids = {i: e for i, e in ids.items() if not e["years"] or str(year) in e["years"]} or ids
+        if len(ids) == 1:
+            return next(iter(ids))
+        # Remakes share titles: only trust a clear popularity winner
+        ranked = sorted(ids.items(), key=lambda item: item[1]["popularity"], reverse=True)
+        if ranked[0][1]["popularity"] >= settings.TITLE_INDEX_DOMINANCE * max(ranked[1][1]["popularity"], 0.1):
+            return ranked[0][0]
+        return None
+
+    @staticmethod
+    def _trigrams(norm: str) -> List[str]:
+        return sorted({norm[i:i + 3] for i in range(len(norm) - 2)})
+
+    @staticmethod
+    def _fuzzy(conn: sqlite3.Connection, norm: str, year: Optional[str]) -> Optional[int]:
+        grams = TitleIndex._trigrams(norm)
+        if len(grams) < 2:
+            return None
+        query = " OR ".join('"' + g.replace('"', '""') + '"' for g in grams)
+        rows = conn.execute(
+            "SELECT t.tmdb_id, t.norm, t.year, t.popularity FROM titles_fts f "
+            "JOIN titles t ON t.id = f.rowid WHERE titles_fts MATCH ? ORDER BY f.rank LIMIT ?",
+            (query, settings.TITLE_INDEX_FUZZY_CANDIDATES)
+        ).fetchall()
+
+        scored = {}
+        for tmdb_id, candidate, row_year, popularity in rows:
+            score = SequenceMatcher(None, norm, candidate).ratio()
+            if year and row_year and row_year != str(year):
+                score -= 0.2
+            if score > scored.get(tmdb_id, 0.0):
+                scored[tmdb_id] = score
+        if not scored:
+            return None
+
+        ranked = sorted(scored.items(), key=lambda item: item[1], reverse=True)
+        best_id, best_score = ranked[0]
+        if best_score < settings.TITLE_INDEX_FUZZY_MIN:
+            return None
+        # A close runner-up means we can't tell them apart
+        if len(ranked) > 1 and best_score - ranked[1][1] < 0.05:
+            return None
+        return best_id
+
+    # --- Publish history ---
+
+    @staticmethod
+    def add_history(tmdb_id: int, title: str, year: Optional[str] = None, aliases: Iterable[str] = ()):
+        """Records a published movie: its title and the searches that found it map to its id."""
+        if not tmdb_id:
+            return
+        entries = {normalize_title(t) for t in [title, *aliases] if t}
+        entries.discard("")
+        try:
+            with TitleIndex._LOCK:
+                conn = TitleIndex._connect()
+                for norm in entries:
+                    cursor = conn.execute(
+                        "INSERT OR IGNORE INTO titles (tmdb_id, norm, year, source) VALUES (?, ?, ?, 'history')",
+                        (tmdb_id, norm, year)
+                    )
+                    if cursor.rowcount:
+                        conn.execute("INSERT INTO titles_fts (rowid, norm) VALUES (?, ?)", (cursor.lastrowid, norm))
+                conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Title index history write failed: {e}")
+
+    # --- Export refresh ---
+
+    @staticmethod
+    def parse_export(lines: Iterable[str], min_popularity: float):
+        """Yields (tmdb_id, norm, popularity) from TMDB export lines (one JSON object per line)."""
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                item = json.loads(line)
+            except ValueError:
+                continue
+            if item.get("adult") or item.get("video"):
+                continue
+            popularity = float(item.get("popularity") or 0)
+            if popularity < min_popularity:
+                continue
+            norm = normalize_title(item.get("original_title", ""))
+            if norm and item.get("id"):
+                yield item["id"], norm, popularity
+
+    @staticmethod
+    def refresh(export_path: str, min_popularity: Optional[float] = None) -> int:
+        """Replaces the export part of the index with a (gzipped) export file. Keeps the history."""
+        min_popularity = settings.TITLE_INDEX_MIN_POPULARITY if min_popularity is None else min_popularity
+        started = time.monotonic()
+        opener = gzip.open if export_path.endswith(".gz") else open
+        with TitleIndex._LOCK:
+            conn = TitleIndex._connect()
+            with opener(export_path, "rt", encoding="utf-8") as f:
+                conn.execute("DELETE FROM titles WHERE source = 'export'")
+                conn.executemany(
+                    "INSERT OR IGNORE INTO titles (tmdb_id, norm, popularity, source) VALUES (?, ?, ?, 'export')",
+                    TitleIndex.parse_export(f, min_popularity)
+                )
+            conn.execute("INSERT INTO titles_fts (titles_fts) VALUES ('rebuild')")
+            conn.commit()
+            count = conn.execute("SELECT COUNT(*) FROM titles WHERE source = 'export'").fetchone()[0]
+        logger.info(f"Title index refreshed: {count} export titles in {time.monotonic() - started:.1f}s")
+        return count
+
+    @staticmethod
+    def download_export(date: Optional[str] = None) -> str:
+        """Downloads a daily export (default: yesterday's, today's may not be published yet)."""
+        import requests
+
+        date = date or (datetime.now(timezone.utc) - timedelta(days=1)).strftime("%m_%d_%Y")
+        url = TitleIndex.EXPORT_URL.format(date=date)
+        fd, path = tempfile.mkstemp(suffix=".json.gz", dir=settings.CACHE_DIR)
+        logger.info(f"Downloading {url}")
+        with requests.get(url, stream=True, timeout=60) as response, os.fdopen(fd, "wb") as f:
+            response.raise_for_status()
+            for chunk in response.iter_content(chunk_size=1 << 20):
+                f.write(chunk)
+        return path
+
+    @staticmethod
+    def counts() -> dict:
+        with TitleIndex._LOCK:
+            rows = TitleIndex._connect().execute("SELECT source, COUNT(*) FROM titles GROUP BY source").fetchall()
+        return dict(rows)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m cinegram.services.title_index")
+    commands = parser.add_subparsers(dest="command", required=True)
+    refresh = commands.add_parser("refresh", help="Rebuild from a TMDB daily export")
+    refresh.add_argument("--date", help="Export date MM_DD_YYYY (default: yesterday, UTC)")
+    refresh.add_argument("--file", help="Use a local export file instead of downloading")
+    refresh.add_argument("--min-popularity", type=float, default=None)
+    lookup = commands.add_parser("lookup", help="Resolve a title to a TMDB id")
+    lookup.add_argument("title")
+    lookup.add_argument("year", nargs="?")
+    commands.add_parser("stats", help="Entries per source")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(format='%(asctime)s - %(name)s - %(levelname)s - %(message)s', level=logging.INFO)
+    if args.command == "refresh":
+        path = args.file or TitleIndex.download_export(args.date)
+        try:
+            TitleIndex.refresh(path, args.min_popularity)
+        finally:
+            if not args.file:
+                os.remove(path)
+        print(TitleIndex.counts())
+    elif args.command == "lookup":
+        print(TitleIndex.lookup(args.title, args.year))
+    else:
+        print(TitleIndex.counts())
+
+if __name__ == "__main__":
+    sys.exit(main())
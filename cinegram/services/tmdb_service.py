@@ -1,16 +1,72 @@
-import requests
+import asyncio
 import logging
-from typing import Optional, Dict
+from typing import Optional, Dict, List, Tuple
+import httpx
 from cinegram.config import settings
+from cinegram.utils import http_client
+from cinegram.utils.concurrency import stage
+from cinegram.utils.helpers import normalize_title
+from cinegram.utils.sqlite_cache import SqliteCache, MISSING
+from cinegram.utils.singleflight import SingleFlight
+from cinegram.services.title_index import TitleIndex
+from cinegram.services.match_scorer import MatchScorer
 
 logger = logging.getLogger(__name__)
 
 class TmdbService:
     BASE_URL = "https://api.themoviedb.org/3"
     IMAGE_BASE_URL = "https://image.tmdb.org/t/p/original"
+    IMAGE_ROOT_URL = "https://image.tmdb.org/t/p/"
+    # Used until /configuration has been fetched once
+    DEFAULT_POSTER_SIZES = ["w92", "w154", "w185", "w342", "w500", "w780", "original"]
+    POSTER_ASPECT = 2 / 3 # TMDB posters are 2:3 (width:height)
+    # Persistent cache of raw /search/movie answers (hits and empty results)
+    SEARCH_CACHE = SqliteCache("tmdb_search")
+    # Raw /movie/{id} answers per language
+    DETAILS_CACHE = SqliteCache("tmdb_details")
+    # /configuration answer (image base URL + size buckets)
+    CONFIG_CACHE = SqliteCache("tmdb_config")
+    # Identical searches/details requested concurrently share one call
+    FLIGHT = SingleFlight("tmdb")
+    _IMAGE_CONFIG = None
+    # Marketing suffixes that hide the real title from the search
+    NOISE_SUFFIXES = [" La Pelicula", " La Película", " The Movie", " El Film"]
 
     @staticmethod
-    def search_movie(title: str, year: str = None) -> Optional[Dict]:
+    def _cache_key(params: dict) -> str:
+        return "|".join([
+            params.get("language", ""),
+            str(params.get("year") or ""),
+            normalize_title(params.get("query", "")),
+            str(params.get("page", 1)),
+        ])
+
+    @staticmethod
+    async def _search(params: dict) -> list:
+        """
+        Runs a single /search/movie request through the shared async pool.
+        Answers (including "no results") are cached on disk with separate TTLs.
+        """
+        key = TmdbService._cache_key(params)
+        cached = TmdbService.SEARCH_CACHE.get(key)
+        if cached is not MISSING:
+            return cached
+        return await TmdbService.FLIGHT.do(("search", key), TmdbService._fetch_search, key, params)
+
+    @staticmethod
+    async def _fetch_search(key: str, params: dict) -> list:
+        url = f"{TmdbService.BASE_URL}/search/movie"
+        # Lookup slot only around the request (shared by coalesced callers, not held during translation)
+        async with stage("lookup"):
+            response = await http_client.request_with_retry("GET", url, params=params, timeout=settings.TMDB_TIMEOUT)
+        results = response.json().get('results', [])
+
+        ttl = settings.TMDB_CACHE_TTL if results else settings.TMDB_NEGATIVE_TTL
+        TmdbService.SEARCH_CACHE.set(key, results, ttl)
+        return results
+
+    @staticmethod
+    async def search_movie(title: str, year: str = None) -> Optional[Dict]:
         """
         Searches for a movie on TMDB by title and optional year.
         Returns the best match metadata.
@@ -18,112 +74,306 @@ class TmdbService:
         if not settings.TMDB_API_KEY:
             logger.warning("TMDB_API_KEY is not set. Skipping TMDB search.")
             return None
+        # The same film forwarded several times at once is looked up once
+        key = ("movie", normalize_title(title), str(year or ""))
+        return await TmdbService.FLIGHT.do(key, TmdbService._search_movie, title, year)
 
-        url = f"{TmdbService.BASE_URL}/search/movie"
-        params = {
-            "api_key": settings.TMDB_API_KEY,
-            "query": title,
-            "language": "es-MX", # Latin Spanish preference
-            "page": 1
+    @staticmethod
+    async def _search_movie(title: str, year: str = None) -> Optional[Dict]:
+
+        # Local title index first: a hit only needs the details call
+        movie_id = await asyncio.to_thread(TitleIndex.lookup, title, year)
+        if movie_id:
+            movie = await TmdbService.get_movie_by_id(movie_id)
+            if movie:
+                # Validated like any search candidate (plus at most ±1 year off)
+                score = MatchScorer.score(title, year, movie)
+                distance = MatchScorer.year_distance(year, movie.get('release_date'))
+                if score >= settings.TMDB_MATCH_THRESHOLD and (distance is None or distance <= 1):
+                    logger.info(f"Title index hit for '{title}': {movie_id} (Score: {score:.2f})")
+                    return movie
+            logger.info(f"Title index answer {movie_id} for '{title}' rejected, searching TMDB")
+
+        try:
+            found = await TmdbService._run_plan(title, year, TmdbService.plan_queries(title, year))
+        except (httpx.HTTPError, ValueError) as e:
+            logger.error(f"TMDB Search failed: {e}")
+            return None
+        if not found:
+            return None
+
+        # --- MATCH VALIDATION ---
+        best_score, movie, language = found
+        if best_score < settings.TMDB_MATCH_THRESHOLD:
+            logger.warning(f"Low confidence match for '{title}' (Score: {best_score:.2f})")
+            return None
+
+        if language != "es-MX":
+            # Found through an English query: prefer the Spanish title/overview
+            localized = await TmdbService.get_movie_by_id(movie.get('id'))
+            if localized:
+                return localized
+
+        # If we only have the English answer, translate the overview
+        overview = movie.get('overview')
+        if overview and language == "en-US":
+            from cinegram.services.translation_service import TranslationService
+            overview = await TranslationService.translate_overview(movie.get('id'), overview)
+
+        return {
+            "id": movie.get('id'),
+            "title": movie.get('title'),
+            "original_title": movie.get('original_title'),
+            "overview": overview,
+            "release_date": movie.get('release_date'),
+            "poster_path": movie.get('poster_path'),
+            "genre_ids": movie.get('genre_ids'),
+            "vote_average": movie.get('vote_average')
         }
-        if year:
-            params["year"] = year
 
-        if year:
-            params["year"] = year
+    @staticmethod
+    def plan_queries(title: str, year: str = None) -> List[dict]:
+        """
+        Every /search/movie variant worth asking for a title, best first:
+        (year, no year) x (es-MX, en-US) x (as given, without noise suffixes).
+        Variants that hit the same cache key are dropped.
+        """
+        titles = [title]
+        for noise in TmdbService.NOISE_SUFFIXES:
+            if noise.lower() in title.lower():
+                clean_title = title.lower().replace(noise.lower(), "").strip()
+                if clean_title:
+                    titles.append(clean_title)
 
-        # Session with Retry Strategy
-        session = requests.Session()
-        retries = requests.adapters.HTTPAdapter(max_retries=3)
-        session.mount('https://', retries)
+        plan, seen = [], set()
+        for query_year in ([year, None] if year else [None]):
+            for language in ("es-MX", "en-US"): # Latin Spanish preference
+                for query in titles:
+                    params = {"api_key": settings.TMDB_API_KEY, "query": query, "language": language, "page": 1}
+                    if query_year:
+                        params["year"] = query_year
+                    key = TmdbService._cache_key(params)
+                    if key not in seen:
+                        seen.add(key)
+                        plan.append(params)
+        return plan
 
+    @staticmethod
+    async def _run_plan(title: str, year: Optional[str], plan: List[dict]) -> Optional[Tuple[float, Dict, str]]:
+        """
+        Runs the query plan hedged: variant N starts after N * TMDB_HEDGE_DELAY, or as
+        soon as N earlier variants have answered without settling the lookup, with at
+        most TMDB_PLAN_CONCURRENCY requests in flight.
+        The lookup is settled (and the remaining variants cancelled or never sent) once
+        the highest-priority variant with a candidate over TMDB_MATCH_THRESHOLD has
+        answered after every variant before it, as a sequential fallback would; or at
+        once by any candidate scoring TMDB_HEDGE_ACCEPT or more. The result is the best
+        candidate over all answers (earlier variant on ties).
+        Returns (score, candidate, language) or None when nothing was found.
+        """
+        limit = asyncio.Semaphore(settings.TMDB_PLAN_CONCURRENCY)
+        answered = asyncio.Condition()
+        answers = {} # priority -> (score, candidate, language) of its top candidate, or None
+        errors = []
+        done = 0
+        settled = False
+
+        def settles() -> bool:
+            for priority in range(len(plan)):
+                if priority not in answers:
+                    return False # An earlier variant could still claim the lookup
+                top = answers[priority]
+                if top and top[0] >= settings.TMDB_MATCH_THRESHOLD:
+                    return True
+            return False
+
+        async def run(priority: int, params: dict):
+            nonlocal done, settled
+            if priority:
+                try:
+                    async with answered:
+                        await asyncio.wait_for(
+                            answered.wait_for(lambda: settled or done >= priority),
+                            timeout=priority * settings.TMDB_HEDGE_DELAY
+                        )
+                except asyncio.TimeoutError:
+                    pass
+            top = None
+            try:
+                async with limit:
+                    if settled:
+                        return
+                    results = await TmdbService._search(params)
+                # Score the whole first page against the variant's own query (a cleaned
+                # title is not penalized for the suffix it dropped)
+                ranked = MatchScorer.rank(params["query"], year, results[:settings.TMDB_MATCH_CANDIDATES])
+                if ranked:
+                    top = (ranked[0][0], ranked[0][1], params["language"])
+            except (httpx.HTTPError, ValueError) as e:
+                errors.append(e)
+            finally:
+                async with answered:
+                    answers[priority] = top
+                    done += 1
+                    if not settled and ((top and top[0] >= settings.TMDB_HEDGE_ACCEPT) or settles()):
+                        settled = True
+                        logger.debug(f"TMDB plan for '{title}' settled by variant {priority} of {len(plan)}")
+                    answered.notify_all()
+
+        tasks = [asyncio.create_task(run(priority, params)) for priority, params in enumerate(plan)]
         try:
-            response = session.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            results = response.json().get('results', [])
-            
-            if not results:
-                # RETRY 2: Remove common noise suffixes
-                for noise in [" La Pelicula", " La Película", " The Movie", " El Film"]:
-                    if noise.lower() in title.lower():
-                        clean_title = title.lower().replace(noise.lower(), "").strip()
-                        params["query"] = clean_title
-                        params["language"] = "es-MX"
-                        response = requests.get(url, params=params)
-                        results = response.json().get('results', [])
-                        if results: break
-
-            if not results:
-                # RETRY 3: English Search (Original strategy)
-                params["query"] = title 
-                params["language"] = "en-US"
-                response = requests.get(url, params=params)
-                response.raise_for_status()
-                results = response.json().get('results', [])
-
-            if results:
-                # --- FUZZY MATCH VALIDATION ---
-                from difflib import SequenceMatcher
-                
-                best_match = None
-                best_score = 0.0
-                
-                # Check the top 5 results
-                for movie in results[:5]:
-                    candidate_title = movie.get('title', '')
-                    candidate_orig = movie.get('original_title', '')
-                    
-                    # Compute similarity with both Spanish and Original titles
-                    score_local = SequenceMatcher(None, title.lower(), candidate_title.lower()).ratio()
-                    score_orig = SequenceMatcher(None, title.lower(), candidate_orig.lower()).ratio()
-                    max_score = max(score_local, score_orig)
-                    
-                    # Logic: If query has a year, enforce it strictly
-                    if year:
-                        re_date = movie.get('release_date', '')[:4]
-                        if re_date and re_date != str(year):
-                            # Penalize strict year mismatch
-                             max_score -= 0.3
-                    
-                    if max_score > best_score:
-                        best_score = max_score
-                        best_match = movie
-
-                # THRESHOLD: 0.6 (60% match required)
-                if best_match and best_score >= 0.6:
-                    movie = best_match
-                else:
-                    if best_match:
-                         logger.warning(f"Low confidence match for '{title}': '{best_match.get('title')}' (Score: {best_score:.2f})")
-                    else:
-                         logger.warning(f"No match found for '{title}'")
-                    return None
-
-                # If we fell back to English, translate the overview
-                overview = movie.get('overview')
-                if overview and params.get("language") == "en-US":
-                    from cinegram.services.translation_service import TranslationService
-                    overview = TranslationService.translate_to_spanish(overview)
-
-                return {
-                    "title": movie.get('title'),
-                    "overview": overview,
-                    "release_date": movie.get('release_date'),
-                    "poster_path": movie.get('poster_path'),
-                    "genre_ids": movie.get('genre_ids'),
-                    "vote_average": movie.get('vote_average')
-                }
+            async with answered:
+                await answered.wait_for(lambda: settled or done == len(plan))
+        finally:
+            for task in tasks:
+                task.cancel()
+            # Reap the cancelled variants so no exception goes unretrieved
+            outcomes = await asyncio.gather(*tasks, return_exceptions=True)
+        for outcome in outcomes:
+            if isinstance(outcome, Exception):
+                raise outcome
+
+        best = None
+        for priority, top in sorted(answers.items()):
+            if top and (best is None or top[0] > best[0]):
+                best = top
+        if best is None:
+            if errors and len(errors) == len(plan):
+                raise errors[0]
             return None
-            
-        except requests.RequestException as e:
-            logger.error(f"TMDB Search failed: {e}")
+        return best
+
+    @staticmethod
+    async def get_movie_details(movie_id: int, language: str = "es-MX") -> Optional[Dict]:
+        """Fetches /movie/{id} in the given language (None on failure). Cached on disk."""
+        if not settings.TMDB_API_KEY:
+            return None
+        key = f"{language}|{movie_id}"
+        cached = TmdbService.DETAILS_CACHE.get(key)
+        if cached is not MISSING:
+            return cached
+        return await TmdbService.FLIGHT.do(("details", key), TmdbService._fetch_details, key, movie_id, language)
+
+    @staticmethod
+    async def _fetch_details(key: str, movie_id: int, language: str) -> Optional[Dict]:
+        try:
+            async with stage("lookup"):
+                response = await http_client.request_with_retry(
+                    "GET", f"{TmdbService.BASE_URL}/movie/{movie_id}",
+                    params={"api_key": settings.TMDB_API_KEY, "language": language},
+                    timeout=settings.TMDB_TIMEOUT
+                )
+            details = response.json()
+        except (httpx.HTTPError, ValueError) as e:
+            logger.error(f"TMDB details failed for {movie_id}: {e}")
+            return None
+        TmdbService.DETAILS_CACHE.set(key, details, settings.TMDB_CACHE_TTL)
+        return details
+
+    @staticmethod
+    async def get_movie_by_id(movie_id: int) -> Optional[Dict]:
+        """
+        Movie metadata by TMDB id, in the same shape as search_movie.
+        Spanish first; an English-only overview is translated.
+        """
+        details = await TmdbService.get_movie_details(movie_id, "es-MX")
+        if not details or not details.get('id'):
+            return None
+
+        overview = details.get('overview')
+        if not overview:
+            english = await TmdbService.get_movie_details(movie_id, "en-US")
+            overview = (english or {}).get('overview')
+            if overview:
+                from cinegram.services.translation_service import TranslationService
+                overview = await TranslationService.translate_overview(movie_id, overview)
+
+        return {
+            "id": details.get('id'),
+            "title": details.get('title'),
+            "original_title": details.get('original_title'),
+            "overview": overview,
+            "release_date": details.get('release_date'),
+            "poster_path": details.get('poster_path'),
+            "genre_ids": [g['id'] for g in details.get('genres', [])],
+            "vote_average": details.get('vote_average')
+        }
+
+    @staticmethod
+    async def load_configuration(force: bool = False) -> Optional[Dict]:
+        """
+        Fetches TMDB's image configuration (base URL + poster sizes) and caches it
+        locally, so poster URLs can be right-sized without a round-trip.
+        """
+        if not force:
+            cached = TmdbService.CONFIG_CACHE.get("images")
+            if cached is not MISSING:
+                TmdbService._IMAGE_CONFIG = cached
+                return cached
+        if not settings.TMDB_API_KEY:
             return None
 
+        try:
+            response = await http_client.request_with_retry(
+                "GET", f"{TmdbService.BASE_URL}/configuration",
+                params={"api_key": settings.TMDB_API_KEY}, timeout=settings.TMDB_TIMEOUT
+            )
+            images = response.json().get('images', {})
+        except (httpx.HTTPError, ValueError) as e:
+            logger.error(f"TMDB configuration fetch failed: {e}")
+            return None
+
+        config = {
+            "base_url": images.get('secure_base_url') or TmdbService.IMAGE_ROOT_URL,
+            "poster_sizes": images.get('poster_sizes') or TmdbService.DEFAULT_POSTER_SIZES,
+        }
+        TmdbService.CONFIG_CACHE.set("images", config, settings.TMDB_CONFIG_TTL)
+        TmdbService._IMAGE_CONFIG = config
+        return config
+
     @staticmethod
-    def get_poster_url(poster_path: str) -> Optional[str]:
+    def _image_config() -> Dict:
+        if TmdbService._IMAGE_CONFIG is None:
+            cached = TmdbService.CONFIG_CACHE.get("images")
+            TmdbService._IMAGE_CONFIG = cached if cached is not MISSING else {
+                "base_url": TmdbService.IMAGE_ROOT_URL,
+                "poster_sizes": TmdbService.DEFAULT_POSTER_SIZES,
+            }
+        return TmdbService._IMAGE_CONFIG
+
+    @staticmethod
+    def pick_poster_size(min_height: int) -> str:
+        """Smallest TMDB poster size bucket whose height is at least `min_height`."""
+        best = None
+        for size in TmdbService._image_config()['poster_sizes']:
+            if not size[1:].isdigit():
+                continue
+            value = int(size[1:])
+            # 'wN' buckets are widths, 'hN' buckets are heights
+            height = value / TmdbService.POSTER_ASPECT if size[0] == 'w' else value
+            if height >= min_height and (best is None or height < best[0]):
+                best = (height, size)
+        return best[1] if best else "original"
+
+    @staticmethod
+    def get_poster_url(poster_path: str, min_height: Optional[int] = None) -> Optional[str]:
+        """
+        Builds the poster URL using the smallest size that still covers `min_height`
+        (defaults to the poster foreground height), instead of /original.
+        """
         if not poster_path:
             return None
-        return f"{TmdbService.IMAGE_BASE_URL}{poster_path}"
+        size = TmdbService.pick_poster_size(min_height or settings.POSTER_SOURCE_HEIGHT)
+        return f"{TmdbService._image_config()['base_url']}{size}{poster_path}"
+
+    @staticmethod
+    def right_size_url(image_url: str, min_height: Optional[int] = None) -> str:
+        """Rewrites a TMDB /original image URL to the right-sized bucket (other URLs unchanged)."""
+        for base in {TmdbService.IMAGE_ROOT_URL, TmdbService._image_config()['base_url']}:
+            prefix = f"{base}original/"
+            if image_url.startswith(prefix):
+                return TmdbService.get_poster_url("/" + image_url[len(prefix):], min_height)
+        return image_url
 
     @staticmethod
     def get_genres(genre_ids: list) -> str:
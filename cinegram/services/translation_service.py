@@ -1,22 +1,99 @@
-import requests
+import hashlib
 import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
 from cinegram.config import settings
+from cinegram.services.ollama_client import OllamaClient
+from cinegram.utils.singleflight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
+class TranslationMemo:
+    """
+    Permanent store of finished translations keyed by TMDB id + model + source hash.
+    Lives in SQLite and is loaded fully into memory at startup (it is small: one
+    synopsis per English-only film).
+    """
+    PATH = os.path.join(settings.CACHE_DIR, "translations.sqlite3")
+    _ENTRIES = None
+    _CONN = None
+    _LOCK = threading.Lock()
+
+    @staticmethod
+    def source_hash(text: str) -> str:
+        return hashlib.sha256(text.strip().encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _connect() -> sqlite3.Connection:
+        if TranslationMemo._CONN is None:
+            os.makedirs(os.path.dirname(TranslationMemo.PATH), exist_ok=True)
+            conn = sqlite3.connect(TranslationMemo.PATH, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS translations ("
+                "movie_id INTEGER NOT NULL, model TEXT NOT NULL, source_hash TEXT NOT NULL, "
+                "translation TEXT NOT NULL, created_at REAL NOT NULL, "
+                "PRIMARY KEY (movie_id, model, source_hash))"
+            )
+            TranslationMemo._CONN = conn
+        return TranslationMemo._CONN
+
+    @staticmethod
+    def warm() -> int:
+        """Loads every stored translation into memory. Returns the entry count."""
+        with TranslationMemo._LOCK:
+            rows = TranslationMemo._connect().execute(
+                "SELECT movie_id, model, source_hash, translation FROM translations"
+            ).fetchall()
+            TranslationMemo._ENTRIES = {(r[0], r[1], r[2]): r[3] for r in rows}
+        logger.info(f"Translation memo warmed ({len(rows)} entries).")
+        return len(rows)
+
+    @staticmethod
+    def get(movie_id: int, model: str, text: str) -> Optional[str]:
+        if TranslationMemo._ENTRIES is None:
+            TranslationMemo.warm()
+        return TranslationMemo._ENTRIES.get((movie_id, model, TranslationMemo.source_hash(text)))
+
+    @staticmethod
+    def put(movie_id: int, model: str, text: str, translation: str):
+        key = (movie_id, model, TranslationMemo.source_hash(text))
+        if TranslationMemo._ENTRIES is None:
+            TranslationMemo.warm()
+        try:
+            with TranslationMemo._LOCK:
+                conn = TranslationMemo._connect()
+                conn.execute(
+                    "INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?, ?)",
+                    (*key, translation, time.time())
+                )
+                conn.commit()
+                TranslationMemo._ENTRIES[key] = translation
+        except sqlite3.Error as e:
+            logger.error(f"Translation memo write failed: {e}")
+
+    @staticmethod
+    def count() -> int:
+        if TranslationMemo._ENTRIES is None:
+            TranslationMemo.warm()
+        return len(TranslationMemo._ENTRIES)
+
 class TranslationService:
-    OLLAMA_URL = "http://localhost:11434/api/generate"
     # Configurable model
     MODEL = settings.OLLAMA_MODEL
+    # The same overview requested concurrently is translated once
+    FLIGHT = SingleFlight("translation")
 
     @staticmethod
-    def translate_to_spanish(text: str) -> str:
-        """
-        Translates text to Spanish using local Ollama model.
-        """
-        if not text:
-            return ""
+    async def _translate(text: str) -> Optional[str]:
+        """Runs the LLM translation. Returns None on failure."""
+        return await TranslationService.FLIGHT.do(TranslationMemo.source_hash(text), TranslationService._run_translation, text)
 
+    @staticmethod
+    async def _run_translation(text: str) -> Optional[str]:
         # Prompt refined for Latin American Spanish and conciseness
         prompt = (
             "Translate the following movie synopsis to Spanish (Latin American). "
@@ -26,27 +103,46 @@ class TranslationService:
             f"Text: {text}"
         )
 
-        payload = {
-            "model": TranslationService.MODEL,
-            "prompt": prompt,
-            "stream": False,
-            "options": {
-                "temperature": 0.3 # Low temp for accurate translation
-            }
-        }
-
         try:
             logger.info(f"Translating via Ollama ({TranslationService.MODEL})...")
-            response = requests.post(TranslationService.OLLAMA_URL, json=payload, timeout=30)
-            response.raise_for_status()
-            result = response.json()
-            translation = result.get('response', '').strip()
-            
-            if translation:
-                return translation
-            else:
-                return text # Fallback to original
-                
+            translation = await OllamaClient.generate(
+                prompt,
+                model=TranslationService.MODEL,
+                options={"temperature": 0.3}, # Low temp for accurate translation
+                timeout=30
+            )
+            return translation or None
+
         except Exception as e:
             logger.error(f"Ollama translation failed: {e}")
-            return text # Fallback to original
+            return None
+
+    @staticmethod
+    async def translate_to_spanish(text: str) -> str:
+        """
+        Translates text to Spanish using local Ollama model.
+        """
+        if not text:
+            return ""
+        return await TranslationService._translate(text) or text # Fallback to original
+
+    @staticmethod
+    async def translate_overview(movie_id: Optional[int], text: str) -> str:
+        """
+        Translates a TMDB overview, reusing the stored translation for this
+        movie + model + source text when there is one.
+        """
+        if not text:
+            return ""
+        if movie_id is None:
+            return await TranslationService.translate_to_spanish(text)
+
+        cached = TranslationMemo.get(movie_id, TranslationService.MODEL, text)
+        if cached:
+            return cached
+
+        translation = await TranslationService._translate(text)
+        if not translation:
+            return text # Fallback to original (not memoized, retry next time)
+        TranslationMemo.put(movie_id, TranslationService.MODEL, text, translation)
+        return translation
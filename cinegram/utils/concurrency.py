@@ -0,0 +1,22 @@
+import asyncio
+from cinegram.config import settings
+
+# Concurrency limits shared by every upload flow (single, batch, resumed).
+# Each slot is taken inside the service, around the call that does the work
+# (after caches and single-flight), so a job holds it only while that work runs.
+# Ollama generations and poster renders have their own limits in
+# OllamaClient (OLLAMA_CONCURRENCY) and ImageGenerator (RENDER_WORKERS + RENDER_QUEUE_SIZE).
+_STAGES = None
+
+def get_stage_limits() -> dict:
+    global _STAGES
+    if _STAGES is None:
+        _STAGES = {
+            "lookup": asyncio.Semaphore(settings.LOOKUP_CONCURRENCY), # TMDB requests
+            "send": asyncio.Semaphore(settings.SEND_CONCURRENCY), # Telegram uploads
+        }
+    return _STAGES
+
+def stage(name: str) -> asyncio.Semaphore:
+    """Slot for one stage: `async with stage("render"): ...`"""
+    return get_stage_limits()[name]
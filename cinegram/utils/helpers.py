@@ -1,4 +1,5 @@
 import re
+import unicodedata
 
 def is_valid_archive_url(url: str) -> bool:
     """Checks if the URL is a valid Internet Archive identifier."""
@@ -12,6 +13,13 @@ def extract_identifier(url: str) -> str:
         return match.group(1)
     return None
 
+def normalize_title(text: str) -> str:
+    """Lower-cases, strips accents/punctuation and collapses whitespace (for cache keys and matching)."""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    text = re.sub(r"[^\w\s]", " ", text.lower())
+    return " ".join(text.split())
+
 # Auto-Deletion Utils
 import asyncio
 import logging
@@ -0,0 +1,105 @@
+import asyncio
+import contextlib
+import logging
+from typing import AsyncIterator, Optional
+import httpx
+from cinegram.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Process-wide connection pool (shared by every async service)
+_CLIENT = None
+
+# Status codes worth retrying (rate limits and transient server errors)
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+def get_client() -> httpx.AsyncClient:
+    """Returns the shared keep-alive HTTP client, creating it on first use."""
+    global _CLIENT
+    if _CLIENT is None or _CLIENT.is_closed:
+        _CLIENT = httpx.AsyncClient(
+            timeout=settings.HTTP_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=settings.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE,
+            ),
+            follow_redirects=True,
+        )
+    return _CLIENT
+
+async def close_client():
+    """Closes the shared client (called on bot shutdown)."""
+    global _CLIENT
+    if _CLIENT is not None and not _CLIENT.is_closed:
+        await _CLIENT.aclose()
+    _CLIENT = None
+
+async def request_with_retry(method: str, url: str, retries: Optional[int] = None,
+                             backoff: Optional[float] = None, **kwargs) -> httpx.Response:
+    """
+    Sends a request through the shared pool, retrying transport errors,
+    429s and 5xx responses with exponential backoff.
+    Raises httpx.HTTPError once all attempts are exhausted.
+    """
+    retries = settings.HTTP_RETRIES if retries is None else retries
+    backoff = settings.HTTP_BACKOFF if backoff is None else backoff
+    client = get_client()
+
+    for attempt in range(retries + 1):
+        try:
+            response = await client.request(method, url, **kwargs)
+            if response.status_code not in RETRY_STATUSES or attempt == retries:
+                response.raise_for_status()
+                return response
+
+            # Honour Retry-After when the server sends one
+            delay = backoff * (2 ** attempt)
+            retry_after = response.headers.get("Retry-After")
+            if retry_after and retry_after.isdigit():
+                delay = max(delay, int(retry_after))
+            logger.warning(f"{method} {url} -> {response.status_code}, retrying in {delay:.1f}s ({attempt + 1}/{retries})")
+        except httpx.TransportError as e:
+            if attempt == retries:
+                raise
+            delay = backoff * (2 ** attempt)
+            logger.warning(f"{method} {url} failed ({e!r}), retrying in {delay:.1f}s ({attempt + 1}/{retries})")
+
+        await asyncio.sleep(delay)
+
+@contextlib.asynccontextmanager
+async def stream_with_retry(method: str, url: str, retries: Optional[int] = None,
+                            backoff: Optional[float] = None, **kwargs) -> AsyncIterator[httpx.Response]:
+    """
+    Like request_with_retry, but yields the response with its body still unread
+    (`async with stream_with_retry(...) as response: async for chunk in response.aiter_bytes()`).
+    Retries happen before the body is read; the connection is released on exit.
+    """
+    retries = settings.HTTP_RETRIES if retries is None else retries
+    backoff = settings.HTTP_BACKOFF if backoff is None else backoff
+    client = get_client()
+
+    for attempt in range(retries + 1):
+        try:
+            response = await client.send(client.build_request(method, url, **kwargs), stream=True)
+            if response.status_code not in RETRY_STATUSES or attempt == retries:
+                break
+
+            delay = backoff * (2 ** attempt)
+            retry_after = response.headers.get("Retry-After")
+            if retry_after and retry_after.isdigit():
+                delay = max(delay, int(retry_after))
+            await response.aclose()
+            logger.warning(f"{method} {url} -> {response.status_code}, retrying in {delay:.1f}s ({attempt + 1}/{retries})")
+        except httpx.TransportError as e:
+            if attempt == retries:
+                raise
+            delay = backoff * (2 ** attempt)
+            logger.warning(f"{method} {url} failed ({e!r}), retrying in {delay:.1f}s ({attempt + 1}/{retries})")
+
+        await asyncio.sleep(delay)
+
+    try:
+        response.raise_for_status()
+        yield response
+    finally:
+        await response.aclose()
@@ -0,0 +1,66 @@
+import codecs
+import json
+from typing import Any, AsyncIterable, AsyncIterator, List
+
+# Skipped between elements
+_SEPARATORS = " \t\r\n,"
+
+class JsonArrayStream:
+    """
+    Incremental parser for the elements of a JSON array that arrives in chunks
+    (e.g. the `{"result": [...]}` answer of the IA files listing).
+    Only the current partial element is buffered, so memory stays flat however
+    long the array is. The array is the first `[` of the document, and the
+    elements are expected to be objects or arrays (as in every API we read).
+    """
+
+    def __init__(self):
+        self._decoder = json.JSONDecoder()
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._started = False
+        self.done = False
+
+    def feed(self, chunk: bytes) -> List[Any]:
+        """Adds a chunk and returns the elements it completed."""
+        if self.done:
+            return []
+        self._buffer += self._text.decode(chunk)
+        items = []
+        pos = 0
+        buffer = self._buffer
+        if not self._started:
+            start = buffer.find("[")
+            if start < 0:
+                self._buffer = ""
+                return items
+            self._started = True
+            pos = start + 1
+
+        while True:
+            while pos < len(buffer) and buffer[pos] in _SEPARATORS:
+                pos += 1
+            if pos >= len(buffer):
+                break
+            if buffer[pos] == "]":
+                self.done = True
+                pos = len(buffer)
+                break
+            try:
+                item, end = self._decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                break # Element not complete yet: wait for more data
+            items.append(item)
+            pos = end
+
+        self._buffer = buffer[pos:]
+        return items
+
+async def iter_json_array(chunks: AsyncIterable[bytes]) -> AsyncIterator[Any]:
+    """Yields the elements of a streamed JSON array as soon as each one is complete."""
+    parser = JsonArrayStream()
+    async for chunk in chunks:
+        for item in parser.feed(chunk):
+            yield item
+        if parser.done:
+            return
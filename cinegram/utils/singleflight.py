@@ -0,0 +1,67 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+logger = logging.getLogger(__name__)
+
+class _Call:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+class SingleFlight:
+    """
+    Deduplicates identical work that is in flight at the same time.
+    The first caller for a key starts the work; callers arriving before it finishes
+    await the same task and get the same result (or exception). The work is
+    cancelled only when every caller waiting on it has been cancelled.
+    Nothing is kept once the work is done: caching stays the caller's business.
+    """
+    # Every group, for /stats
+    GROUPS: Dict[str, "SingleFlight"] = {}
+
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.coalesced = 0
+        self._calls: Dict[Hashable, _Call] = {}
+        SingleFlight.GROUPS[name] = self
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    def _forget(self, key: Hashable, call: _Call):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    async def do(self, key: Hashable, fn: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """Runs `fn(*args, **kwargs)` once for all concurrent callers with the same key."""
+        self.calls += 1
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(fn(*args, **kwargs)))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+        else:
+            self.coalesced += 1
+            logger.debug(f"Single-flight '{self.name}': joined in-flight call for {key!r}")
+
+        call.waiters += 1
+        try:
+            # shield: one caller giving up must not cancel the others
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                # Everyone gave up: stop the work, and let the next caller start fresh
+                self._forget(key, call)
+                call.task.cancel()
+
+    @staticmethod
+    def stats() -> Dict[str, Dict[str, int]]:
+        return {
+            name: {"calls": group.calls, "coalesced": group.coalesced}
+            for name, group in SingleFlight.GROUPS.items()
+        }
@@ -0,0 +1,107 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Optional
+from cinegram.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Sentinel for "not cached" (None is a legitimate cached value)
+MISSING = object()
+
+class SqliteCache:
+    """
+    Small persistent key/value cache with per-entry TTL.
+    Values are stored as JSON, so `None` is a valid (negative) cached answer.
+    """
+
+    def __init__(self, name: str, path: Optional[str] = None):
+        self.name = name
+        self.path = path or os.path.join(settings.CACHE_DIR, f"{name}.sqlite3")
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            # WAL + NORMAL: commits don't fsync (a crash can only lose recent cache writes)
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+        return self._conn
+
+    def get(self, key: str, default: Any = MISSING) -> Any:
+        """Returns the cached value, or `default` if absent/expired."""
+        try:
+            with self._lock:
+                row = self._connect().execute(
+                    "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.error(f"Cache '{self.name}' read failed: {e}")
+            row = None
+
+        if row is None or row[1] < time.time():
+            self.misses += 1
+            return default
+        self.hits += 1
+        return json.loads(row[0])
+
+    def get_stale(self, key: str, default: Any = MISSING) -> Any:
+        """Returns the cached value even if expired (for revalidation), or `default` if absent."""
+        try:
+            with self._lock:
+                row = self._connect().execute("SELECT value FROM cache WHERE key = ?", (key,)).fetchone()
+        except sqlite3.Error as e:
+            logger.error(f"Cache '{self.name}' read failed: {e}")
+            row = None
+        return json.loads(row[0]) if row else default
+
+    def set(self, key: str, value: Any, ttl: float):
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(value), time.time() + ttl),
+                )
+                conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Cache '{self.name}' write failed: {e}")
+
+    def purge(self, expired_only: bool = False) -> int:
+        """Deletes entries (all, or only expired ones). Returns the number removed."""
+        with self._lock:
+            conn = self._connect()
+            if expired_only:
+                cursor = conn.execute("DELETE FROM cache WHERE expires_at < ?", (time.time(),))
+            else:
+                cursor = conn.execute("DELETE FROM cache")
+            conn.commit()
+        return cursor.rowcount
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._connect().execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0,
+        }
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,59 @@
+"""
+Times MatchScorer on the labelled result pages of tests/data/match_cases.json,
+padded to 20 candidates (a full TMDB page), with a cold feature cache, against the
+SequenceMatcher top-5 loop it replaced, on the same pages.
+
+    PYTHONPATH=. python scripts/bench_match_scorer.py
+"""
+import json
+import os
+import time
+from difflib import SequenceMatcher
+from cinegram.config import settings
+from cinegram.services.match_scorer import MatchScorer
+
+CASES_FILE = os.path.join(os.path.dirname(__file__), os.pardir, "tests", "data", "match_cases.json")
+ROUNDS = 200
+
+def sequence_matcher_best(title, year, results):
+    """The previous validation loop: best SequenceMatcher ratio over the top 5, -0.3 on a year mismatch."""
+    best_match, best_score = None, 0.0
+    for movie in results[:5]:
+        score_local = SequenceMatcher(None, title.lower(), movie.get('title', '').lower()).ratio()
+        score_orig = SequenceMatcher(None, title.lower(), movie.get('original_title', '').lower()).ratio()
+        max_score = max(score_local, score_orig)
+        if year:
+            re_date = movie.get('release_date', '')[:4]
+            if re_date and re_date != str(year):
+                max_score -= 0.3
+        if max_score > best_score:
+            best_score, best_match = max_score, movie
+    return best_match if best_match and best_score >= 0.6 else None
+
+def timed(best, pages):
+    elapsed = 0.0
+    for _ in range(ROUNDS):
+        MatchScorer.features.cache_clear()
+        start = time.perf_counter()
+        for query, year, candidates in pages:
+            best(query, year, candidates)
+        elapsed += time.perf_counter() - start
+    return elapsed / (ROUNDS * len(pages)) * 1e6
+
+def main():
+    with open(CASES_FILE, encoding="utf-8") as f:
+        cases = json.load(f)
+    pool = [c for case in cases for c in case["candidates"]]
+    pages = [(case["query"], case["year"], (case["candidates"] + pool)[:20]) for case in cases]
+
+    scorer = lambda query, year, candidates: MatchScorer.best(query, year, candidates, settings.TMDB_MATCH_THRESHOLD)[0]
+    for name, best in (("MatchScorer", scorer), ("SequenceMatcher top 5", sequence_matcher_best)):
+        correct = 0
+        for case in cases:
+            match = best(case["query"], case["year"], case["candidates"])
+            correct += (match["id"] if match else None) == case["expected"]
+        print(f"{name}: {correct}/{len(cases)} labelled cases correct, "
+              f"{timed(best, pages):.0f} µs per query (20 candidates, cold cache)")
+
+if __name__ == "__main__":
+    main()
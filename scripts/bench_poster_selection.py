@@ -0,0 +1,108 @@
+"""
+Benchmarks cover selection on a synthetic 50k-file Internet Archive item.
+
+- selection: the former three-pass loops vs MetadataParser.select_poster on an
+  in-memory listing (and checks both pick the same file)
+- listing: json.loads of the whole /files body + three passes vs streaming it
+  in 64 kB chunks through iter_json_array + select_poster, with peak memory
+
+    PYTHONPATH=. python scripts/bench_poster_selection.py [--files 50000]
+"""
+import argparse
+import asyncio
+import json
+import time
+import tracemalloc
+from cinegram.services.metadata_parser import MetadataParser
+from cinegram.utils.json_stream import iter_json_array
+
+CHUNK = 64 * 1024
+
+def make_listing(count: int, cover_at):
+    """Mostly derivative files, a few non-cover images, and one rule-0 cover at `cover_at` (or none)."""
+    files = []
+    for i in range(count):
+        if i == cover_at:
+            files.append({"name": "cover.jpg", "format": "JPEG", "size": "120000"})
+        elif i % 997 == 0:
+            files.append({"name": f"movie.mp4_spectrogram_{i}.png", "format": "PNG Spectrogram", "size": "5000"})
+        else:
+            files.append({"name": f"segment_{i:06d}.ts", "format": "MPEG-TS", "size": "1048576",
+                          "md5": "0" * 32, "mtime": "1700000000"})
+    return files
+
+def three_passes(files):
+    """The selection MetadataParser.parse used before select_poster."""
+    for f in files:
+        if f.get('format') in ['JPEG', 'PNG', 'Thumbnail'] and 'thumb' not in f.get('name', '').lower():
+            return f['name']
+    for f in files:
+        if f.get('format') == 'Item Image':
+            return f['name']
+    for f in files:
+        name = f.get('name', '').lower()
+        if (name.endswith('.jpg') or name.endswith('.png')) and 'spectrogram' not in name:
+            return f['name']
+    return None
+
+async def _chunks(body: bytes):
+    for i in range(0, len(body), CHUNK):
+        yield body[i:i + CHUNK]
+
+async def _stream_select(body: bytes):
+    # select_poster takes a plain iterable: collect candidates as ArchiveService._read_images does
+    candidates = []
+    async for f in iter_json_array(_chunks(body)):
+        rank = MetadataParser.poster_rank(f)
+        if rank is None:
+            continue
+        candidates.append(f)
+        if rank == 0:
+            break
+    return MetadataParser.select_poster(candidates)
+
+def _timed(fn, rounds: int):
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+def _peak(fn):
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=50_000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    positions = {"none": None, "last": args.files - 1, "middle": args.files // 2, "first": 0}
+    print(f"{args.files} files, best of {args.rounds}")
+    for label, cover_at in positions.items():
+        files = make_listing(args.files, cover_at)
+        body = json.dumps({"result": files}).encode("utf-8")
+
+        old, old_time = _timed(lambda: three_passes(files), args.rounds)
+        new, new_time = _timed(lambda: MetadataParser.select_poster(files), args.rounds)
+        assert old == new, (old, new)
+
+        load_old = lambda: three_passes(json.loads(body)["result"])
+        load_new = lambda: asyncio.run(_stream_select(body))
+        streamed, stream_old = _timed(load_old, args.rounds)
+        assert asyncio.run(_stream_select(body)) == streamed
+        _, stream_new = _timed(load_new, args.rounds)
+
+        print(
+            f"cover {label:6} | selection {old_time * 1e3:6.1f} -> {new_time * 1e3:6.1f} ms"
+            f" | listing ({len(body) / 1e6:.0f} MB) {stream_old * 1e3:6.1f} ms, {_peak(load_old) / 1e6:5.1f} MB"
+            f" -> {stream_new * 1e3:6.1f} ms, {_peak(load_new) / 1e6:5.1f} MB"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Compares rendering from TMDB's /original poster with the right-sized bucket
+TmdbService.get_poster_url picks (w780 for the default 1920x1080 frame):
+file size, download time (with --poster-path), decode + render time and the
+pixel difference of the final posters.
+
+    PYTHONPATH=. python scripts/bench_poster_size.py
+    PYTHONPATH=. python scripts/bench_poster_size.py --poster-path /qJ2tW6WMUDux911r6m7haRef0WH.jpg
+"""
+import argparse
+import random
+import time
+from io import BytesIO
+import requests
+from PIL import Image, ImageChops, ImageDraw, ImageStat
+from cinegram.config import settings
+from cinegram.services.image_generator import get_renderer
+from cinegram.services.tmdb_service import TmdbService
+
+def synthetic_original(seed: int = 5) -> bytes:
+    """2000x3000 JPEG with gradients and sharp shapes, like a high-res poster upload."""
+    rng = random.Random(seed)
+    img = Image.linear_gradient("L").resize((2000, 3000)).convert("RGB")
+    draw = ImageDraw.Draw(img)
+    for _ in range(200):
+        x, y = rng.randrange(2000), rng.randrange(3000)
+        draw.ellipse((x, y, x + rng.randrange(20, 400), y + rng.randrange(20, 400)),
+                     fill=(rng.randrange(256), rng.randrange(256), rng.randrange(256)))
+    buffer = BytesIO()
+    img.save(buffer, "JPEG", quality=90)
+    return buffer.getvalue()
+
+def resized(data: bytes, width: int) -> bytes:
+    img = Image.open(BytesIO(data))
+    img = img.resize((width, round(img.height * width / img.width)), Image.Resampling.LANCZOS)
+    buffer = BytesIO()
+    img.save(buffer, "JPEG", quality=90)
+    return buffer.getvalue()
+
+def download(url: str):
+    started = time.perf_counter()
+    response = requests.get(url, timeout=30)
+    response.raise_for_status()
+    return response.content, time.perf_counter() - started
+
+def render(data: bytes, rounds: int):
+    best, poster = float("inf"), None
+    for _ in range(rounds):
+        started = time.perf_counter()
+        img = Image.open(BytesIO(data)).convert("RGBA")
+        poster = get_renderer().render(img, "Título de prueba", "Sinopsis " * 30).convert("RGB")
+        best = min(best, time.perf_counter() - started)
+    return poster, best
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--poster-path", help="Download a real TMDB poster (e.g. /abc.jpg) instead of a synthetic one")
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    size = TmdbService.pick_poster_size(settings.POSTER_SOURCE_HEIGHT)
+    if args.poster_path:
+        original, original_time = download(f"{TmdbService.IMAGE_ROOT_URL}original{args.poster_path}")
+        sized, sized_time = download(TmdbService.get_poster_url(args.poster_path))
+        print(f"Download: original {original_time * 1e3:.0f} ms, {size} {sized_time * 1e3:.0f} ms")
+    else:
+        original = synthetic_original()
+        sized = resized(original, int(size[1:])) if size[1:].isdigit() else original
+
+    original_poster, original_render = render(original, args.rounds)
+    sized_poster, sized_render = render(sized, args.rounds)
+    diff = ImageStat.Stat(ImageChops.difference(original_poster, sized_poster))
+
+    print(f"Bucket for a {settings.POSTER_SOURCE_HEIGHT}px foreground: {size}")
+    print(f"Size:   original {len(original) / 1e3:.0f} KB, {size} {len(sized) / 1e3:.0f} KB")
+    print(f"Render: original {original_render * 1e3:.0f} ms, {size} {sized_render * 1e3:.0f} ms (decode included)")
+    print(f"Mean per-channel difference of the posters: {sum(diff.mean) / 3:.2f}/255")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Times poster rendering on a synthetic 780x1170 source (the w780 bucket):
+
+- building the static layers (PosterRenderer) vs reusing the per-process one
+- full generate_poster (cache read, decode, compose, JPEG encode) per
+  POSTER_BACKGROUND_MODE, with the source served from a throwaway image cache
+
+    PYTHONPATH=. python scripts/bench_render.py [--rounds 5]
+"""
+import argparse
+import random
+import shutil
+import tempfile
+import time
+from io import BytesIO
+from PIL import Image, ImageDraw
+from cinegram.config import settings
+from cinegram.services.image_cache import ImageCache
+from cinegram.services.image_generator import ImageGenerator, PosterRenderer, get_renderer
+
+SOURCE_URL = "https://example.invalid/bench/poster-w780.jpg"
+
+def synthetic_source(seed: int = 3) -> bytes:
+    rng = random.Random(seed)
+    img = Image.linear_gradient("L").resize((780, 1170)).convert("RGB")
+    draw = ImageDraw.Draw(img)
+    for _ in range(80):
+        x, y = rng.randrange(780), rng.randrange(1170)
+        draw.rectangle((x, y, x + rng.randrange(20, 250), y + rng.randrange(20, 250)),
+                       fill=(rng.randrange(256), rng.randrange(256), rng.randrange(256)))
+    buffer = BytesIO()
+    img.save(buffer, "JPEG", quality=90)
+    return buffer.getvalue()
+
+def best_of(rounds: int, fn) -> float:
+    best = float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    ImageCache.CACHE_DIR = tempfile.mkdtemp(prefix="cinegram-bench-")
+    try:
+        ImageCache.put(SOURCE_URL, synthetic_source())
+        run(args.rounds)
+    finally:
+        shutil.rmtree(ImageCache.CACHE_DIR, ignore_errors=True)
+
+def run(rounds: int):
+    title, description = "Título de prueba", "Sinopsis de prueba. " * 20
+
+    build = best_of(rounds, PosterRenderer)
+    get_renderer()
+    reuse = best_of(rounds, get_renderer)
+    print(f"Static layers: build {build * 1e3:.1f} ms, reuse {reuse * 1e6:.1f} µs")
+
+    settings.POSTER_OUTPUT = "memory"
+    for mode, scale in (("exact", settings.POSTER_BACKGROUND_SCALE), ("fast", 4), ("fast", 8)):
+        settings.POSTER_BACKGROUND_MODE = mode
+        settings.POSTER_BACKGROUND_SCALE = scale
+        elapsed = best_of(rounds, lambda: ImageGenerator.generate_poster(SOURCE_URL, title, description))
+        label = mode if mode == "exact" else f"fast 1/{scale}"
+        print(f"generate_poster ({label}): {elapsed * 1e3:.0f} ms")
+
+if __name__ == "__main__":
+    main()
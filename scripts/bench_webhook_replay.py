@@ -0,0 +1,159 @@
+"""
+Replays updates through a real PTB application against a local stub Bot API
+and reports update-to-first-reply latency:
+
+- webhook:  updates are POSTed to the embedded webhook server (bot.run)
+- polling:  updates are handed out by the stub's getUpdates
+- fallback: the webhook port is already taken, so bot.run must fall back to polling
+
+Also checks that a webhook request with a wrong secret token is rejected.
+
+    PYTHONPATH=. python scripts/bench_webhook_replay.py webhook|polling|fallback [--updates 30]
+"""
+import argparse
+import json
+import os
+import signal
+import socket
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+SECRET = "replay-secret"
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def make_update(i: int) -> dict:
+    return {"update_id": i, "message": {
+        "message_id": i, "date": 0, "text": f"ping {i}",
+        "chat": {"id": 5, "type": "private"}, "from": {"id": 5, "is_bot": False, "first_name": "u"},
+    }}
+
+class StubBotApi(BaseHTTPRequestHandler):
+    pending = []
+    replied = {}
+    lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def _params(self) -> dict:
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)) or 0)
+        if "json" in (self.headers.get("Content-Type") or ""):
+            return json.loads(body or b"{}")
+        return {k: v[0] for k, v in parse_qs(body.decode("utf-8")).items()}
+
+    def do_POST(self):
+        method = self.path.rsplit("/", 1)[-1]
+        params = self._params()
+        if method == "getMe":
+            result = {"id": 1, "is_bot": True, "first_name": "bot", "username": "bot"}
+        elif method == "getUpdates":
+            time.sleep(0.05) # Long-poll round trip
+            with StubBotApi.lock:
+                result, StubBotApi.pending[:] = list(StubBotApi.pending), []
+        elif method == "sendMessage":
+            i = int(str(params.get("text", "")).split()[-1])
+            StubBotApi.replied.setdefault(i, time.monotonic())
+            result = {"message_id": 1000 + i, "date": 0, "text": params.get("text"), "chat": {"id": 5, "type": "private"}}
+        else:
+            result = True # setWebhook, deleteWebhook, ...
+        body = json.dumps({"ok": True, "result": result}).encode("utf-8")
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass # The bot dropped a pending getUpdates while shutting down
+
+def post_update(port: int, update: dict, secret: str) -> int:
+    request = urllib.request.Request(
+        f"http://127.0.0.1:{port}/telegram", data=json.dumps(update).encode("utf-8"),
+        headers={"Content-Type": "application/json", "X-Telegram-Bot-Api-Secret-Token": secret},
+    )
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("mode", choices=["webhook", "polling", "fallback"])
+    parser.add_argument("--updates", type=int, default=30)
+    parser.add_argument("--interval", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    api = ThreadingHTTPServer(("127.0.0.1", 0), StubBotApi)
+    api.daemon_threads = True
+    threading.Thread(target=api.serve_forever, daemon=True).start()
+
+    webhook_port = free_port()
+    blocker = None
+    if args.mode != "polling":
+        # settings are read at import time
+        os.environ.update(WEBHOOK_URL=f"http://127.0.0.1:{webhook_port}", WEBHOOK_PORT=str(webhook_port),
+                          WEBHOOK_LISTEN="127.0.0.1", WEBHOOK_PATH="telegram", WEBHOOK_SECRET=SECRET)
+    if args.mode == "fallback":
+        blocker = socket.socket()
+        blocker.bind(("127.0.0.1", webhook_port))
+        blocker.listen()
+    os.environ.setdefault("BOT_TOKEN", "1:replay")
+
+    from telegram.ext import ApplicationBuilder, MessageHandler, filters
+    from cinegram import bot
+    from cinegram.config import settings
+
+    async def echo(update, context):
+        await update.message.reply_text(f"pong {update.message.message_id}")
+
+    application = (
+        ApplicationBuilder().token("1:replay").base_url(f"http://127.0.0.1:{api.server_address[1]}/bot")
+        .concurrent_updates(settings.CONCURRENT_UPDATES).build()
+    )
+    application.add_handler(MessageHandler(filters.TEXT, echo))
+
+    sent = {}
+    report = {}
+
+    def driver():
+        time.sleep(2) # Let the application start
+        use_webhook = args.mode == "webhook"
+        for i in range(1, args.updates + 1):
+            sent[i] = time.monotonic()
+            if use_webhook:
+                post_update(webhook_port, make_update(i), SECRET)
+            else:
+                with StubBotApi.lock:
+                    StubBotApi.pending.append(make_update(i))
+            time.sleep(args.interval)
+        time.sleep(1)
+        if use_webhook:
+            report["wrong secret"] = post_update(webhook_port, make_update(10 ** 6), "wrong")
+        os.kill(os.getpid(), signal.SIGINT)
+
+    threading.Thread(target=driver, daemon=True).start()
+    bot.run(application)
+    if blocker:
+        blocker.close()
+    api.shutdown()
+
+    latencies = sorted((StubBotApi.replied[i] - sent[i]) * 1e3 for i in sent if i in StubBotApi.replied)
+    print(f"{args.mode}: {len(latencies)}/{len(sent)} answered")
+    if latencies:
+        p95 = latencies[max(0, int(len(latencies) * 0.95) - 1)]
+        print(f"update -> first reply: median {statistics.median(latencies):.1f} ms, p95 {p95:.1f} ms")
+    for check, status in report.items():
+        print(f"{check}: HTTP {status}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+import os
+import sys
+import tempfile
+
+# Caches and learned files go to a throwaway directory, never into the repo
+os.environ.setdefault("CACHE_DIR", tempfile.mkdtemp(prefix="cinegram-tests-"))
+os.environ.setdefault("BOT_TOKEN", "test")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+@pytest.fixture(autouse=True)
+def _fresh_stage_limits():
+    # Semaphores bind to the event loop that first waits on them; every test runs its own loop
+    from cinegram.utils import concurrency
+    concurrency._STAGES = None
+    yield
+    concurrency._STAGES = None
@@ -0,0 +1,29 @@
+import types
+import pytest
+from cinegram.config import settings
+from cinegram.handlers import batch_handler
+
+def _message(chat_id=1, forward=True, album=None):
+    return types.SimpleNamespace(chat_id=chat_id, forward_origin=object() if forward else None, media_group_id=album)
+
+@pytest.fixture(autouse=True)
+def fresh_window(monkeypatch):
+    monkeypatch.setattr(batch_handler, "_LAST_FORWARD", {})
+    monkeypatch.setattr(batch_handler, "_PENDING", {})
+    monkeypatch.setattr(settings, "BATCH_WINDOW", 60)
+
+def test_lone_forward_is_handled_at_once():
+    assert batch_handler.should_batch(_message()) is False
+
+def test_forward_burst_batches_after_the_first():
+    assert [batch_handler.should_batch(_message()) for _ in range(3)] == [False, True, True]
+    # Other chats have their own window
+    assert batch_handler.should_batch(_message(chat_id=2)) is False
+
+def test_forward_after_the_window_starts_over(monkeypatch):
+    monkeypatch.setattr(settings, "BATCH_WINDOW", -1)
+    assert [batch_handler.should_batch(_message()) for _ in range(2)] == [False, False]
+
+def test_albums_and_plain_uploads():
+    assert batch_handler.should_batch(_message(forward=False, album="a1")) is True
+    assert batch_handler.should_batch(_message(forward=False)) is False
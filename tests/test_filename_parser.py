@@ -0,0 +1,40 @@
+import pytest
+from cinegram.services.filename_parser import FilenameParser
+
+# Real-world shaped names: (filename, title, year, resolved by the compiled fast path)
+CORPUS = [
+    ("Night.of.the.Living.Dead.1968.720p.mkv", "Night of the Living Dead", "1968", True),
+    ("The.Matrix.1999.1080p.BluRay.x264.mkv", "The Matrix", "1999", True),
+    ("Interstellar (2014) [1080p] [Latino].mp4", "Interstellar", "2014", True),
+    ("@cesser16 Coco.2017.1080p.WEB-DL.Dual.Latino.mp4", "Coco", "2017", True),
+    ("El_Rey_Leon_1994_720p_Latino.mp4", "El Rey Leon", "1994", True),
+    ("Spider-Man.No.Way.Home.2021.2160p.HDR10.HEVC.mkv", "Spider-Man No Way Home", "2021", True),
+    ("2001.A.Space.Odyssey.1968.BDRip.x264.mkv", "2001 A Space Odyssey", "1968", True),
+    ("Amelie.2001.FRENCH.720p.BluRay.mkv", "Amelie", "2001", True),
+    ("Dune - Parte Dos 2024 WEB-DL 1080p Castellano.mkv", "Dune - Parte Dos", "2024", True),
+    ("https://t.me/canal Avatar.2009.Extended.1080p.mkv", "Avatar", "2009", True),
+    ("Parasite.2019.KOREAN.1080p.BluRay.x264-YTS.mp4", "Parasite", "2019", True),
+    ("Rocky.II.1979.720p.BRRip.mkv", "Rocky II", "1979", True),
+    ("Her.2013.1080p.WEBRip.AAC.5.1.mp4", "Her", "2013", True),
+    ("Fast.and.Furious.2009.1080p.mkv", "Fast and Furious", "2009", True),
+    # Anything the fast path is not sure about goes to guessit
+    ("Blade.Runner.2049.2017.1080p.mkv", "Blade Runner 2049", "2017", False),
+    ("Toy Story 3 (2010) 1080p Latino.mp4", "Toy Story 3", "2010", False),
+    ("Oppenheimer.2023.IMAX.1080p.WEB.mkv", "Oppenheimer", "2023", False),
+    ("Pelicula de Prueba Sin Año.mp4", "Pelicula de Prueba Sin Año", None, False),
+    ("Inception.mkv", "Inception", None, False),
+]
+
+@pytest.mark.parametrize("filename, title, year, fast", CORPUS, ids=[c[0] for c in CORPUS])
+def test_corpus(filename, title, year, fast):
+    assert FilenameParser.parse_filename(filename) == {"title": title, "year": year}
+    assert (FilenameParser._fast_path(FilenameParser._pre_clean(filename)) is not None) == fast
+
+def test_results_are_cached():
+    FilenameParser._parse_cached.cache_clear()
+    FilenameParser.parse_filename("Gladiator.2000.Remastered.1080p.BluRay.mp4")
+    FilenameParser.parse_filename("  Gladiator.2000.Remastered.1080p.BluRay.mp4 ")
+    assert FilenameParser._parse_cached.cache_info().hits == 1
+
+def test_empty_name():
+    assert FilenameParser.parse_filename("") is None
@@ -0,0 +1,117 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import pytest
+from cinegram.config import settings
+from cinegram.services.title_index import TitleIndex
+from cinegram.services.tmdb_service import TmdbService
+from cinegram.utils import http_client
+
+DELAY = 0.3 # Server think time per request
+
+class StubTmdb(BaseHTTPRequestHandler):
+    """/3/search/movie answering with the queried title after DELAY; '/flaky' fails once with a 503."""
+    requests = []
+    in_flight = 0
+    max_in_flight = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        with StubTmdb.lock:
+            StubTmdb.in_flight += 1
+            StubTmdb.max_in_flight = max(StubTmdb.max_in_flight, StubTmdb.in_flight)
+        try:
+            self._answer()
+        finally:
+            with StubTmdb.lock:
+                StubTmdb.in_flight -= 1
+
+    def _answer(self):
+        url = urlparse(self.path)
+        StubTmdb.requests.append(url.path)
+        if url.path == "/flaky" and StubTmdb.requests.count("/flaky") == 1:
+            self.send_response(503)
+            self.send_header("Retry-After", "0")
+            self.end_headers()
+            return
+        time.sleep(DELAY)
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        results = [{
+            "id": abs(hash(params.get("query", ""))) % 10 ** 6, "title": params.get("query", ""),
+            "original_title": params.get("query", ""), "release_date": f"{params.get('year', '2000')}-01-01",
+            "overview": "Sinopsis.", "popularity": 10.0,
+        }]
+        body = json.dumps({"results": results}).encode("utf-8")
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass # Hedged request cancelled by the client
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def stub(monkeypatch):
+    StubTmdb.requests = []
+    StubTmdb.max_in_flight = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubTmdb, bind_and_activate=False)
+    # The default listen backlog (5) resets part of a burst of connects, which the plan then hedges around
+    server.request_queue_size = 64
+    server.server_bind()
+    server.server_activate()
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    monkeypatch.setattr(TmdbService, "BASE_URL", f"{base}/3")
+    monkeypatch.setattr(settings, "TMDB_API_KEY", "test")
+    monkeypatch.setattr(TitleIndex, "lookup", staticmethod(lambda title, year=None: None))
+    yield base
+    server.shutdown()
+    server.server_close()
+
+async def _closing(coro):
+    try:
+        return await coro
+    finally:
+        await http_client.close_client()
+
+def test_concurrent_searches_share_the_pool(stub, monkeypatch):
+    monkeypatch.setattr(settings, "LOOKUP_CONCURRENCY", 64) # Measure the pool, not the lookup limit
+    monkeypatch.setattr(settings, "TMDB_HEDGE_DELAY", 1.0) # No hedged variants while the server thinks
+    titles = [f"Pelicula Numero {i}" for i in range(10)]
+
+    async def search_all():
+        return await asyncio.gather(*(TmdbService.search_movie(t, "2001") for t in titles))
+
+    started = time.monotonic()
+    movies = asyncio.run(_closing(search_all()))
+    elapsed = time.monotonic() - started
+
+    assert [m["title"] for m in movies] == titles
+    # The first (es-MX, with year) variant settles each lookup: one request per search
+    assert len(StubTmdb.requests) == len(titles)
+    # Serially this is at least 10 * DELAY; in parallel it is about one DELAY
+    assert elapsed < 4 * DELAY, f"{elapsed:.2f}s"
+
+def test_lookup_limit_caps_requests_in_flight(stub, monkeypatch):
+    monkeypatch.setattr(settings, "LOOKUP_CONCURRENCY", 2)
+    titles = [f"Otra Pelicula {i}" for i in range(6)]
+
+    async def search_all():
+        return await asyncio.gather(*(TmdbService.search_movie(t, "2001") for t in titles))
+
+    movies = asyncio.run(_closing(search_all()))
+    assert all(movies)
+    assert StubTmdb.max_in_flight == 2
+
+def test_retries_transient_errors(stub):
+    response = asyncio.run(_closing(http_client.request_with_retry("GET", f"{stub}/flaky", backoff=0.01)))
+    assert response.status_code == 200
+    assert StubTmdb.requests == ["/flaky", "/flaky"]
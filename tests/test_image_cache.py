@@ -0,0 +1,20 @@
+from PIL import Image, ImageChops
+from cinegram.services.image_cache import ImageCache
+from test_poster_background import _synthetic_poster
+
+def test_variant_is_lossless_and_skips_the_original(monkeypatch, tmp_path):
+    monkeypatch.setattr(ImageCache, "CACHE_DIR", str(tmp_path))
+    original = tmp_path / "original.png"
+    _synthetic_poster().convert("RGB").save(original)
+    fetched = []
+    def fetch(url):
+        fetched.append(url)
+        return str(original)
+    monkeypatch.setattr(ImageCache, "fetch", staticmethod(fetch))
+
+    first = ImageCache.get_variant("https://image.tmdb.org/t/p/w780/x.jpg", (390, 2000))
+    second = ImageCache.get_variant("https://image.tmdb.org/t/p/w780/x.jpg", (390, 2000))
+
+    assert first.size == second.size == (390, 585)
+    assert fetched == ["https://image.tmdb.org/t/p/w780/x.jpg"]
+    assert ImageChops.difference(first, second).getbbox() is None
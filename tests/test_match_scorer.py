@@ -0,0 +1,30 @@
+import json
+import os
+import pytest
+from cinegram.config import settings
+from cinegram.services.match_scorer import MatchScorer
+
+# Hand-labelled TMDB result pages: `expected` is the right id, or null when nothing should match
+CASES_FILE = os.path.join(os.path.dirname(__file__), "data", "match_cases.json")
+with open(CASES_FILE, encoding="utf-8") as f:
+    CASES = json.load(f)
+
+def _params():
+    for case in CASES:
+        marks = [pytest.mark.xfail(reason=case["xfail"], strict=True)] if case.get("xfail") else []
+        yield pytest.param(case, id=case["note"], marks=marks)
+
+@pytest.mark.parametrize("case", list(_params()))
+def test_labelled_case(case):
+    match, score = MatchScorer.best(case["query"], case["year"], case["candidates"], settings.TMDB_MATCH_THRESHOLD)
+    assert (match["id"] if match else None) == case["expected"], f"best score {score:.3f}"
+
+def test_spacing_and_punctuation_are_equal():
+    assert MatchScorer.similarity("Spiderman", "Spider-Man") == 1.0
+
+@pytest.mark.parametrize("year, release, distance", [
+    ("1999", "1999-03-30", 0), ("2014.0", "2014-11-05", 0), ("2019", "2018-08-30", 1),
+    ("N/A", "1999-03-30", None), (None, "1999-03-30", None), ("1999", "", None),
+])
+def test_year_distance(year, release, distance):
+    assert MatchScorer.year_distance(year, release) == distance
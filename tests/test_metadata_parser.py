@@ -0,0 +1,18 @@
+import pytest
+from cinegram.services.metadata_parser import MetadataParser
+
+@pytest.mark.parametrize("files, expected", [
+    ([{"name": "a.mp4", "format": "MPEG4"}, {"name": "cover.jpg", "format": "JPEG"}], "cover.jpg"),
+    ([{"name": "__ia_thumb.jpg", "format": "JPEG"}, {"name": "item.jpg", "format": "Item Image"}], "item.jpg"),
+    ([{"name": "a_spectrogram.png", "format": "PNG Spectrogram"}, {"name": "still.PNG", "format": None}], "still.PNG"),
+    # Rule order beats file order
+    ([{"name": "still.png"}, {"name": "item.jpg", "format": "Item Image"}, {"name": "poster.png", "format": "PNG"}], "poster.png"),
+    ([{"name": "movie.mp4", "format": "MPEG4"}, {"name": "meta.xml", "format": "Metadata"}], None),
+    ([], None),
+])
+def test_select_poster(files, expected):
+    assert MetadataParser.select_poster(files) == expected
+    # Streamed listings (any iterator) pick the same file
+    assert MetadataParser.select_poster(iter(files)) == expected
+    ranked = [f for f in files if MetadataParser.poster_rank(f) is not None]
+    assert MetadataParser.select_poster(iter(ranked)) == expected
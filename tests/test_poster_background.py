@@ -0,0 +1,31 @@
+import random
+import pytest
+from PIL import Image, ImageChops, ImageDraw, ImageStat
+from cinegram.config import settings
+from cinegram.services.image_generator import PosterRenderer
+
+def _synthetic_poster(seed: int = 7) -> Image.Image:
+    """780x1170 poster-like image: gradient plus hard-edged shapes (the worst case for a low-res blur)."""
+    rng = random.Random(seed)
+    img = Image.linear_gradient("L").resize((780, 1170)).convert("RGB")
+    draw = ImageDraw.Draw(img)
+    for _ in range(60):
+        x, y = rng.randrange(780), rng.randrange(1170)
+        draw.rectangle((x, y, x + rng.randrange(20, 200), y + rng.randrange(20, 200)),
+                       fill=(rng.randrange(256), rng.randrange(256), rng.randrange(256)))
+    return img.convert("RGBA")
+
+@pytest.mark.parametrize("scale, max_rms", [(4, 1.0), (8, 1.5)])
+def test_fast_background_matches_exact(monkeypatch, scale, max_rms):
+    monkeypatch.setattr(settings, "POSTER_BACKGROUND_SCALE", scale)
+    renderer = PosterRenderer()
+    img = _synthetic_poster()
+
+    exact = renderer._background_exact(img).convert("RGB")
+    fast = renderer._background_fast(img).convert("RGB")
+    assert fast.size == exact.size == tuple(settings.IMAGE_SIZE)
+
+    diff = ImageChops.difference(exact, fast)
+    # Perceptual threshold: no visible banding (per-channel max) and a near-zero average error
+    assert max(high for _, high in diff.getextrema()) <= 12
+    assert max(ImageStat.Stat(diff).rms) <= max_rms
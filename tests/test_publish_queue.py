@@ -0,0 +1,45 @@
+import asyncio
+import types
+import pytest
+from cinegram.config import settings
+from cinegram.services.publish_queue import PublishQueue
+from cinegram.handlers import video_handler
+
+@pytest.fixture
+def queue(monkeypatch, tmp_path):
+    monkeypatch.setattr(PublishQueue, "PATH", str(tmp_path / "publish_queue.sqlite3"))
+    monkeypatch.setattr(PublishQueue, "_CONN", None)
+    monkeypatch.setattr(settings, "PUBLISH_MAX_ATTEMPTS", 3)
+    yield PublishQueue
+    PublishQueue._CONN.close()
+
+def orphan(queue, message_id: int, attempts: int) -> int:
+    """A job left behind by a gone process, its lease expired."""
+    job_id = queue.add(1, message_id, "file", "The Matrix", "1999")
+    queue._execute(
+        "UPDATE jobs SET lease_owner = 'gone', lease_until = 0, attempts = ? WHERE id = ?", (attempts, job_id)
+    )
+    return job_id
+
+def test_exhausted_jobs_are_failed_not_resumed(queue, monkeypatch):
+    retry = orphan(queue, 1, 2)
+    spent = orphan(queue, 2, 3)
+    resumed = []
+    async def resume_job(bot, job_id):
+        resumed.append(job_id)
+    monkeypatch.setattr(video_handler, "resume_job", resume_job)
+
+    asyncio.run(video_handler.resume_jobs(types.SimpleNamespace(bot=None)))
+
+    assert resumed == [retry]
+    job = queue.get(spent)
+    assert job["stage"] == "failed" and job["error"] == "max attempts"
+    assert queue.get(retry)["stage"] == "lookup"
+
+def test_failed_exhausted_jobs_get_purged(queue, monkeypatch):
+    spent = orphan(queue, 1, 3)
+    monkeypatch.setattr(settings, "PUBLISH_QUEUE_RETENTION", -1)
+
+    asyncio.run(video_handler.resume_jobs(types.SimpleNamespace(bot=None)))
+
+    assert queue.get(spent) is None
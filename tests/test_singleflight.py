@@ -0,0 +1,72 @@
+import asyncio
+import pytest
+from cinegram.utils.singleflight import SingleFlight
+
+class Work:
+    """Coroutine factory that records starts and cancellations, and finishes when released."""
+    def __init__(self, result="done", error=None):
+        self.started = 0
+        self.cancelled = False
+        self.release = asyncio.Event()
+        self.result, self.error = result, error
+
+    async def __call__(self):
+        self.started += 1
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if self.error:
+            raise self.error
+        return self.result
+
+def test_concurrent_callers_share_one_call():
+    async def scenario():
+        flight, work = SingleFlight("test-share"), Work()
+        callers = [asyncio.create_task(flight.do("k", work)) for _ in range(5)]
+        await asyncio.sleep(0)
+        work.release.set()
+        return await asyncio.gather(*callers), work, flight
+    results, work, flight = asyncio.run(scenario())
+    assert results == ["done"] * 5
+    assert work.started == 1 and flight.coalesced == 4 and flight.in_flight() == 0
+
+def test_lone_cancelled_caller_cancels_the_work():
+    async def scenario():
+        flight, work = SingleFlight("test-lone"), Work()
+        caller = asyncio.create_task(flight.do("k", work))
+        await asyncio.sleep(0.01)
+        caller.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await caller
+        await asyncio.sleep(0)
+        return work, flight
+    work, flight = asyncio.run(scenario())
+    assert work.cancelled
+    assert flight.in_flight() == 0 # The next caller starts fresh
+
+def test_cancelled_caller_does_not_cancel_joined_work():
+    async def scenario():
+        flight, work = SingleFlight("test-joined"), Work()
+        first = asyncio.create_task(flight.do("k", work))
+        second = asyncio.create_task(flight.do("k", work))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        await asyncio.sleep(0.01)
+        assert not work.cancelled
+        work.release.set()
+        return await second, work
+    result, work = asyncio.run(scenario())
+    assert result == "done" and work.started == 1 and not work.cancelled
+
+def test_exception_reaches_every_waiter():
+    async def scenario():
+        flight, work = SingleFlight("test-error"), Work(error=ValueError("boom"))
+        callers = [asyncio.create_task(flight.do("k", work)) for _ in range(3)]
+        await asyncio.sleep(0)
+        work.release.set()
+        return await asyncio.gather(*callers, return_exceptions=True), work
+    outcomes, work = asyncio.run(scenario())
+    assert work.started == 1
+    assert all(isinstance(o, ValueError) and str(o) == "boom" for o in outcomes)
@@ -0,0 +1,61 @@
+import os
+import pytest
+from cinegram.services.spam_filter import SpamFilter
+
+@pytest.fixture(autouse=True)
+def fresh_lexicon():
+    if os.path.exists(SpamFilter.LEARNED_FILE):
+        os.remove(SpamFilter.LEARNED_FILE)
+    SpamFilter._LEXICON = None
+    yield
+    SpamFilter._LEXICON = None
+
+@pytest.mark.parametrize("title, clean", [
+    ("La Sirenita Latino", "La Sirenita"),
+    ("El Rey Leon Latino", "El Rey Leon"),
+    ("Los Increibles Latino", "Los Increibles"),
+    ("Batman Latino Pelicula", "Batman"),
+    ("Audio Latino Shrek", "Shrek"),
+    ("Un Amante Latino", "Un Amante Latino"),
+    ("Un Latino en Paris", "Un Latino en Paris"),
+])
+def test_latino_rule(title, clean):
+    assert SpamFilter.strip(title)[0] == clean
+
+def test_learn_ignores_translations():
+    for _ in range(5):
+        assert SpamFilter.learn("Los Vengadores Latino", "The Avengers", ["Los Vengadores", "The Avengers"]) == []
+    assert SpamFilter.strip("Los Vengadores")[0] == "Los Vengadores"
+
+def test_learn_protects_resolved_titles_and_common_words():
+    for _ in range(5):
+        SpamFilter.learn("El Padrino del Barrio Megapelis", "El Padrino", ["El Padrino del Barrio", "The Godfather"])
+    assert SpamFilter._LEARNED["terms"] == ["megapelis"]
+
+def test_learn_promotes_after_threshold():
+    promoted = [SpamFilter.learn("Batman Cuevanaxyz", "Batman", ["Batman"]) for _ in range(3)]
+    assert promoted == [[], [], ["cuevanaxyz"]]
+    assert SpamFilter.strip("Joker Cuevanaxyz")[0] == "Joker"
+
+@pytest.mark.parametrize("title, clean", [
+    # Ordinary words are spam next to other spam or at the end...
+    ("Avatar 1080p Online", "Avatar"),
+    ("Avatar Online HD", "Avatar"),
+    ("Cuevana Estreno Avatar", "Avatar"),
+    ("Coco Latino HD", "Coco"),
+    ("Frozen Telegram", "Frozen"),
+    # ...but inside a title they stay
+    ("Amor Online Para Siempre", "Amor Online Para Siempre"),
+    ("Telegram Sam 2019", "Telegram Sam 2019"),
+    ("La Descarga Final", "La Descarga Final"),
+    ("El Estreno de Romeo 1080p", "El Estreno de Romeo"),
+    ("Online", "Online"),
+])
+def test_ordinary_words_only_next_to_spam(title, clean):
+    assert SpamFilter.strip(title)[0] == clean
+
+def test_learn_skips_ordinary_lexicon_words():
+    for _ in range(5):
+        SpamFilter.learn("Avatar Online", "Avatar", ["Avatar"])
+    assert SpamFilter._LEARNED["terms"] == []
+    assert SpamFilter.strip("Amor Online Para Siempre")[0] == "Amor Online Para Siempre"
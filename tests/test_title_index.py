@@ -0,0 +1,50 @@
+import gzip
+import json
+import pytest
+from cinegram.services import title_index
+from cinegram.services.title_index import TitleIndex
+
+# A few lines in the shape of TMDB's daily movie_ids_MM_DD_YYYY.json.gz export
+EXPORT = [
+    {"adult": False, "id": 603, "original_title": "The Matrix", "popularity": 80.1, "video": False},
+    {"adult": False, "id": 157336, "original_title": "Interstellar", "popularity": 110.0, "video": False},
+    {"adult": False, "id": 420818, "original_title": "The Lion King", "popularity": 90.0, "video": False},
+    {"adult": False, "id": 8587, "original_title": "The Lion King", "popularity": 85.0, "video": False},
+    {"adult": False, "id": 346364, "original_title": "It", "popularity": 95.0, "video": False},
+    {"adult": False, "id": 19116, "original_title": "It", "popularity": 2.0, "video": False},
+    {"adult": False, "id": 1, "original_title": "Obscure Short", "popularity": 0.1, "video": False},
+    {"adult": True, "id": 2, "original_title": "Adult Title", "popularity": 50.0, "video": False},
+    {"adult": False, "id": 3, "original_title": "Making Of", "popularity": 50.0, "video": True},
+]
+
+@pytest.fixture
+def index(tmp_path, monkeypatch):
+    monkeypatch.setattr(TitleIndex, "PATH", str(tmp_path / "title_index.sqlite3"))
+    monkeypatch.setattr(TitleIndex, "_CONN", None)
+    export = tmp_path / "movie_ids_01_01_2026.json.gz"
+    with gzip.open(export, "wt", encoding="utf-8") as f:
+        f.write("\n".join(json.dumps(item) for item in EXPORT) + "\n")
+    yield str(export)
+    if TitleIndex._CONN is not None:
+        TitleIndex._CONN.close()
+
+def test_export_round_trip(index):
+    assert TitleIndex.refresh(index, min_popularity=1.0) == 6
+    assert TitleIndex.lookup("the matrix") == 603
+    assert TitleIndex.lookup("Interestellar") == 157336 # Fuzzy (trigram) hit
+    assert TitleIndex.lookup("It") == 346364 # Clear popularity winner
+    assert TitleIndex.lookup("The Lion King") is None # Same-title remakes: left to the API
+    for skipped in ("Obscure Short", "Adult Title", "Making Of"):
+        assert TitleIndex.lookup(skipped) is None
+
+def test_refresh_keeps_history(index):
+    TitleIndex.add_history(8587, "El Rey León", "1994", aliases=["The Lion King"])
+    TitleIndex.refresh(index, min_popularity=1.0)
+    TitleIndex.refresh(index, min_popularity=1.0) # Replaces the export rows, no duplicates
+    assert TitleIndex.counts() == {"export": 6, "history": 2}
+    assert TitleIndex.lookup("El Rey Leon", "1994") == 8587
+    assert TitleIndex.lookup("The Lion King", "1994") == 8587 # History year settles the remake
+
+def test_cli_refresh_from_file(index, capsys):
+    title_index.main(["refresh", "--file", index, "--min-popularity", "1"])
+    assert "'export': 6" in capsys.readouterr().out
@@ -0,0 +1,38 @@
+import asyncio
+import pytest
+from cinegram.config import settings
+from cinegram.services.tmdb_service import TmdbService
+from cinegram.services.title_index import TitleIndex
+
+MOVIE = {"id": 603, "title": "Matrix", "original_title": "The Matrix", "release_date": "1999-03-30",
+         "overview": "x", "poster_path": "/m.jpg", "genre_ids": [878], "vote_average": 8.2}
+
+@pytest.fixture
+def index_hit(monkeypatch):
+    monkeypatch.setattr(settings, "TMDB_API_KEY", "test")
+    monkeypatch.setattr(TitleIndex, "lookup", staticmethod(lambda title, year=None: 603))
+
+    async def by_id(movie_id):
+        return dict(MOVIE)
+    monkeypatch.setattr(TmdbService, "get_movie_by_id", staticmethod(by_id))
+
+    searched = []
+    async def run_plan(title, year, plan):
+        searched.append(title)
+        return None
+    monkeypatch.setattr(TmdbService, "_run_plan", staticmethod(run_plan))
+    return searched
+
+@pytest.mark.parametrize("year", ["1999", "1999.0", "N/A", "", None, "2000"])
+def test_messy_years_accept_a_matching_hit(index_hit, year):
+    movie = asyncio.run(TmdbService.search_movie("The Matrix", year))
+    assert movie and movie["id"] == 603
+    assert index_hit == []
+
+def test_far_year_is_rejected(index_hit):
+    assert asyncio.run(TmdbService.search_movie("The Matrix", "2021")) is None
+    assert index_hit == ["The Matrix"]
+
+def test_unrelated_title_is_rejected_even_without_year(index_hit):
+    assert asyncio.run(TmdbService.search_movie("Dune", None)) is None
+    assert index_hit == ["Dune"]
@@ -0,0 +1,51 @@
+import asyncio
+import pytest
+from cinegram.config import settings
+from cinegram.services.tmdb_service import TmdbService
+
+def _movie(title: str, movie_id: int) -> dict:
+    return {"id": movie_id, "title": title, "original_title": title, "release_date": "2010-07-15", "popularity": 10.0}
+
+@pytest.fixture
+def variants(monkeypatch):
+    """Replaces /search/movie: answers[i] = (delay, results) for plan variant i."""
+    monkeypatch.setattr(settings, "TMDB_HEDGE_DELAY", 0.05)
+    monkeypatch.setattr(settings, "TMDB_MATCH_THRESHOLD", 0.6)
+    monkeypatch.setattr(settings, "TMDB_HEDGE_ACCEPT", 0.9)
+    calls = []
+    answers = {}
+
+    async def search(params):
+        priority = params["priority"]
+        calls.append(priority)
+        delay, results = answers[priority]
+        await asyncio.sleep(delay)
+        return results
+    monkeypatch.setattr(TmdbService, "_search", staticmethod(search))
+
+    def run(query: str, *per_variant):
+        answers.clear()
+        answers.update(enumerate(per_variant))
+        plan = [{"query": query, "language": "es-MX", "priority": i} for i in range(len(per_variant))]
+        return asyncio.run(TmdbService._run_plan(query, "2010", plan)), calls
+    return run
+
+def test_confident_first_variant_is_the_only_request(variants):
+    # "Inception 1080p" vs "Inception" scores ~0.8: over the threshold, under the hedge accept
+    found, calls = variants("Inception 1080p", (0.0, [_movie("Inception", 1)]), (0.0, [_movie("Inception", 2)]), (0.0, []))
+    assert found[1]["id"] == 1 and calls == [0]
+
+def test_falls_through_empty_variants(variants):
+    found, calls = variants("Inception 1080p", (0.0, []), (0.0, [_movie("Inception", 2)]), (0.0, []))
+    assert found[1]["id"] == 2 and calls == [0, 1]
+
+def test_later_match_waits_for_earlier_variant(variants):
+    # Variant 1 answers first over the threshold, but variant 0 (slow, hedged) could still claim the lookup
+    found, calls = variants("Inception 1080p", (0.08, [_movie("Inception", 1)]), (0.0, [_movie("Inception Movie", 2)]), (0.0, []))
+    assert found[1]["id"] == 1
+    assert 2 not in calls
+
+def test_hedge_accept_settles_at_once(variants):
+    found, calls = variants("Inception", (0.5, []), (0.0, [_movie("Inception", 2)]), (0.0, []))
+    assert found[1]["id"] == 2 and found[0] >= 0.9
+    assert 2 not in calls